@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Peak-memory benchmark: in-memory compact path vs. chunked out-of-core path
+on a minute-bar price CSV.
+
+The parent writes one synthetic CSV per signal. Each (signal, mode) pair then
+runs in a fresh interpreter: "in-memory" reads the whole CSV, runs the compact
+computation and writes the result, "chunked" streams it through
+chunked_signal.py into the output CSV. Reported: peak RSS of the process
+(VmHWM where available) next to an "imports only" baseline, and wall time. Both paths are
+checked for identical output on a prefix of the data.
+
+Usage:
+    python scripts/bench_chunked.py [--rows 2000000] [--chunk-rows 200000]
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+sys.path.append(str(SRC_DIR))
+
+COLUMNS = {"gold-nq": ["NQ", "XAU"], "concordance": ["EQ", "XAU", "UST", "DXY", "VIX", "REAL"]}
+
+CHILD = r"""
+import contextlib, io, json, resource, sys, time
+import pandas as pd
+from chunked_signal import ConcordanceStream, CsvSink, RollingSignalStream, read_price_chunks, run_chunked
+from concordance_signal import compute_concordance
+from gold_vs_nasdaq import compute_rolling_signal
+
+signal, mode, path, out, chunk_rows = sys.argv[1], sys.argv[2], sys.argv[3], sys.argv[4], int(sys.argv[5])
+
+def rss_mib():
+    # VmHWM is reset by exec; ru_maxrss on Linux keeps the forking parent's peak
+    try:
+        with open("/proc/self/status") as f:
+            return next(int(line.split()[1]) for line in f if line.startswith("VmHWM")) / 1024
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if sys.platform == "darwin" else peak / 1024  # macOS reports bytes
+
+began = time.perf_counter()
+if mode == "in-memory":
+    prices = pd.read_csv(path, index_col=0, parse_dates=True)
+    with contextlib.redirect_stdout(io.StringIO()):
+        if signal == "gold-nq":
+            result = compute_rolling_signal(prices, window=90, compact=True)
+        else:
+            result = compute_concordance(prices, window=90, compact=True)
+    result.to_csv(out)
+    rows = len(result)
+elif mode == "chunked":
+    stream = RollingSignalStream(90) if signal == "gold-nq" else ConcordanceStream(90)
+    rows = run_chunked(read_price_chunks(path, chunk_rows), stream, CsvSink(out))
+else:
+    rows = 0
+elapsed = time.perf_counter() - began
+print(json.dumps({"peak_mib": rss_mib(), "seconds": elapsed, "rows": rows}))
+"""
+
+
+def write_prices(path, columns, rows, seed=0):
+    rng = np.random.default_rng(seed)
+    index = pd.date_range("2015-01-01", periods=rows, freq="min", name="Date")
+    prices = pd.DataFrame(100 * np.exp(np.cumsum(rng.normal(0, 1e-3, (rows, len(columns))), axis=0)),
+                          index=index, columns=columns)
+    prices.to_csv(path)
+
+
+def check_identical(path, signal, chunk_rows, prefix=50_000):
+    import contextlib
+    import io
+
+    from chunked_signal import ConcordanceStream, RollingSignalStream, read_price_chunks, run_chunked
+    from concordance_signal import compute_concordance
+    from gold_vs_nasdaq import compute_rolling_signal
+
+    prices = pd.read_csv(path, index_col=0, parse_dates=True, nrows=prefix)
+    with contextlib.redirect_stdout(io.StringIO()):
+        if signal == "gold-nq":
+            expected = compute_rolling_signal(prices, window=90, compact=True)
+            stream = RollingSignalStream(90)
+        else:
+            expected = compute_concordance(prices, window=90, compact=True)
+            stream = ConcordanceStream(90)
+    chunks = (prices.iloc[i:i + chunk_rows] for i in range(0, len(prices), chunk_rows))
+    pd.testing.assert_frame_equal(run_chunked(chunks, stream), expected, check_exact=True, check_freq=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Peak memory: in-memory vs. chunked signal path")
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--chunk-rows", type=int, default=200_000)
+    args = parser.parse_args()
+
+    print(f"{args.rows:,} minute rows, chunks of {args.chunk_rows:,}")
+    print("=" * 56)
+    print(f"{'signal':<14}{'mode':<12}{'peak RSS (MiB)':>17}{'time (s)':>11}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for signal, columns in COLUMNS.items():
+            path = Path(tmp) / f"{signal}.csv"
+            write_prices(path, columns, args.rows)
+            check_identical(path, signal, chunk_rows=7_919)
+            for mode in ("imports only", "in-memory", "chunked"):
+                out = subprocess.run(
+                    [sys.executable, "-c", CHILD, signal, mode, str(path), str(Path(tmp) / "out.csv"),
+                     str(args.chunk_rows)],
+                    cwd=SRC_DIR, capture_output=True, text=True, check=True,
+                )
+                r = json.loads(out.stdout.strip().splitlines()[-1])
+                print(f"{signal:<14}{mode:<12}{r['peak_mib']:>17.1f}{r['seconds']:>11.2f}")
+    print("chunked output identical to the compact in-memory path")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark for src/market_data.py against a local stand-in chart server.
+
+The stand-in serves Yahoo-style /v8/finance/chart/{symbol} responses with
+synthetic daily bars, simulated latency, a server-side rate limit (excess
+requests get 429 + Retry-After) and optional random 5xx errors. The fetcher is
+run sequentially and concurrently so throughput and behaviour under throttling
+can be compared without network access.
+
+Usage:
+    python scripts/bench_fetcher.py [--tickers 40] [--latency-ms 50]
+                                    [--server-rate 20] [--error-rate 0.05]
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, unquote, urlparse
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / "src"))
+
+from market_data import MarketDataFetcher  # noqa: E402
+from rate_limit import TokenBucket  # noqa: E402
+
+
+def synthetic_chart(symbol, period1, period2):
+    """Deterministic random-walk daily bars for `symbol` between two epochs."""
+    seed = int(hashlib.sha256(symbol.encode()).hexdigest()[:8], 16)
+    rng = random.Random(seed)
+    day = datetime.fromtimestamp(period1, tz=timezone.utc)
+    end = datetime.fromtimestamp(period2, tz=timezone.utc)
+    timestamps, closes, price = [], [], 100.0
+    while day <= end:
+        if day.weekday() < 5:
+            price *= 1 + rng.gauss(0, 0.01)
+            timestamps.append(int(day.timestamp()) + 14 * 3600 + 1800)  # 09:30 ET open
+            closes.append(round(price, 4))
+        day += timedelta(days=1)
+    return {"chart": {"result": [{
+        "meta": {"symbol": symbol, "gmtoffset": -14400},
+        "timestamp": timestamps,
+        "indicators": {"quote": [{"close": closes}], "adjclose": [{"adjclose": closes}]},
+    }], "error": None}}
+
+
+def make_server(latency_ms, server_rate, error_rate, seed=0):
+    """Build the stand-in server; returns (server, counters)."""
+    counters = {"served": 0, "throttled": 0, "errors": 0}
+    lock = threading.Lock()
+    limiter = TokenBucket(rate=server_rate, burst=max(1, server_rate // 2)) if server_rate else None
+    rng = random.Random(seed)
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status, body=b"", headers=None):
+            self.send_response(status)
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            symbol = unquote(url.path.rsplit("/", 1)[-1])
+            query = parse_qs(url.query)
+            time.sleep(latency_ms / 1000)
+
+            if limiter is not None and not limiter.try_acquire():
+                with lock:
+                    counters["throttled"] += 1
+                return self._send(429, b"Too Many Requests", {"Retry-After": "1"})
+            with lock:
+                fail = rng.random() < error_rate
+            if fail:
+                with lock:
+                    counters["errors"] += 1
+                return self._send(503, b"Service Unavailable")
+
+            body = json.dumps(synthetic_chart(
+                symbol, int(query["period1"][0]), int(query["period2"][0])
+            )).encode()
+            with lock:
+                counters["served"] += 1
+            self._send(200, body, {"Content-Type": "application/json"})
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    return server, counters
+
+
+def run(label, base_url, symbols, start, **fetcher_kwargs):
+    with MarketDataFetcher(base_url=base_url, seed=0, **fetcher_kwargs) as fetcher:
+        result = fetcher.fetch(symbols, start)
+    stats = result.stats
+    ok = len(symbols) - len(result.failures)
+    print(f"{label:<26}{stats.elapsed_s:>9.2f}s{ok / stats.elapsed_s:>10.1f}/s"
+          f"{stats.requests:>8}{stats.retries:>8}{stats.throttled:>7}{len(result.failures):>7}")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline market data fetcher benchmark")
+    parser.add_argument("--tickers", type=int, default=40)
+    parser.add_argument("--start", default="2020-01-01")
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--server-rate", type=int, default=20,
+                        help="requests/s the stand-in accepts before answering 429 (0 = unlimited)")
+    parser.add_argument("--error-rate", type=float, default=0.05, help="fraction of random 503s")
+    args = parser.parse_args()
+
+    server, counters = make_server(args.latency_ms, args.server_rate, args.error_rate)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/v8/finance/chart"
+    symbols = [f"T{i:04d}" for i in range(args.tickers)]
+
+    print(f"{args.tickers} tickers, {args.latency_ms:.0f}ms latency, "
+          f"server limit {args.server_rate or 'none'}/s, {args.error_rate:.0%} 5xx")
+    print("=" * 72)
+    print(f"{'mode':<26}{'elapsed':>10}{'tickers':>11}{'reqs':>8}{'retries':>8}{'429s':>7}{'failed':>7}")
+
+    common = dict(backoff_base=0.05, backoff_cap=1.0, max_retries=6)
+    run("sequential, unpaced", base_url, symbols, args.start,
+        max_workers=1, rate=1e6, burst=1e6, **common)
+    run("concurrent x8, unpaced", base_url, symbols, args.start,
+        max_workers=8, rate=1e6, burst=1e6, **common)
+    pace = args.server_rate or 1e6
+    result = run(f"concurrent x8, {pace:g}/s bucket", base_url, symbols, args.start,
+                 max_workers=8, rate=pace, burst=max(1, pace // 2), **common)
+
+    print("=" * 72)
+    print(f"server: {counters['served']} served, {counters['throttled']} throttled, "
+          f"{counters['errors']} errors; last run rows={len(result.prices)}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
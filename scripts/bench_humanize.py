@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the humanize_dashes rule table against the original line-by-line
+implementation (kept verbatim below as the reference).
+
+Builds a synthetic markdown corpus (frontmatter, headings, bold-label lists,
+tables, code fences, parentheticals and plenty of plain prose), checks that
+both implementations produce identical output line for line, then times
+them and the streaming file API.
+
+Usage:
+    python scripts/bench_humanize.py [--lines 500000] [--dash-ratio 0.1]
+"""
+
+import argparse
+import random
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent))
+
+from humanize_dashes import humanize_file, humanize_lines  # noqa: E402
+
+
+def reference_humanize_line(line: str) -> str:
+    """Original implementation, unchanged."""
+    if line.strip() == '---' or re.match(r'^\s*\|[-:| ]+\|', line) or re.match(r'^-{3,}$', line):
+        return line
+    if line.strip().startswith('```') or line.strip().startswith('`'):
+        return line
+    line = re.sub(
+        r'(\*\*[^*]+\*\*:\s+[A-Za-z][^—]+)—([a-z])',
+        lambda m: f'{m.group(1)}. {m.group(2).capitalize()}',
+        line
+    )
+    line = re.sub(r'([)\"])—([a-z])', r'\1, \2', line)
+    if line.strip().startswith('#'):
+        return line
+
+    def replace_em_dash(match):
+        before, after = match.groups()
+        if line.strip().startswith('-') and '**' in line:
+            return f'{before}: {after}'
+        if before.strip().endswith(')') or len(before.strip().split()) <= 3:
+            return f'{before}, {after}'
+        return f'{before}. {after.capitalize()}'
+
+    line = re.sub(r'([A-Za-z0-9][^—\n]{1,50})—([a-z][^—\n]*)', replace_em_dash, line)
+    line = re.sub(r'\s+—\s+([^—\n]+?)\s+—\s+', r' (\1) ', line)
+    return line
+
+
+def reference_humanize_lines(lines):
+    """Original process_file loop, minus the file I/O."""
+    in_code_block = False
+    in_frontmatter = False
+    frontmatter_count = 0
+    out, changes = [], 0
+    for line in lines:
+        if line.strip() == '---':
+            frontmatter_count += 1
+            if frontmatter_count <= 2:
+                in_frontmatter = not in_frontmatter
+                out.append(line)
+                continue
+        if line.strip().startswith('```'):
+            in_code_block = not in_code_block
+            out.append(line)
+            continue
+        if in_code_block or in_frontmatter:
+            out.append(line)
+            continue
+        humanized = reference_humanize_line(line)
+        changes += humanized != line
+        out.append(humanized)
+    return out, changes
+
+
+WORDS = ("risk", "model", "signal", "window", "teams", "often", "gold", "equity", "beta",
+         "the", "a", "and", "of", "latency", "regime", "(too complex)", '"quoted"', "Nasdaq")
+
+DASH_TEMPLATES = (
+    "- **{W}**: {w} {w} {w}—{w} {w} {w} {w}.",
+    "{W} {w} {w} {w} {w} {w}—{w} {w} {w}.",
+    "{W} {w}—{w} {w}.",
+    "{W} {w} (too complex)—{w} between {w}.",
+    "{W} {w} {w} — {w} {w} — {w} {w} {w}.",
+    "## {W} {w}—{w} {w}",
+    "| {W} | {w}—{w} |",
+    "`{w}—{w}` inline code",
+    "{W} {w} {w}—{W} {w}—{w} {w}.",
+)
+
+PLAIN_TEMPLATES = (
+    "{W} {w} {w} {w} {w} {w} {w} {w} {w} {w} {w}.",
+    "- {W} {w} {w} {w}",
+    "## {W} {w}",
+    "| {w} | {w} | {w} |",
+    "|---|:--:|---|",
+    "",
+)
+
+
+def synthetic_corpus(n_lines, dash_ratio, seed=0):
+    rng = random.Random(seed)
+
+    def fill(template):
+        out = template
+        while "{w}" in out or "{W}" in out:
+            out = out.replace("{w}", rng.choice(WORDS), 1).replace("{W}", rng.choice(WORDS).capitalize(), 1)
+        return out + "\n"
+
+    lines = ["---\n", "title: \"Synthetic — post\"\n", "---\n"]
+    while len(lines) < n_lines:
+        roll = rng.random()
+        if roll < 0.01:
+            body = [fill(rng.choice(DASH_TEMPLATES)) for _ in range(rng.randint(1, 5))]
+            lines += ["```python\n", *body, "```\n"]
+        elif roll < 0.01 + dash_ratio:
+            lines.append(fill(rng.choice(DASH_TEMPLATES)))
+        else:
+            lines.append(fill(rng.choice(PLAIN_TEMPLATES)))
+    return lines
+
+
+def timed(fn, *args):
+    began = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - began
+
+
+def main():
+    parser = argparse.ArgumentParser(description="humanize_dashes rule table vs. reference")
+    parser.add_argument("--lines", type=int, default=500_000)
+    parser.add_argument("--dash-ratio", type=float, default=0.1, help="fraction of lines with an em dash")
+    args = parser.parse_args()
+
+    corpus = synthetic_corpus(args.lines, args.dash_ratio)
+    (ref_lines, ref_changes), ref_s = timed(reference_humanize_lines, corpus)
+    (new_lines, new_changes), new_s = timed(humanize_lines, corpus)
+
+    mismatches = [i for i, (a, b) in enumerate(zip(ref_lines, new_lines)) if a != b]
+    identical = not mismatches and len(ref_lines) == len(new_lines) and ref_changes == new_changes
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "corpus.md"
+        path.write_text("".join(corpus), encoding="utf-8")
+        (file_changes, _), file_s = timed(humanize_file, path)
+        file_identical = path.read_text(encoding="utf-8") == "".join(ref_lines)
+
+    print(f"{len(corpus):,} lines, {args.dash_ratio:.0%} with em dashes, {ref_changes:,} lines changed")
+    print("=" * 60)
+    print(f"{'implementation':<28}{'seconds':>10}{'lines/s':>14}")
+    for label, seconds in (("reference (per-line re.sub)", ref_s),
+                           ("rule table, in memory", new_s),
+                           ("rule table, streaming file", file_s)):
+        print(f"{label:<28}{seconds:>10.3f}{len(corpus) / seconds:>14,.0f}")
+    print("=" * 60)
+    print(f"speedup (in memory): {ref_s / new_s:.1f}x")
+    print(f"identical output: in memory {identical}, streaming file {file_identical and file_changes == ref_changes}")
+    if mismatches:
+        i = mismatches[0]
+        print(f"first mismatch at line {i}:\n  ref: {ref_lines[i]!r}\n  new: {new_lines[i]!r}")
+    if not (identical and file_identical):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
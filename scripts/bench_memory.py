@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Peak-memory benchmark: default vs. compact signal computation.
+
+Each (signal, mode) pair runs in a fresh interpreter on the same synthetic
+minute-bar-sized price history. The script reports the peak RSS growth while
+computing (ru_maxrss after minus before), the wall time, and the footprint of
+the resulting frame.
+
+Usage:
+    python scripts/bench_memory.py [--rows 500000] [--window 90]
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+
+CHILD = r"""
+import contextlib, io, json, resource, sys, time
+import numpy as np, pandas as pd
+
+signal, mode, rows, window = sys.argv[1], sys.argv[2], int(sys.argv[3]), int(sys.argv[4])
+columns = ["NQ", "XAU"] if signal == "gold-nq" else ["EQ", "XAU", "UST", "DXY", "VIX", "REAL"]
+rng = np.random.default_rng(0)
+index = pd.date_range("2015-01-01", periods=rows, freq="min")
+prices = pd.DataFrame(100 * np.exp(np.cumsum(rng.normal(0, 1e-3, (rows, len(columns))), axis=0)),
+                      index=index, columns=columns)
+
+if signal == "gold-nq":
+    from gold_vs_nasdaq import compute_rolling_signal as run, memory_footprint
+    import statsmodels.regression.rolling  # import cost is not part of the measurement
+else:
+    from concordance_signal import compute_concordance as run, memory_footprint
+
+def rss_kib():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 if sys.platform == "darwin" else peak  # macOS reports bytes
+
+before = rss_kib()
+began = time.perf_counter()
+with contextlib.redirect_stdout(io.StringIO()):
+    result = run(prices, window=window, compact=(mode == "compact"))
+elapsed = time.perf_counter() - began
+print(json.dumps({"peak_delta_mib": (rss_kib() - before) / 1024, "seconds": elapsed,
+                  "result_mib": memory_footprint(result) / 2**20, "rows": len(result)}))
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Peak RSS: default vs. compact signal path")
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--window", type=int, default=90)
+    args = parser.parse_args()
+
+    print(f"{args.rows:,} price rows, window {args.window}")
+    print("=" * 66)
+    print(f"{'signal':<14}{'mode':<10}{'peak +RSS (MiB)':>17}{'result (MiB)':>14}{'time (s)':>11}")
+    for signal in ("gold-nq", "concordance"):
+        for mode in ("default", "compact"):
+            out = subprocess.run(
+                [sys.executable, "-c", CHILD, signal, mode, str(args.rows), str(args.window)],
+                cwd=SRC_DIR, capture_output=True, text=True, check=True,
+            )
+            r = json.loads(out.stdout.strip().splitlines()[-1])
+            print(f"{signal:<14}{mode:<10}{r['peak_delta_mib']:>17.1f}"
+                  f"{r['result_mib']:>14.1f}{r['seconds']:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
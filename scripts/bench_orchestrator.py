@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: per-step orchestration overhead, validated models vs. the
+__slots__ record fast path.
+
+Tools are zero-latency, so the timings are pure orchestrator overhead:
+planning, input construction, log records, policy gate, building the run
+record and encoding it (the audit dump: json indent=2 vs. compact).
+
+Usage:
+    python scripts/bench_orchestrator.py [--runs 20000]
+"""
+
+import argparse
+import json
+import sys
+import time
+import warnings
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / "src"))
+
+from orchestrator_demo import (  # noqa: E402
+    SearchInput, SearchOutput, ToolRegistry, WriteNoteInput, WriteNoteOutput, encode_run, run_orchestrator,
+)
+
+GOAL = "Create a short briefing on gold vs. Nasdaq divergence and save a note."
+
+
+class InstantTools(ToolRegistry):
+    """Mock tools without the simulated sleep."""
+
+    def search(self, input: SearchInput) -> SearchOutput:
+        return ToolRegistry._search_result(input)
+
+    def write_note(self, input: WriteNoteInput) -> WriteNoteOutput:
+        path = f"/notes/{input.filename}"
+        return WriteNoteOutput(success=True, result=f"Written to {path}", path=path)
+
+
+def measure(runs, fast, encode):
+    registry = InstantTools()
+    steps = 0
+    began = time.perf_counter()
+    for _ in range(runs):
+        record = run_orchestrator(GOAL, registry=registry, verbose=False, fast=fast)
+        encode(record)
+        steps += len(record["logs"])
+    return (time.perf_counter() - began) / steps * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-step orchestrator overhead")
+    parser.add_argument("--runs", type=int, default=20_000)
+    args = parser.parse_args()
+
+    warnings.simplefilter("ignore")  # pydantic .dict() deprecation noise on the model path
+    configs = [
+        ("pydantic models, json indent=2", False, lambda r: json.dumps(r, indent=2)),
+        ("pydantic models, compact", False, encode_run),
+        ("slots records, compact", True, encode_run),
+    ]
+    measure(200, True, encode_run)  # warm up imports and caches
+
+    print(f"{args.runs:,} runs x 2 steps, zero-latency tools")
+    print("=" * 52)
+    print(f"{'path':<34}{'us/step':>9}{'speedup':>9}")
+    baseline = None
+    for label, fast, encode in configs:
+        per_step = measure(args.runs, fast, encode)
+        baseline = baseline or per_step
+        print(f"{label:<34}{per_step:>9.1f}{baseline / per_step:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
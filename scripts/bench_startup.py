@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark for the signal APIs.
+
+For each app, spawns a fresh interpreter (so nothing is pre-imported), times
+the module import, records which heavy dependencies got loaded, then times the
+first /signals/* response served from a pre-written snapshot. No network access
+is needed: the snapshot is marked fresh, so no refresh is triggered.
+
+Usage:
+    python scripts/bench_startup.py [--repeat 5] [--json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+
+HEAVY_MODULES = ["pandas", "numpy", "statsmodels"]
+
+APPS = {
+    "api": {
+        "path": "/signals/gold-nq",
+        "signal": "gold-nq",
+        "data": {
+            "date": "2025-10-12", "z": -1.23, "eps": -0.0087,
+            "beta_xau": -0.418, "alpha": 0.0009, "window_days": 90,
+        },
+    },
+    "api_concordance": {
+        "path": "/signals/concordance",
+        "signal": "concordance",
+        "data": {
+            "date": "2025-10-12", "concordance_score": 0.41, "prob_concordant": 0.38,
+            "betas": {"const": -0.4, "dRealY": -2.1, "DXY": -8.3, "VIX": -1.9},
+            "latest_inputs": {"dRealY": 0.002, "rDXY": -0.001, "rVIX": 0.03},
+        },
+    },
+    "signal_service": {
+        "path": "/signals/gold-nq",
+        "signal": "signal-service",
+        "data": {"computed_at": "2025-10-12T21:00:00", "errors": {}, "signals": {}},
+    },
+}
+APPS["signal_service"]["data"]["signals"] = {
+    "gold-nq": APPS["api"]["data"],
+    "concordance": APPS["api_concordance"]["data"],
+}
+
+# Runs inside the child interpreter
+CHILD = r"""
+import json, sys, time
+t0 = time.perf_counter()
+import importlib
+module = importlib.import_module(sys.argv[1])
+import_ms = (time.perf_counter() - t0) * 1000
+heavy = [m for m in json.loads(sys.argv[3]) if m in sys.modules]
+
+from fastapi.testclient import TestClient
+t1 = time.perf_counter()
+with TestClient(module.app) as client:
+    resp = client.get(sys.argv[2])
+    first_ms = (time.perf_counter() - t1) * 1000
+print(json.dumps({"import_ms": import_ms, "first_response_ms": first_ms,
+                  "status": resp.status_code, "heavy_loaded": heavy}))
+"""
+
+
+def run_once(module, spec):
+    """Run one cold start of `module` in a subprocess and return its timings."""
+    with tempfile.TemporaryDirectory() as tmp:
+        snapshot_dir = Path(tmp) / "snapshots"
+        snapshot_dir.mkdir()
+        # Fresh snapshot: served directly, no background refresh
+        (snapshot_dir / f"{spec['signal']}.json").write_text(json.dumps({
+            "version": 1, "name": spec["signal"], "computed_at": time.time(),
+            "data": spec["data"], "params": {},
+        }))
+
+        # Spans go to the temp dir too, not into src/data/traces
+        env = dict(os.environ, SIGNAL_SNAPSHOT_DIR=str(snapshot_dir),
+                   SIGNAL_CACHE_DIR=str(Path(tmp) / "cache"),
+                   SIGNAL_TRACE_FILE=str(Path(tmp) / "traces" / "spans.jsonl"))
+        out = subprocess.run(
+            [sys.executable, "-c", CHILD, module, spec["path"], json.dumps(HEAVY_MODULES)],
+            cwd=SRC_DIR, env=env, capture_output=True, text=True, check=True,
+        )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5, help="cold starts per app")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    results = {}
+    for module, spec in APPS.items():
+        runs = [run_once(module, spec) for _ in range(args.repeat)]
+        results[module] = {
+            "import_ms": statistics.median(r["import_ms"] for r in runs),
+            "first_response_ms": statistics.median(r["first_response_ms"] for r in runs),
+            "status": runs[-1]["status"],
+            "heavy_loaded": runs[-1]["heavy_loaded"],
+        }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"Cold start, median of {args.repeat} runs")
+    print("=" * 72)
+    print(f"{'app':<18}{'import (ms)':>12}{'first resp (ms)':>17}{'status':>8}  heavy modules")
+    for module, r in results.items():
+        heavy = ", ".join(r["heavy_loaded"]) or "none"
+        print(f"{module:<18}{r['import_ms']:>12.1f}{r['first_response_ms']:>17.1f}{r['status']:>8}  {heavy}")
+
+
+if __name__ == "__main__":
+    main()
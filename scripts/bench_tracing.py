@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Benchmark: cost of stage tracing on a cached signal request.
+
+Times one request's worth of spans (server root, cache, serialize) with
+tracing disabled, enabled with the OTLP/JSON file exporter, and enabled with
+the sampling profiler attached, so the per-request overhead can be compared
+with the sub-millisecond cached response it wraps. Encoding and writing run
+on the exporter's writer thread and are reported separately.
+
+Usage:
+    python scripts/bench_tracing.py [--requests 20000]
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / "src"))
+
+import signal_trace  # noqa: E402
+from signal_trace import KIND_SERVER, SamplingProfiler, span  # noqa: E402
+
+
+def request(profile=False):
+    with span("GET /signals/gold-nq", kind=KIND_SERVER, root=True, **{"http.request.method": "GET"}) as root:
+        profiler = SamplingProfiler(root.trace).start() if profile else None
+        with span("cache", signal="gold-nq") as stage:
+            with span("serialize") as s:
+                s.set(bytes=312)
+            stage.set(hit=True, rendered=False)
+        if profiler is not None:
+            profiler.stop()
+
+
+def run(n, profile=False):
+    began = time.perf_counter()
+    for _ in range(n):
+        request(profile)
+    return (time.perf_counter() - began) / n * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stage tracing overhead")
+    parser.add_argument("--requests", type=int, default=20_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "spans.jsonl"
+        print(f"{args.requests:,} traced requests (3 spans each)")
+        print("=" * 44)
+        signal_trace._exporter = None
+        print(f"{'tracing disabled':<28}{run(args.requests):>10.2f} us")
+        exporter = signal_trace.configure("bench", path=path)
+        print(f"{'file exporter':<28}{run(args.requests):>10.2f} us")
+        exporter.flush()
+        size = path.stat().st_size
+        n = max(args.requests // 20, 1)
+        print(f"{'file exporter + profiler':<28}{run(n, profile=True):>10.2f} us")
+        began = time.perf_counter()
+        exporter.flush()
+        print(f"trace file: {size / args.requests:.0f} bytes per request, "
+              f"writer thread {(time.perf_counter() - began) / n * 1e6:.0f} us per trace")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Benchmark: WebSocket fan-out through SignalHub with slow consumers.
+
+N in-process subscribers stand in for sockets: most send instantly, a few
+take `--slow-ms` per message. Updates are published at a fixed interval and
+the script reports the publish cost (what the refresh watcher pays),
+delivery latency for the fast clients, and what the slow ones dropped. A
+baseline serializes the payload per client, as a naive broadcast loop would.
+
+Usage:
+    python scripts/bench_ws_fanout.py [--clients 5000] [--slow 50] [--updates 40]
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / "src"))
+
+from signal_push import SignalHub  # noqa: E402
+
+PAYLOAD = {"date": "2025-10-10", "z": -1.2345, "eps": -0.008712, "beta_xau": -0.4183,
+           "alpha": 0.000912, "window_days": 90,
+           "regime": {"beta_xau": {"change_point": False, "run_length": 412, "last_change": "2024-05-02",
+                                   "last_direction": 1}}}
+
+
+def make_send(latencies, stamps, slow_s):
+    async def send(message):
+        if slow_s:
+            await asyncio.sleep(slow_s)
+        else:
+            latencies.append(time.perf_counter() - stamps[id(message)][0])
+    return send
+
+
+async def run(clients, slow, updates, interval_s, slow_s, per_client):
+    hub = SignalHub(max_queue=8, send_timeout=30.0)
+    latencies = []
+    stamps = {}  # id(message) -> (publish time, message), keeping the message alive
+    subscribers = []
+    for i in range(clients):
+        client = hub.connect(make_send(latencies, stamps, slow_s if i < slow else 0.0))
+        hub.subscribe(client, ["gold-nq"])
+        subscribers.append((client, asyncio.create_task(client.run())))
+
+    publish_us = []
+    for n in range(updates):
+        began = time.perf_counter()
+        if per_client:
+            # Naive loop: one serialization per connection
+            for client, _ in subscribers:
+                message = json.dumps({"type": "update", "signal": "gold-nq", "n": n, "data": PAYLOAD})
+                stamps[id(message)] = (began, message)
+                client.offer(message)
+        else:
+            message = json.dumps({"type": "update", "signal": "gold-nq", "n": n, "data": PAYLOAD})
+            stamps[id(message)] = (began, message)
+            hub.publish("gold-nq", str(n), message)
+        publish_us.append((time.perf_counter() - began) * 1e6)
+        await asyncio.sleep(interval_s)
+
+    await asyncio.sleep(slow_s * 2)
+    dropped = sum(c.dropped for c, _ in subscribers[:slow])
+    delivered_slow = sum(c.sent for c, _ in subscribers[:slow])
+    for _, task in subscribers:
+        task.cancel()
+    return publish_us, latencies, dropped, delivered_slow
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SignalHub fan-out benchmark")
+    parser.add_argument("--clients", type=int, default=5000)
+    parser.add_argument("--slow", type=int, default=50, help="clients with slow sends")
+    parser.add_argument("--slow-ms", type=float, default=200.0)
+    parser.add_argument("--updates", type=int, default=40)
+    parser.add_argument("--interval-ms", type=float, default=50.0)
+    args = parser.parse_args()
+
+    print(f"{args.clients:,} subscribers ({args.slow} taking {args.slow_ms:.0f} ms per send), "
+          f"{args.updates} updates every {args.interval_ms:.0f} ms")
+    print("=" * 78)
+    print(f"{'fan-out':<24}{'publish p50 (us)':>17}{'fast p50 (ms)':>15}{'fast p99 (ms)':>15}{'slow dropped':>14}")
+    for label, per_client in (("serialize per client", True), ("serialize once", False)):
+        publish_us, latencies, dropped, delivered = asyncio.run(run(
+            args.clients, args.slow, args.updates, args.interval_ms / 1000, args.slow_ms / 1000, per_client))
+        latencies.sort()
+        p99 = latencies[int(len(latencies) * 0.99)] * 1000
+        print(f"{label:<24}{statistics.median(publish_us):>17.0f}"
+              f"{statistics.median(latencies) * 1000:>15.2f}{p99:>15.2f}{dropped:>14,}")
+    print(f"slow clients still received {delivered:,} of {args.slow * args.updates:,} updates "
+          f"(newest kept, oldest dropped)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Build step: static signal snapshots for the Astro site.
+
+Computes the gold vs. Nasdaq signal (compute_rolling_signal) and the
+concordance score and logit (compute_concordance, fit_logit) from the local
+price store and writes one compact JSON file per signal to src/data/signals/,
+so pages can `import` the values at build time instead of calling the API:
+
+    {
+      "schema": 1,
+      "signal": "gold-nq",
+      "inputs": "<sha256 of prices + code + settings>",
+      "generated_at": "...",
+      "latest": { ...same payload as GET /signals/<name>... },
+      "history": {"date": [...], "z": [...], ...}    # LTTB-downsampled
+    }
+
+History is columnar and downsampled to at most --points rows with
+Largest-Triangle-Three-Buckets on the primary series (z, S); the other
+columns are taken at the same dates so one x axis serves every line.
+
+The price store is one date-indexed CSV of closes per signal under
+data/prices/ (gold-nq.csv: ^NDX, GC=F; concordance.csv: EQ, XAU, UST, DXY,
+VIX, REAL), refreshed from Yahoo Finance with --fetch. The build itself
+reads only local files. src/data/signals/manifest.json records the input
+hash behind each snapshot; a signal is recomputed only when its prices,
+its computation code or the build settings change (--force rebuilds all).
+
+Usage:
+    python scripts/build_signal_snapshots.py [--fetch] [--force] [--points 500]
+    npm run signals:build
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+SRC_DIR = ROOT / "src"
+sys.path.append(str(SRC_DIR))
+
+SCHEMA = 1
+PRICE_DIR = ROOT / "data" / "prices"
+OUT_DIR = SRC_DIR / "data" / "signals"
+
+
+def build_gold_nq(prices, points):
+    import gold_vs_nasdaq as gnq
+
+    signal = gnq.compute_rolling_signal(prices, window=gnq.WINDOW)
+    return gnq.latest_payload(signal, window=gnq.WINDOW), history(
+        signal, "z", {"z": 4, "beta_xau": 4, "alpha": 6}, points)
+
+
+def build_concordance(prices, points):
+    import concordance_signal as cs
+
+    signal = cs.compute_concordance(prices, window=90)
+    model = cs.fit_logit(signal)
+    probs = cs.materialize_probabilities(signal, model)
+    return cs.latest_payload(signal, model), history(probs, "S", {"S": 4, "P": 4, "I": 0}, points)
+
+
+def fetch_gold_nq():
+    import gold_vs_nasdaq as gnq
+    return gnq.fetch_prices(gnq.TICKERS, gnq.START, gnq.END)
+
+
+def fetch_concordance():
+    import concordance_signal as cs
+    return cs.fetch_prices()
+
+
+# name -> (build, fetch, modules whose code determines the output)
+SIGNALS = {
+    "gold-nq": (build_gold_nq, fetch_gold_nq,
+                ["gold_vs_nasdaq.py", "calendar_align.py", "signal_aggregates.py"]),
+    "concordance": (build_concordance, fetch_concordance,
+                    ["concordance_signal.py", "calendar_align.py", "signal_aggregates.py"]),
+}
+
+
+def history(frame, primary, decimals, points):
+    """Columnar history downsampled on `primary`, values rounded per column."""
+    import numpy as np
+    from signal_aggregates import lttb
+
+    frame = frame.dropna(subset=[primary])
+    x = frame.index.values.astype("datetime64[s]").astype(np.float64)
+    kept = lttb(x, frame[primary].to_numpy(dtype=np.float64), points)
+    sample = frame.iloc[kept]
+    out = {"date": sample.index.strftime("%Y-%m-%d").tolist()}
+    for column, places in decimals.items():
+        values = sample[column].to_numpy(dtype=np.float64)
+        out[column] = [None if np.isnan(v) else (int(v) if places == 0 else round(float(v), places))
+                       for v in values]
+    return out
+
+
+def input_hash(name, price_path, points):
+    """sha256 over the price file, the computation code and the settings."""
+    digest = hashlib.sha256()
+    digest.update(f"{name}|schema={SCHEMA}|points={points}\n".encode())
+    digest.update(price_path.read_bytes())
+    for module in SIGNALS[name][2]:
+        digest.update((SRC_DIR / module).read_bytes())
+    return digest.hexdigest()
+
+
+def write_json(path, data):
+    """Atomic compact JSON write."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(data, f, separators=(",", ":"))
+        f.write("\n")
+    os.chmod(tmp, 0o644)  # mkstemp creates 0600; the site build reads these
+    os.replace(tmp, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Static signal snapshots for the Astro site")
+    parser.add_argument("--prices", type=Path, default=PRICE_DIR, help="price store directory")
+    parser.add_argument("--out", type=Path, default=OUT_DIR, help="snapshot directory")
+    parser.add_argument("--fetch", action="store_true", help="refresh the price store from Yahoo first")
+    parser.add_argument("--force", action="store_true", help="rebuild even if inputs are unchanged")
+    parser.add_argument("--points", type=int, default=500, help="history rows kept per signal")
+    parser.add_argument("--signal", choices=list(SIGNALS), action="append",
+                        help="limit to these signals (repeatable)")
+    args = parser.parse_args()
+
+    import pandas as pd
+
+    manifest_path = args.out / "manifest.json"
+    try:
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        manifest = {}
+
+    failed = False
+    for name in args.signal or SIGNALS:
+        build, fetch, _ = SIGNALS[name]
+        price_path = args.prices / f"{name}.csv"
+        out_path = args.out / f"{name}.json"
+
+        if args.fetch:
+            try:
+                prices = fetch()
+            except Exception as e:
+                print(f"{name}: fetch failed ({e}); using the stored prices")
+            else:
+                price_path.parent.mkdir(parents=True, exist_ok=True)
+                prices.to_csv(price_path)
+
+        if not price_path.exists():
+            print(f"{name}: no price store at {price_path}, skipped (run with --fetch)")
+            continue
+
+        digest = input_hash(name, price_path, args.points)
+        if not args.force and manifest.get(name, {}).get("inputs") == digest and out_path.exists():
+            print(f"{name}: unchanged, kept {out_path.name}")
+            continue
+
+        began = time.perf_counter()
+        try:
+            prices = pd.read_csv(price_path, index_col=0, parse_dates=True)
+            latest, hist = build(prices, args.points)
+        except Exception as e:
+            print(f"{name}: build failed: {e}")
+            failed = True
+            continue
+
+        generated_at = datetime.utcnow().isoformat(timespec="seconds") + "Z"
+        write_json(out_path, {"schema": SCHEMA, "signal": name, "inputs": digest,
+                              "generated_at": generated_at, "latest": latest, "history": hist})
+        manifest[name] = {"inputs": digest, "file": out_path.name, "schema": SCHEMA,
+                          "date": latest["date"], "generated_at": generated_at}
+        write_json(manifest_path, manifest)
+        print(f"{name}: wrote {out_path.name} ({out_path.stat().st_size / 1024:.1f} KiB, "
+              f"{len(hist['date'])} history rows) in {time.perf_counter() - began:.1f}s")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,140 +2,296 @@
 """
 Script to replace em dashes with natural language connectors.
 Preserves markdown formatting, YAML frontmatter, and code blocks.
+
+Runs are incremental: a manifest of content hashes (.humanize-manifest.json)
+records every file's state after its last run, and files whose size, mtime
+or hash still match are skipped. Changed files are processed in parallel
+across a process pool. Editing this script invalidates the manifest.
+
+Usage:
+    python scripts/humanize_dashes.py [content_dir] [--full] [--jobs N]
 """
 
+import argparse
+import hashlib
+import json
+import os
 import re
+import shutil
 import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
-def humanize_line(line: str) -> str:
-    """Replace em dashes with contextual punctuation."""
-    
-    # Skip YAML frontmatter, markdown tables, and horizontal rules
-    if line.strip() == '---' or re.match(r'^\s*\|[-:| ]+\|', line) or re.match(r'^-{3,}$', line):
-        return line
-    
-    # Skip code blocks
-    if line.strip().startswith('```') or line.strip().startswith('`'):
-        return line
+MANIFEST_VERSION = 1
+
+EM_DASH = '—'
+
+# Lines left untouched: frontmatter fences, table separators, horizontal rules
+SKIP_LINE = re.compile(r'^(?:\s*\|[-:| ]+\||-{3,}$)')
+
+def _bold_label(m, line):
+    return f'{m.group(1)}. {m.group(2).capitalize()}'
+
+def _definition(m, line):
+    before, after = m.groups()
     
-    original = line
+    # If it's clearly a list item definition
+    if line.strip().startswith('-') and '**' in line:
+        return f'{before}: {after}'
     
-    # Pattern 1: Bold label followed by em dash (list items)
-    # Example: "**Risk**: Complexity—teams often..." -> "**Risk**: Complexity. Teams often..."
-    line = re.sub(
-        r'(\*\*[^*]+\*\*:\s+[A-Za-z][^—]+)—([a-z])',
-        lambda m: f'{m.group(1)}. {m.group(2).capitalize()}',
-        line
-    )
+    # If before ends with parenthetical or is a single word
+    if before.strip().endswith(')') or len(before.strip().split()) <= 3:
+        return f'{before}, {after}'
     
-    # Pattern 2: Em dash after closing parenthesis/quote
-    # Example: "(too complex)—something between" -> "(too complex), something between"
-    line = re.sub(r'([)\"])—([a-z])', r'\1, \2', line)
+    # Default: make it two sentences
+    return f'{before}. {after.capitalize()}'
+
+# Ordered rule table: (name, compiled pattern, replacement). A replacement is a
+# template string or a callable (match, line) -> str, where `line` is the text
+# as it stood before the rule ran. The HEADING_STOP marker ends processing for
+# headings, which keep their em dashes for emphasis.
+HEADING_STOP = None
+RULES = (
+    # "**Risk**: Complexity—teams often..." -> "**Risk**: Complexity. Teams often..."
+    ('bold_label', re.compile(r'(\*\*[^*]+\*\*:\s+[A-Za-z][^—]+)—([a-z])'), _bold_label),
+    # "(too complex)—something between" -> "(too complex), something between"
+    ('after_paren', re.compile(r'([)\"])—([a-z])'), r'\1, \2'),
+    ('heading', HEADING_STOP, None),
+    # "word—definition" -> "word: definition" OR "word. Definition"
+    ('definition', re.compile(r'([A-Za-z0-9][^—\n]{1,50})—([a-z][^—\n]*)'), _definition),
+    # "text — parenthetical — more" -> "text (parenthetical) more"
+    ('parenthetical', re.compile(r'\s+—\s+([^—\n]+?)\s+—\s+'), r' (\1) '),
+)
+
+def humanize_line(line: str) -> str:
+    """Replace em dashes with contextual punctuation."""
     
-    # Pattern 3: Em dash in titles (keep for emphasis)
-    if line.strip().startswith('#'):
-        return line  # Keep em dashes in headings
+    # Every rule needs an em dash, so most lines exit here
+    if EM_DASH not in line:
+        return line
     
-    # Pattern 4: Em dash as definition/explanation
-    # Example: "word—definition" -> "word: definition" OR "word. Definition"
-    def replace_em_dash(match):
-        before, after = match.groups()
-        
-        # If it's clearly a list item definition
-        if line.strip().startswith('-') and '**' in line:
-            return f'{before}: {after}'
-        
-        # If before ends with parenthetical or is a single word
-        if before.strip().endswith(')') or len(before.strip().split()) <= 3:
-            return f'{before}, {after}'
-        
-        # Default: make it two sentences
-        return f'{before}. {after.capitalize()}'
+    stripped = line.strip()
     
-    line = re.sub(
-        r'([A-Za-z0-9][^—\n]{1,50})—([a-z][^—\n]*)',
-        replace_em_dash,
-        line
-    )
+    # Skip YAML frontmatter, markdown tables, horizontal rules and code
+    if stripped == '---' or stripped.startswith('`') or SKIP_LINE.match(line):
+        return line
     
-    # Pattern 5: Parenthetical em dashes
-    # Example: "text — parenthetical — more" -> "text (parenthetical) more"
-    line = re.sub(r'\s+—\s+([^—\n]+?)\s+—\s+', r' (\1) ', line)
+    for name, pattern, replacement in RULES:
+        if pattern is HEADING_STOP:
+            if line.strip().startswith('#'):
+                return line
+            continue
+        if callable(replacement):
+            current = line
+            line = pattern.sub(lambda m: replacement(m, current), line)
+        else:
+            line = pattern.sub(replacement, line)
+        if EM_DASH not in line:
+            break
     
     return line
 
-def process_file(filepath: Path):
-    """Process a markdown file and replace em dashes."""
-    print(f"Processing: {filepath}")
-    
-    with open(filepath, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
+def humanize_stream(lines):
+    """
+    Humanize an iterable of lines, tracking frontmatter and code fences.
     
+    Yields (line, changed) pairs one at a time, so files are never held
+    in memory whole.
+    """
     in_code_block = False
     in_frontmatter = False
     frontmatter_count = 0
-    processed_lines = []
-    changes = 0
     
     for line in lines:
-        # Track YAML frontmatter
-        if line.strip() == '---':
-            frontmatter_count += 1
-            if frontmatter_count <= 2:
-                in_frontmatter = not in_frontmatter
-                processed_lines.append(line)
-                continue
+        if EM_DASH not in line:
+            # Fast path: only fence tracking can matter for this line
+            stripped = line.strip()
+            if stripped == '---':
+                frontmatter_count += 1
+                if frontmatter_count <= 2:
+                    in_frontmatter = not in_frontmatter
+            elif stripped.startswith('```'):
+                in_code_block = not in_code_block
+            yield line, False
+            continue
+        
+        stripped = line.strip()
         
-        # Track code blocks
-        if line.strip().startswith('```'):
+        # Track code blocks (a '---' line has no em dash, so never reaches here)
+        if stripped.startswith('```'):
             in_code_block = not in_code_block
-            processed_lines.append(line)
+            yield line, False
             continue
         
         # Skip processing inside code blocks or frontmatter
         if in_code_block or in_frontmatter:
-            processed_lines.append(line)
+            yield line, False
             continue
         
-        # Process the line
-        original = line
         humanized = humanize_line(line)
-        
-        if original != humanized:
-            changes += 1
-        
-        processed_lines.append(humanized)
+        yield humanized, humanized != line
+
+def humanize_lines(lines):
+    """Humanize a file's lines; returns (processed_lines, changed_line_count)."""
+    processed_lines, changes = [], 0
+    for line, changed in humanize_stream(lines):
+        processed_lines.append(line)
+        changes += changed
+    return processed_lines, changes
+
+def humanize_file(filepath: Path):
+    """
+    Humanize a file in place, streaming line by line into a temp file.
+    
+    The original is only replaced when something changed.
+    
+    Returns
+    -------
+    (changes, sha256 hex digest of the resulting content)
+    """
+    filepath = Path(filepath)
+    digest = hashlib.sha256()
+    changes = 0
+    fd, tmp = tempfile.mkstemp(dir=filepath.parent, suffix='.tmp')
+    try:
+        with open(filepath, 'r', encoding='utf-8') as src, \
+                os.fdopen(fd, 'w', encoding='utf-8') as dst:
+            for line, changed in humanize_stream(src):
+                dst.write(line)
+                digest.update(line.encode('utf-8'))
+                changes += changed
+        if changes > 0:
+            shutil.copymode(filepath, tmp)
+            os.replace(tmp, filepath)
+    finally:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+    return changes, digest.hexdigest()
+
+def process_file(filepath: Path):
+    """Process a markdown file and replace em dashes."""
+    print(f"Processing: {filepath}")
+    
+    changes, _ = humanize_file(filepath)
     
     if changes > 0:
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.writelines(processed_lines)
         print(f"  ✅ Made {changes} changes\n")
         return changes
     else:
         print(f"  ⏭️  No em dashes found\n")
         return 0
 
+def rules_fingerprint():
+    """Hash of this script, so editing the rules invalidates the manifest."""
+    return hashlib.sha256(Path(__file__).read_bytes()).hexdigest()
+
+def load_manifest(path: Path, fingerprint: str):
+    """Manifest entries {relpath: {size, mtime_ns, sha256}}; empty if stale or missing."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if manifest.get('version') != MANIFEST_VERSION or manifest.get('rules') != fingerprint:
+        return {}
+    return manifest.get('files', {})
+
+def save_manifest(path: Path, fingerprint: str, files: dict):
+    tmp = path.with_suffix(path.suffix + '.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump({'version': MANIFEST_VERSION, 'rules': fingerprint, 'files': files}, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+def file_entry(filepath: Path, digest: str):
+    stat = filepath.stat()
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': digest}
+
+def is_unchanged(filepath: Path, entry):
+    """
+    Whether a file still matches its manifest entry.
+    
+    Returns (unchanged, refreshed_entry). Size and mtime are checked first so
+    an untouched tree is never read; a touched file with identical content
+    only costs one hash.
+    """
+    if entry is None:
+        return False, None
+    stat = filepath.stat()
+    if stat.st_size == entry['size'] and stat.st_mtime_ns == entry['mtime_ns']:
+        return True, entry
+    if stat.st_size != entry['size']:
+        return False, None
+    digest = hashlib.sha256(filepath.read_bytes()).hexdigest()
+    if digest == entry['sha256']:
+        return True, file_entry(filepath, digest)
+    return False, None
+
+def process_job(filepath: Path):
+    """Pool worker: humanize one file in place and return its timing and new hash."""
+    began = time.perf_counter()
+    changes, digest = humanize_file(filepath)
+    return {
+        'path': filepath,
+        'changes': changes,
+        'seconds': time.perf_counter() - began,
+        'entry': file_entry(filepath, digest),
+    }
+
 def main():
-    content_dir = Path('src/content')
+    parser = argparse.ArgumentParser(description='Replace em dashes in markdown content')
+    parser.add_argument('content_dir', nargs='?', default='src/content')
+    parser.add_argument('--manifest', default='.humanize-manifest.json',
+                        help='content-hash manifest used to skip unchanged files')
+    parser.add_argument('--full', action='store_true', help='ignore the manifest and process every file')
+    parser.add_argument('--jobs', type=int, default=None, help='worker processes (default: CPU count)')
+    args = parser.parse_args()
+    
+    began = time.perf_counter()
+    content_dir = Path(args.content_dir)
+    manifest_path = Path(args.manifest)
+    fingerprint = rules_fingerprint()
+    previous = {} if args.full else load_manifest(manifest_path, fingerprint)
     
     # Find all markdown files, excluding archive
-    md_files = [
+    md_files = sorted(
         f for f in content_dir.rglob('*.md')
         if '_archive' not in str(f)
-    ]
+    )
+    
+    files, pending = {}, []
+    for md_file in md_files:
+        key = md_file.as_posix()
+        unchanged, entry = is_unchanged(md_file, previous.get(key))
+        if unchanged:
+            files[key] = entry
+        else:
+            pending.append(md_file)
     
-    print(f"Found {len(md_files)} markdown files to process\n")
+    print(f"Found {len(md_files)} markdown files, {len(pending)} changed since last run\n")
     print("=" * 60)
-    print()
+    print(f"  {'time':>11}  {'result':<16} file")
+    
+    results = []
+    if len(pending) == 1 or args.jobs == 1:
+        results = [process_job(f) for f in pending]
+    elif pending:
+        with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+            results = list(pool.map(process_job, pending))
     
     total_changes = 0
-    for md_file in md_files:
-        changes = process_file(md_file)
-        total_changes += changes
+    for r in sorted(results, key=lambda r: r['seconds'], reverse=True):
+        files[r['path'].as_posix()] = r['entry']
+        total_changes += r['changes']
+        status = f"{r['changes']} changes" if r['changes'] else "no em dashes"
+        print(f"  {r['seconds'] * 1000:8.1f} ms  {status:<16} {r['path']}")
+    
+    save_manifest(manifest_path, fingerprint, files)
     
     print("=" * 60)
-    print(f"\n✨ Complete! Made {total_changes} total changes across {len(md_files)} files")
+    print(f"\n✨ Complete! Made {total_changes} total changes across {len(results)} processed files "
+          f"({len(md_files) - len(pending)} unchanged, skipped) in {time.perf_counter() - began:.2f}s")
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+Deterministic in-process load generator for src/api_agents.py.
+
+Drives POST /run through httpx.ASGITransport, so no server, network or real
+tools are needed (works offline and in CI). The tool registry is swapped for
+SimulatedTools with configurable per-tool latency distributions and failure
+rates; arrivals are an open-loop Poisson process and goals are drawn from a
+weighted mix, both seeded so the same flags replay the same request schedule.
+
+Reports throughput, goodput (approved within max_cost_ms end to end), latency
+percentiles, queue depth (requests in flight and requests waiting for a worker
+thread), PolicyGate outcomes and admission-control rejections (429/503).
+--no-admission lifts the API's admission limits for a baseline comparison.
+
+Usage:
+    python scripts/loadgen_agents.py [--rate 50] [--requests 500]
+        [--goal-mix briefing=0.8,approval=0.1,unplanned=0.1]
+        [--latency search=lognormal:100:0.5,write_note=uniform:50:150]
+        [--failure-rate search=0.02] [--max-cost-ms 1000] [--no-admission] [--json]
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / "src"))
+
+import anyio.to_thread  # noqa: E402
+import httpx  # noqa: E402
+
+import api_agents  # noqa: E402
+from admission import AdmissionController  # noqa: E402
+from orchestrator_demo import CalcInput, CalcOutput, SearchInput, SearchOutput, ToolRegistry  # noqa: E402
+from orchestrator_demo import WriteNoteInput, WriteNoteOutput  # noqa: E402
+
+GOALS = {
+    "briefing": ("Create a short briefing on gold vs. Nasdaq divergence and save a note.", False),
+    "approval": ("Create a short briefing on gold vs. Nasdaq divergence and save a note.", True),
+    "unplanned": ("Summarize today's weather.", False),
+}
+
+
+class SimulatedToolError(RuntimeError):
+    pass
+
+
+def parse_latency(spec):
+    """
+    Latency sampler from a spec string, in milliseconds.
+
+    fixed:MS | uniform:LO:HI | exp:MEAN | lognormal:MEDIAN:SIGMA
+    """
+    kind, *args = spec.split(":")
+    args = [float(a) for a in args]
+    if kind == "fixed":
+        return lambda rng: args[0]
+    if kind == "uniform":
+        return lambda rng: rng.uniform(args[0], args[1])
+    if kind == "exp":
+        return lambda rng: rng.expovariate(1 / args[0])
+    if kind == "lognormal":
+        return lambda rng: rng.lognormvariate(math.log(args[0]), args[1])
+    raise ValueError(f"Unknown latency distribution '{spec}'")
+
+
+def parse_pairs(text, convert):
+    """'a=1,b=2' -> {"a": convert("1"), "b": convert("2")}."""
+    pairs = {}
+    for item in filter(None, (text or "").split(",")):
+        key, value = item.split("=", 1)
+        pairs[key.strip()] = convert(value.strip())
+    return pairs
+
+
+class SimulatedTools(ToolRegistry):
+    """
+    Drop-in ToolRegistry with simulated latency and transient failures.
+
+    Results come from the mock registry, so verification behaves as in the
+    demo. Draws come from one seeded RNG; the sequence is fixed, although
+    which concurrent call gets which draw depends on thread scheduling.
+    """
+
+    DEFAULT_LATENCY = {"search": "fixed:100", "calc": "fixed:50", "write_note": "fixed:100"}
+
+    def __init__(self, latency=None, failure_rate=None, seed=0):
+        specs = {**self.DEFAULT_LATENCY, **(latency or {})}
+        self.latency = {tool: parse_latency(spec) for tool, spec in specs.items()}
+        self.failure_rate = failure_rate or {}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = Counter()
+        self.failures = Counter()
+
+    def _simulate(self, tool):
+        with self._lock:
+            delay = max(0.0, self.latency[tool](self._rng)) / 1000
+            fail = self._rng.random() < self.failure_rate.get(tool, 0.0)
+            self.calls[tool] += 1
+            self.failures[tool] += fail
+        time.sleep(delay)
+        if fail:
+            raise SimulatedToolError(f"simulated {tool} failure")
+
+    def search(self, input: SearchInput) -> SearchOutput:
+        self._simulate("search")
+        return ToolRegistry._search_result(input)
+
+    def search_batch(self, inputs):
+        self._simulate("search")
+        return [ToolRegistry._search_result(input) for input in inputs]
+
+    def calc(self, input: CalcInput) -> CalcOutput:
+        self._simulate("calc")
+        value = float(len(input.expression))
+        return CalcOutput(success=True, result=value, value=value)
+
+    def write_note(self, input: WriteNoteInput) -> WriteNoteOutput:
+        self._simulate("write_note")
+        path = f"/notes/{input.filename}"
+        return WriteNoteOutput(success=True, result=f"Written to {path}", path=path)
+
+
+def classify(status_code, body):
+    """PolicyGate outcome (or HTTP-level result) for one response."""
+    if status_code != 200:
+        return f"http {status_code}"
+    verdict = body["verdict"]
+    if verdict.startswith("APPROVED"):
+        return "approved"
+    if verdict.startswith("ESCALATE"):
+        return "escalated"
+    if "exceeds" in verdict:
+        return "blocked: cost"
+    if "verification" in verdict:
+        return "blocked: verification"
+    if body["status"] == "failed":
+        return "no plan"
+    return "other"
+
+
+def schedule(n_requests, rate, goal_mix, seed=0):
+    """Deterministic (arrival offset seconds, goal name) pairs."""
+    rng = random.Random(seed)
+    names, weights = zip(*goal_mix.items())
+    t, arrivals = 0.0, []
+    for _ in range(n_requests):
+        t += rng.expovariate(rate)
+        arrivals.append((t, rng.choices(names, weights)[0]))
+    return arrivals
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return float("nan")
+    index = min(len(sorted_values) - 1, max(0, math.ceil(q * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+async def run_load(app, arrivals, max_cost_ms, sample_ms=10, client_ids=1):
+    """
+    Fire `arrivals` at the app on schedule and collect per-request results.
+
+    Returns
+    -------
+    dict
+        Report with throughput, latency percentiles, queue depth and outcomes
+    """
+    results = []
+    in_flight = 0
+    depth_samples = []
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://loadgen", timeout=None) as client:
+
+        async def one(i, goal_name):
+            nonlocal in_flight
+            goal, require_approval = GOALS[goal_name]
+            payload = {"goal": goal, "max_cost_ms": max_cost_ms, "require_approval": require_approval}
+            headers = {"X-Client-Id": f"client-{i % client_ids}"}
+            in_flight += 1
+            began = time.perf_counter()
+            try:
+                resp = await client.post("/run", json=payload, headers=headers)
+                body = resp.json() if resp.headers.get("content-type", "").startswith("application/json") else {}
+                outcome = classify(resp.status_code, body)
+            except Exception as e:
+                outcome = f"error: {type(e).__name__}"
+            finally:
+                in_flight -= 1
+            latency_ms = (time.perf_counter() - began) * 1000
+            if outcome == "approved" and latency_ms > max_cost_ms:
+                outcome = "approved, over budget"
+            results.append((goal_name, outcome, latency_ms))
+
+        async def sampler():
+            while True:
+                stats = limiter.statistics()
+                depth_samples.append((in_flight, stats.tasks_waiting))
+                await asyncio.sleep(sample_ms / 1000)
+
+        sampling = asyncio.create_task(sampler())
+        began = time.perf_counter()
+        tasks = []
+        for i, (offset, goal_name) in enumerate(arrivals):
+            delay = offset - (time.perf_counter() - began)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(one(i, goal_name)))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - began
+        sampling.cancel()
+
+    latencies = sorted(ms for _, _, ms in results)
+    approved = [ms for _, outcome, ms in results if outcome == "approved"]
+    in_flight_samples = [d for d, _ in depth_samples] or [0]
+    waiting_samples = [w for _, w in depth_samples] or [0]
+    return {
+        "requests": len(results),
+        "elapsed_s": elapsed,
+        "throughput_rps": len(results) / elapsed,
+        "goodput_rps": len(approved) / elapsed,
+        "admitted_latency_ms": {q: percentile(sorted(ms for _, o, ms in results if not o.startswith("http")), p)
+                                for q, p in (("p50", 0.5), ("p99", 0.99))},
+        "latency_ms": {q: percentile(latencies, p) for q, p in
+                       (("p50", 0.5), ("p90", 0.9), ("p99", 0.99), ("max", 1.0))},
+        "queue_depth": {
+            "in_flight_mean": sum(in_flight_samples) / len(in_flight_samples),
+            "in_flight_max": max(in_flight_samples),
+            "thread_wait_mean": sum(waiting_samples) / len(waiting_samples),
+            "thread_wait_max": max(waiting_samples),
+        },
+        "outcomes": dict(Counter(outcome for _, outcome, _ in results).most_common()),
+        "goals": dict(Counter(goal for goal, _, _ in results).most_common()),
+    }
+
+
+def print_report(report, tools):
+    print("=" * 60)
+    print(f"requests {report['requests']} in {report['elapsed_s']:.2f}s: "
+          f"{report['throughput_rps']:.1f} req/s, goodput {report['goodput_rps']:.1f} approved/s")
+    lat = report["latency_ms"]
+    print(f"latency ms: p50 {lat['p50']:.0f}  p90 {lat['p90']:.0f}  p99 {lat['p99']:.0f}  max {lat['max']:.0f}")
+    adm = report["admitted_latency_ms"]
+    print(f"admitted latency ms: p50 {adm['p50']:.0f}  p99 {adm['p99']:.0f}")
+    q = report["queue_depth"]
+    print(f"queue depth: in flight mean {q['in_flight_mean']:.1f} / max {q['in_flight_max']}, "
+          f"waiting for a thread mean {q['thread_wait_mean']:.1f} / max {q['thread_wait_max']}")
+    print("outcomes:")
+    for outcome, count in report["outcomes"].items():
+        print(f"  {outcome:<24}{count:>6}{count / report['requests']:>8.1%}")
+    print(f"tool calls: {dict(tools.calls)}, simulated failures: {dict(+tools.failures)}")
+    print(f"admission: {report['admission']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="In-process load generator for the agents API")
+    parser.add_argument("--rate", type=float, default=50.0, help="mean arrivals per second (Poisson)")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--goal-mix", default="briefing=0.8,approval=0.1,unplanned=0.1",
+                        help=f"weights over {', '.join(GOALS)}")
+    parser.add_argument("--latency", default="search=lognormal:100:0.5,write_note=uniform:50:150",
+                        help="per-tool latency: fixed:MS | uniform:LO:HI | exp:MEAN | lognormal:MEDIAN:SIGMA")
+    parser.add_argument("--failure-rate", default="search=0.02", help="per-tool transient failure rate")
+    parser.add_argument("--max-cost-ms", type=float, default=1000)
+    parser.add_argument("--clients", type=int, default=50, help="distinct X-Client-Id values, round robin")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-admission", action="store_true",
+                        help="disable rate limits, the concurrency cap and shedding (baseline)")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    goal_mix = parse_pairs(args.goal_mix, float)
+    unknown = set(goal_mix) - set(GOALS)
+    if unknown:
+        parser.error(f"unknown goals {sorted(unknown)}; choose from {list(GOALS)}")
+
+    tools = SimulatedTools(latency=parse_pairs(args.latency, str),
+                           failure_rate=parse_pairs(args.failure_rate, float), seed=args.seed)
+    api_agents.tool_registry = tools
+    if args.no_admission:
+        api_agents.admission = AdmissionController(max_in_flight=10**6, client_rate=1e9, client_burst=1e9,
+                                                    max_queue=0, shed=False)
+
+    arrivals = schedule(args.requests, args.rate, goal_mix, seed=args.seed)
+    report = asyncio.run(run_load(api_agents.app, arrivals, args.max_cost_ms, client_ids=args.clients))
+    report["admission"] = api_agents.admission.snapshot()
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"{args.requests} requests at {args.rate:g}/s, goal mix {goal_mix}, max_cost_ms {args.max_cost_ms:g}")
+        print_report(report, tools)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""
+admission.py
+
+Admission control for request handlers that run expensive work off the event
+loop: per-client token buckets, a cap on work in flight, and latency-aware
+load shedding against each request's own latency budget.
+
+A request is rejected up front (before it takes a worker thread) when:
+    - its client has no token left                        -> 429
+    - the wait queue is full                              -> 503
+    - expected queueing delay + expected service time
+      already exceeds the request's budget                -> 503
+
+Queued requests are re-checked when a slot frees up, so one that waited too
+long is shed instead of being run into a certain budget breach. Service time
+is tracked as an EWMA of completed runs.
+
+Dependencies:
+    standard library only
+
+Usage:
+    admission = AdmissionController(max_in_flight=32, client_rate=10, client_burst=20)
+
+    async def handler(...):
+        ticket = admission.admit(client_id, budget_ms)   # raises Rejected
+        async with ticket:                               # waits for a slot
+            ...
+"""
+
+import asyncio
+import math
+import time
+from collections import OrderedDict, deque
+
+from rate_limit import TokenBucket
+
+
+class Rejected(Exception):
+    """Request refused by admission control."""
+
+    def __init__(self, status_code, reason, retry_after):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after = retry_after
+
+    def headers(self):
+        return {"Retry-After": str(max(1, math.ceil(self.retry_after)))}
+
+
+class AdmissionController:
+    """
+    Per-client rate limits, a concurrency cap and EWMA-based load shedding.
+
+    All methods must be called from the event loop thread; only the
+    admitted work itself runs elsewhere.
+
+    Parameters
+    ----------
+    max_in_flight : int
+        Maximum concurrently running requests
+    client_rate, client_burst : float
+        Token bucket per client id (requests/s, burst size)
+    max_queue : int or None
+        Maximum requests waiting for a slot (default 4 * max_in_flight, 0 = unbounded)
+    initial_service_ms : float
+        Service-time estimate before any request has completed
+    alpha : float
+        EWMA smoothing factor for observed service times
+    max_clients : int
+        Client buckets kept (least recently seen are dropped first)
+    shed : bool
+        Reject requests whose budget is unattainable (False: only rate
+        limits and the concurrency cap apply)
+    """
+
+    def __init__(self, max_in_flight=32, client_rate=10.0, client_burst=20.0, max_queue=None,
+                 initial_service_ms=250.0, alpha=0.2, max_clients=10_000, shed=True,
+                 clock=time.monotonic):
+        self.max_in_flight = max_in_flight
+        self.client_rate = client_rate
+        self.client_burst = client_burst
+        self.max_queue = 4 * max_in_flight if max_queue is None else max_queue or None
+        self.service_ms = initial_service_ms
+        self.alpha = alpha
+        self.max_clients = max_clients
+        self.shed = shed
+        self._clock = clock
+        self._buckets = OrderedDict()
+        self._waiters = deque()
+        self.in_flight = 0
+        self.stats = {"admitted": 0, "rate_limited": 0, "shed": 0, "shed_in_queue": 0}
+
+    @property
+    def queued(self):
+        return len(self._waiters)
+
+    def _bucket(self, client_id):
+        bucket = self._buckets.get(client_id)
+        if bucket is None:
+            bucket = TokenBucket(self.client_rate, self.client_burst, clock=self._clock)
+            self._buckets[client_id] = bucket
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(client_id)
+        return bucket
+
+    def expected_wait_ms(self, position=None):
+        """Expected queueing delay for a request at `position` in the queue."""
+        if position is None:
+            position = len(self._waiters)
+        if self.in_flight < self.max_in_flight and position == 0:
+            return 0.0
+        # Slots free up at max_in_flight per service time
+        return (position // self.max_in_flight + 1) * self.service_ms
+
+    def admit(self, client_id, budget_ms):
+        """
+        Decide whether to accept a request.
+
+        Returns
+        -------
+        Ticket
+            Async context manager that waits for a slot and releases it
+
+        Raises
+        ------
+        Rejected
+            429 when the client is over its rate, 503 when overloaded
+        """
+        bucket = self._bucket(client_id)
+        if not bucket.try_acquire():
+            self.stats["rate_limited"] += 1
+            raise Rejected(429, "Rate limit exceeded for client", bucket.wait_time())
+
+        if self.max_queue is not None and len(self._waiters) >= self.max_queue:
+            self.stats["shed"] += 1
+            raise Rejected(503, "Server overloaded: queue full", self.expected_wait_ms() / 1000)
+
+        wait_ms = self.expected_wait_ms()
+        if self.shed and wait_ms + self.service_ms > budget_ms:
+            self.stats["shed"] += 1
+            raise Rejected(503, f"Server overloaded: expected {wait_ms + self.service_ms:.0f}ms "
+                                f"exceeds max_cost_ms {budget_ms:.0f}", wait_ms / 1000)
+
+        self.stats["admitted"] += 1
+        return Ticket(self, budget_ms)
+
+    async def _acquire(self, budget_ms):
+        arrived = self._clock()
+        if self.in_flight < self.max_in_flight and not self._waiters:
+            self.in_flight += 1
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except BaseException:
+            if not waiter.cancelled() and waiter.done():
+                self._release_slot()  # Slot was handed to us as we were cancelled
+            elif waiter in self._waiters:
+                self._waiters.remove(waiter)
+            raise
+
+        # We now hold a slot; give it up if the budget can no longer be met
+        waited_ms = (self._clock() - arrived) * 1000
+        if self.shed and waited_ms + self.service_ms > budget_ms:
+            self._release_slot()
+            self.stats["shed_in_queue"] += 1
+            raise Rejected(503, f"Server overloaded: waited {waited_ms:.0f}ms in queue, "
+                                f"max_cost_ms {budget_ms:.0f} unattainable", self.expected_wait_ms() / 1000)
+
+    def _release_slot(self):
+        # Hand the slot straight to the next live waiter, if any
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+    def _record(self, service_ms):
+        self.service_ms += self.alpha * (service_ms - self.service_ms)
+
+    def snapshot(self):
+        return {"in_flight": self.in_flight, "queued": self.queued,
+                "service_ms_ewma": round(self.service_ms, 1), **self.stats}
+
+
+class Ticket:
+    """Slot reservation returned by AdmissionController.admit."""
+
+    def __init__(self, controller, budget_ms):
+        self.controller = controller
+        self.budget_ms = budget_ms
+        self._started = None
+
+    async def __aenter__(self):
+        await self.controller._acquire(self.budget_ms)
+        self._started = self.controller._clock()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.controller._record((self.controller._clock() - self._started) * 1000)
+        self.controller._release_slot()
+        return False
@@ -4,10 +4,11 @@ api.py
 FastAPI endpoint for gold vs. Nasdaq divergence signal.
 
 Provides a simple REST API to query the latest divergence metrics.
-For production, consider caching results in Redis/DynamoDB.
+Results are cached host-wide in shared memory (see signal_cache.py).
+Parameterized pair results are cached per worker (see result_cache.py).
 
 Dependencies:
-    fastapi, uvicorn, pandas, numpy, yfinance, statsmodels
+    fastapi, uvicorn, pandas, numpy, httpx, statsmodels
 
 Usage:
     uvicorn api:app --reload --port 8000
@@ -16,40 +17,72 @@ Endpoints:
     GET /signals/gold-nq
         Returns latest divergence metrics as JSON
     
+    GET /signals/divergence?y=^NDX&x=GC=F&window=60&start=2018-01-01
+        Latest divergence metrics for any ticker pair, window and start
+
     GET /health
         Health check endpoint
+
+    GET /profiles/{trace_id}
+        Folded-stack profile of a request sent with `X-Profile: 1`
+        (honored when SIGNAL_PROFILING=1)
+
+Requests are traced (see signal_trace.py) and answered with their X-Trace-Id.
 """
 
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import PlainTextResponse
+from contextlib import asynccontextmanager
 from datetime import datetime
-import pandas as pd
 
-# Import our signal computation
+import os
 import sys
+import threading
 from pathlib import Path
 
 # Add parent directory to path to import gold_vs_nasdaq module
 sys.path.append(str(Path(__file__).parent))
 
-try:
-    from gold_vs_nasdaq import fetch_prices, compute_rolling_signal, TICKERS, START, WINDOW
-except ImportError:
-    # Fallback if running from different directory
+from api_models import DivergenceResponse, HealthResponse, SignalResponse
+from signal_cache import SharedSignalCache
+from signal_snapshot import save_snapshot, warm_cache
+from signal_trace import TracingMiddleware, configure as configure_tracing, read_profile, span
+
+SIGNAL_NAME = "gold-nq"
+
+# Memory budget of the per-worker parameterized result cache
+RESULT_CACHE_BYTES = int(os.environ.get("SIGNAL_RESULT_CACHE_MB", "256")) * 2**20
+
+
+def _signal_module():
+    """
+    Import gold_vs_nasdaq on first use.
+    
+    It pulls in pandas, numpy, httpx and statsmodels, which dominate
+    worker boot time; deferring the import lets a new worker answer from
+    the snapshot before any of them are loaded.
+    """
     import gold_vs_nasdaq
-    fetch_prices = gold_vs_nasdaq.fetch_prices
-    compute_rolling_signal = gold_vs_nasdaq.compute_rolling_signal
-    TICKERS = gold_vs_nasdaq.TICKERS
-    START = gold_vs_nasdaq.START
-    WINDOW = gold_vs_nasdaq.WINDOW
+    return gold_vs_nasdaq
+
+
+@asynccontextmanager
+async def lifespan(app):
+    """Seed the shared cache from the last snapshot so cold workers answer instantly."""
+    configure_tracing("gold-nq-api")
+    warm_cache(_signal_cache, SIGNAL_NAME)
+    yield
+    if _divergence is not None:
+        _divergence.close()
 
 
 # Initialize FastAPI app
 app = FastAPI(
     title="Gold vs. Nasdaq Divergence API",
     description="REST API for querying gold-Nasdaq rolling divergence metrics",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Enable CORS for local development
@@ -59,54 +92,55 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Trace-Id", "X-Profile-Artifact"],
 )
+app.add_middleware(TracingMiddleware)
 
 
-# Response models
-class SignalResponse(BaseModel):
-    """Response model for divergence signal."""
-    date: str
-    z: float
-    eps: float
-    beta_xau: float
-    alpha: float
-    window_days: int
-    
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "date": "2025-10-12",
-                "z": -1.23,
-                "eps": -0.0087,
-                "beta_xau": -0.418,
-                "alpha": 0.0009,
-                "window_days": 90
-            }
-        }
-
-
-class HealthResponse(BaseModel):
-    """Health check response."""
-    status: str
-    timestamp: str
+# Host-wide cache for signal data, shared by every uvicorn worker.
+# The first worker to notice a stale entry recomputes it; the rest keep
+# serving the previous value, so fetch + regression run once per host per TTL.
+_signal_cache = SharedSignalCache(SIGNAL_NAME, ttl_seconds=300)
 
 
-# Cache for signal data (simple in-memory cache)
-# For production, use Redis or similar
-_signal_cache = {
-    "data": None,
-    "timestamp": None
-}
+def compute_latest_signal():
+    """
+    Fetch prices and compute the latest signal (no caching).
+    
+    The result is also written to the on-disk snapshot used for warm starts.
+    
+    Returns
+    -------
+    dict
+        Latest signal metrics
+    """
+    with span("refresh", root=True):
+        gnq = _signal_module()
+        prices = gnq.fetch_prices(gnq.TICKERS, gnq.START, None)
+        signal = gnq.compute_rolling_signal(prices, window=gnq.WINDOW)
+        
+        result = gnq.latest_payload(signal, window=gnq.WINDOW)
+        latest = signal.iloc[-1]
+    
+    save_snapshot(SIGNAL_NAME, result, params={
+        "window": gnq.WINDOW,
+        "alpha": float(latest["alpha"]),
+        "beta_xau": float(latest["beta_xau"]),
+        "eps_std": float(latest["eps_std"]),
+    })
+    
+    return result
 
 
 def get_latest_signal():
     """
-    Fetch and compute the latest signal.
+    Return the latest signal from the shared cache, recomputing when stale.
     
-    In production, this should:
-    1. Check cache TTL (e.g., 5 minutes)
-    2. If stale, recompute and update cache
-    3. Return cached result if fresh
+    Cached results live for 5 minutes. Reads are lock-free; only the
+    elected writer worker recomputes, others serve the previous value
+    until the refresh lands. A stale value (e.g. seeded from the startup
+    snapshot) is returned immediately while the refresh runs in the
+    background.
     
     Returns
     -------
@@ -118,43 +152,35 @@ def get_latest_signal():
     Exception
         If computation fails
     """
-    # Simple time-based cache (5 minutes)
-    now = datetime.utcnow()
-    
-    if (_signal_cache["data"] is not None and 
-        _signal_cache["timestamp"] is not None):
-        elapsed = (now - _signal_cache["timestamp"]).total_seconds()
-        if elapsed < 300:  # 5 minutes
-            return _signal_cache["data"]
-    
-    # Compute fresh signal
     try:
-        prices = fetch_prices(TICKERS, START, None)
-        signal = compute_rolling_signal(prices, window=WINDOW)
-        
-        # Extract latest row
-        latest = signal.iloc[-1]
-        latest_date = signal.index[-1]
-        
-        result = {
-            "date": latest_date.strftime("%Y-%m-%d"),
-            "z": round(float(latest["z"]), 4),
-            "eps": round(float(latest["eps"]), 6),
-            "beta_xau": round(float(latest["beta_xau"]), 4),
-            "alpha": round(float(latest["alpha"]), 6),
-            "window_days": WINDOW
-        }
-        
-        # Update cache
-        _signal_cache["data"] = result
-        _signal_cache["timestamp"] = now
-        
-        return result
+        with span("cache", signal=SIGNAL_NAME):
+            return _signal_cache.get_or_compute(compute_latest_signal, background=True)
     
     except Exception as e:
         raise Exception(f"Failed to compute signal: {str(e)}")
 
 
+_divergence = None
+_divergence_lock = threading.Lock()
+
+
+def _divergence_service():
+    """
+    Per-worker DivergenceService, created on first use (like _signal_module).
+
+    Sync endpoints run in the threadpool, so concurrent first requests take
+    the lock; only one service (and its fetcher) is ever built.
+    """
+    global _divergence
+    if _divergence is None:
+        with _divergence_lock:
+            if _divergence is None:
+                from divergence import DivergenceService
+                from result_cache import ResultCache
+                _divergence = DivergenceService(ResultCache(max_bytes=RESULT_CACHE_BYTES, ttl_seconds=300))
+    return _divergence
+
+
 @app.get("/", tags=["Root"])
 async def root():
     """Root endpoint with API information."""
@@ -163,6 +189,7 @@ async def root():
         "version": "1.0.0",
         "endpoints": {
             "signal": "/signals/gold-nq",
+            "divergence": "/signals/divergence?y=^NDX&x=GC=F&window=90&start=2015-01-01",
             "health": "/health",
             "docs": "/docs"
         }
@@ -221,6 +248,51 @@ async def get_gold_nasdaq_signal():
         )
 
 
+@app.get("/signals/divergence", response_model=DivergenceResponse, tags=["Signals"])
+def get_divergence_signal(y: str = "^NDX", x: str = "GC=F", window: int = 90, start: str = "2015-01-01"):
+    """
+    Latest rolling divergence of any ticker pair: y regressed on x over
+    `window` days, using closes from `start`.
+
+    Results are cached for 5 minutes per normalized (y, x, window, start),
+    in a per-worker LRU bounded by SIGNAL_RESULT_CACHE_MB (default 256).
+    Requests sharing tickers reuse the cached closes, and requests for the
+    same pair and start reuse its returns, so a new window only costs
+    the regression. Concurrent identical requests compute once.
+
+    Raises
+    ------
+    HTTPException
+        400 for invalid parameters or too little history, 502 if a ticker
+        cannot be fetched
+    """
+    from divergence import normalize_params
+
+    try:
+        params = normalize_params(y, x, window, start)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        return _divergence_service().signal(params)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except LookupError as e:
+        raise HTTPException(status_code=502, detail=f"Failed to fetch price data: {e}")
+
+
+@app.get("/profiles/{trace_id}", tags=["Health"])
+async def get_profile(trace_id: str):
+    """Folded stacks sampled during a request sent with `X-Profile: 1`."""
+    try:
+        folded = read_profile(trace_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return PlainTextResponse(folded)
+
+
 if __name__ == "__main__":
     import uvicorn
     
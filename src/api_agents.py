@@ -2,18 +2,62 @@
 api_agents.py
 FastAPI endpoint for agent orchestration.
 Run: uvicorn src.api_agents:app --reload --port 8000
+
+Admission control (see admission.py) is configured via environment:
+  AGENTS_MAX_IN_FLIGHT (32), AGENTS_CLIENT_RATE (10/s), AGENTS_CLIENT_BURST (20)
+
+Worker mode (see executor_workers.py) moves step execution out of the API
+process when AGENTS_EXECUTOR=workers:
+  AGENTS_WORKERS (CPU count; local worker processes to start, 0 = external only)
+  AGENTS_BROKER_ADDRESS (127.0.0.1:0; bind address for remote workers)
+  EXECUTOR_AUTHKEY (shared secret; required for a non-loopback address,
+    otherwise a random key is generated for the local workers)
+  AGENTS_TOOL_REGISTRY (module:attr for workers)
 """
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
+from contextlib import asynccontextmanager
 from datetime import datetime
+import threading
 import uuid
+import os
+
+import sys
+from pathlib import Path
 
-# Import orchestrator (in production, this would be a separate module)
-# For demo, we'll define a simplified version here
+sys.path.append(str(Path(__file__).parent))
 
-app = FastAPI(title="Agent Orchestration API", version="1.0.0")
+from admission import AdmissionController, Rejected
+from orchestrator_demo import StepBatcher, ToolRegistry, run_orchestrator
+
+# Set when AGENTS_EXECUTOR=workers: steps go through this broker to worker processes
+broker = None
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start the step broker and worker processes in worker mode."""
+    global broker
+    pool = None
+    if os.environ.get("AGENTS_EXECUTOR", "local") == "workers":
+        from executor_workers import Broker, WorkerPool, broker_authkey, serve_broker
+        
+        host, port = os.environ.get("AGENTS_BROKER_ADDRESS", "127.0.0.1:0").rsplit(":", 1)
+        authkey = broker_authkey(host)
+        broker = Broker()
+        _, address = serve_broker(broker, (host, int(port)), authkey)
+        processes = int(os.environ.get("AGENTS_WORKERS", os.cpu_count() or 1))
+        if processes > 0:
+            pool = WorkerPool(address, authkey, processes, os.environ.get("AGENTS_TOOL_REGISTRY"))
+        print(f"Executor broker on {address[0]}:{address[1]} with {processes} local workers")
+    yield
+    if pool is not None:
+        pool.close()
+    broker = None
+
+app = FastAPI(title="Agent Orchestration API", version="1.0.0", lifespan=lifespan)
 
 # CORS: Allow all origins for local dev (restrict in production)
 app.add_middleware(
@@ -44,83 +88,76 @@ class RunResponse(BaseModel):
     plan_steps: int
     total_duration_ms: float
     timestamp: str
-    logs: list[Dict[str, Any]]
+    logs: List[Dict[str, Any]]
 
 # ============================================================================
-# Mock Orchestrator (simplified for API demo)
+# Orchestrator
 # ============================================================================
 
-def mock_orchestrate(goal: str, max_cost_ms: float, require_approval: bool) -> RunResponse:
-    """
-    Mock orchestration for API demo.
-    In production, this would call the full orchestrator from orchestrator_demo.py
-    """
+# Admission control for /run: per-client token buckets (X-Client-Id header,
+# falling back to the peer address), a cap on concurrent orchestrations and
+# shedding of requests whose max_cost_ms cannot be met given the queue.
+admission = AdmissionController(
+    max_in_flight=int(os.environ.get("AGENTS_MAX_IN_FLIGHT", "32")),
+    client_rate=float(os.environ.get("AGENTS_CLIENT_RATE", "10")),
+    client_burst=float(os.environ.get("AGENTS_CLIENT_BURST", "20")),
+)
+
+# Tool implementations used by /run. Swappable (e.g. simulated tools in the
+# load generator): run_agent reads it at call time.
+tool_registry = ToolRegistry()
+
+# One batcher for all concurrent runs, so compatible tool calls from
+# different requests share a `<tool>_batch` call
+step_batcher = StepBatcher(tool_registry)
+_batcher_lock = threading.Lock()
+
+def current_batcher() -> StepBatcher:
+    """The shared StepBatcher, rebuilt if tool_registry was swapped."""
+    global step_batcher
+    with _batcher_lock:
+        if step_batcher.registry is not tool_registry:
+            step_batcher = StepBatcher(tool_registry)
+        return step_batcher
+
+def orchestrate(goal: str, max_cost_ms: float, require_approval: bool) -> RunResponse:
+    """Run the full orchestrator from orchestrator_demo.py and shape its record."""
     run_id = str(uuid.uuid4())
+    executor = None
+    if broker is not None:
+        from executor_workers import RemoteExecutor
+        executor = RemoteExecutor(broker, run_id)
     
-    # Simple pattern matching for demo
-    if "gold" in goal.lower() and "nasdaq" in goal.lower():
-        # Success case
-        logs = [
-            {
-                "step_id": 1,
-                "tool": "search",
-                "input": {"query": "gold vs Nasdaq divergence"},
-                "success": True,
-                "verified": True,
-                "duration_ms": 103.5,
-                "verification_msg": "Verified: 3 results returned"
-            },
-            {
-                "step_id": 2,
-                "tool": "write_note",
-                "input": {"filename": "gold_nq_briefing.txt", "content": "..."},
-                "success": True,
-                "verified": True,
-                "duration_ms": 101.2,
-                "verification_msg": "Verified: written to /notes/gold_nq_briefing.txt"
-            }
-        ]
-        
-        total_duration = sum(log["duration_ms"] for log in logs)
-        
-        # Check policy
-        if require_approval:
-            status = "blocked"
-            verdict = "ESCALATE: Write operation requires human approval"
-            passed = False
-        elif total_duration > max_cost_ms:
-            status = "blocked"
-            verdict = f"POLICY VIOLATION: {total_duration:.0f}ms exceeds {max_cost_ms}ms limit"
-            passed = False
-        else:
-            status = "completed"
-            verdict = "APPROVED: All policy checks passed"
-            passed = True
-        
-        return RunResponse(
-            run_id=run_id,
-            goal=goal,
-            status=status,
-            verdict=verdict,
-            passed=passed,
-            plan_steps=len(logs),
-            total_duration_ms=total_duration,
-            timestamp=datetime.utcnow().isoformat(),
-            logs=logs
-        )
-    else:
+    result = run_orchestrator(
+        goal=goal,
+        max_cost_ms=max_cost_ms,
+        require_approval=require_approval,
+        registry=tool_registry,
+        batcher=current_batcher(),
+        verbose=False,
+        executor=executor,
+        fast=True
+    )
+    logs = result["logs"]
+    
+    if not result["plan"]["steps"]:
         # Empty plan case
-        return RunResponse(
-            run_id=run_id,
-            goal=goal,
-            status="failed",
-            verdict="No plan generated for goal",
-            passed=False,
-            plan_steps=0,
-            total_duration_ms=0,
-            timestamp=datetime.utcnow().isoformat(),
-            logs=[]
-        )
+        status, verdict, passed = "failed", "No plan generated for goal", False
+    else:
+        status = "completed" if result["passed"] else "blocked"
+        verdict, passed = result["verdict"], result["passed"]
+    
+    return RunResponse(
+        run_id=run_id,
+        goal=goal,
+        status=status,
+        verdict=verdict,
+        passed=passed,
+        plan_steps=len(logs),
+        total_duration_ms=sum(log["duration_ms"] for log in logs),
+        timestamp=result["timestamp"],
+        logs=logs
+    )
 
 # ============================================================================
 # Endpoints
@@ -133,23 +170,34 @@ def root():
         "service": "Agent Orchestration API",
         "version": "1.0.0",
         "status": "healthy",
+        "admission": admission.snapshot(),
+        "executor": broker.snapshot() if broker is not None else "local",
         "timestamp": datetime.utcnow().isoformat()
     }
 
 @app.post("/run", response_model=RunResponse)
-def run_agent(request: RunRequest):
+async def run_agent(request: RunRequest, http_request: Request):
     """
     Execute an agent with the given goal.
     
     Returns a run record with plan, logs, and policy verdict.
+    Responds 429 (client over its rate) or 503 (overloaded, budget
+    unattainable) with Retry-After before any work is done.
     """
+    client_id = http_request.headers.get("x-client-id") or (
+        http_request.client.host if http_request.client else "anonymous"
+    )
     try:
-        result = mock_orchestrate(
-            goal=request.goal,
-            max_cost_ms=request.max_cost_ms,
-            require_approval=request.require_approval
-        )
-        return result
+        ticket = admission.admit(client_id, request.max_cost_ms)
+        async with ticket:
+            return await run_in_threadpool(
+                orchestrate,
+                goal=request.goal,
+                max_cost_ms=request.max_cost_ms,
+                require_approval=request.require_approval
+            )
+    except Rejected as e:
+        raise HTTPException(status_code=e.status_code, detail=e.reason, headers=e.headers())
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Orchestration failed: {str(e)}")
 
@@ -192,17 +240,16 @@ USAGE:
        "verdict": "APPROVED: All policy checks passed",
        "passed": true,
        "plan_steps": 2,
-       "total_duration_ms": 204.7,
+       "total_duration_ms": 201.3,
        "timestamp": "2025-10-13T...",
        "logs": [...]
      }
 
 PRODUCTION UPGRADES:
-  - Replace mock_orchestrate with full orchestrator from orchestrator_demo.py
   - Add authentication (API keys, OAuth)
   - Persist run records to database (Postgres, MongoDB)
   - Add async task queue (Celery, Temporal) for long-running plans
-  - Add rate limiting (slowapi, Redis)
+  - Share admission state across workers (Redis) instead of per process
   - Add structured logging (structlog, send to Datadog/Splunk)
   - Add metrics (Prometheus, Grafana)
   - Restrict CORS origins to known frontends
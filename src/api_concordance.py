@@ -5,14 +5,28 @@ Run: uvicorn src.api_concordance:app --reload --port 8000
 """
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import Dict
-import pandas as pd
-import numpy as np
-import yfinance as yf
-import statsmodels.api as sm
+from contextlib import asynccontextmanager
+import sys
+from pathlib import Path
 
-app = FastAPI(title="Concordance Signal API")
+sys.path.append(str(Path(__file__).parent))
+
+from api_models import ConcordanceResponse
+from signal_cache import SharedSignalCache
+from signal_snapshot import save_snapshot, warm_cache
+
+# pandas/statsmodels are imported lazily inside fetch_and_compute so a new
+# worker can serve the startup snapshot without paying for them.
+
+SIGNAL_NAME = "concordance"
+
+@asynccontextmanager
+async def lifespan(app):
+    """Seed the shared cache from the last snapshot before serving."""
+    warm_cache(_cache, SIGNAL_NAME)
+    yield
+
+app = FastAPI(title="Concordance Signal API", lifespan=lifespan)
 
 # CORS for local dev (allow all origins)
 app.add_middleware(
@@ -23,20 +37,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Cache for data (in production, use Redis or DynamoDB)
-_cache = {"data": None, "timestamp": None}
-
-class ConcordanceResponse(BaseModel):
-    """API response schema."""
-    date: str
-    concordance_score: float
-    prob_concordant: float
-    betas: Dict[str, float]
-    latest_inputs: Dict[str, float]
+# Host-wide cache shared by all uvicorn workers (5 min TTL, one writer per host)
+_cache = SharedSignalCache(SIGNAL_NAME, ttl_seconds=300)
 
 def fetch_and_compute():
-    """Fetch latest data and compute signal (cache for 5 min in prod)."""
-    from concordance_signal import fetch_prices, compute_concordance, fit_logit
+    """Fetch latest data and compute signal (uncached; see get_concordance)."""
+    from concordance_signal import fetch_prices, compute_concordance, fit_logit, latest_payload
     
     # Fetch prices
     prices = fetch_prices()
@@ -47,30 +53,11 @@ def fetch_and_compute():
     # Fit logit
     model = fit_logit(signal)
     
-    # Latest values
-    latest = signal.iloc[-1]
-    latest_X = sm.add_constant(signal[["dRealY", "DXY", "VIX"]].iloc[-1])
-    latest_prob = model.predict(latest_X)[0]
+    # Latest values and coefficients
+    result = latest_payload(signal, model)
     
-    # Extract coefficients
-    betas = {
-        "const": float(model.params["const"]),
-        "dRealY": float(model.params["dRealY"]),
-        "DXY": float(model.params["DXY"]),
-        "VIX": float(model.params["VIX"]),
-    }
-    
-    return {
-        "date": str(signal.index[-1].date()),
-        "concordance_score": float(latest["S"]),
-        "prob_concordant": float(latest_prob),
-        "betas": betas,
-        "latest_inputs": {
-            "dRealY": float(latest["dRealY"]),
-            "rDXY": float(latest["DXY"]),
-            "rVIX": float(latest["VIX"]),
-        }
-    }
+    save_snapshot(SIGNAL_NAME, result, params={"window": 90, "logit": result["betas"]})
+    return result
 
 @app.get("/")
 def root():
@@ -86,8 +73,10 @@ def get_concordance():
     -------
     ConcordanceResponse
         Latest concordance score, P(I=1), betas, and macro inputs.
+        Cached for 5 minutes across all workers on the host; stale values
+        are served while a background refresh runs.
     """
-    result = fetch_and_compute()
+    result = _cache.get_or_compute(fetch_and_compute, background=True)
     return result
 
 if __name__ == "__main__":
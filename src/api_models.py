@@ -0,0 +1,71 @@
+"""
+api_models.py
+
+Pydantic response models shared by api.py, api_concordance.py and
+signal_service.py, kept apart from the apps so importing a schema does not
+build an app, its shared-memory cache or its middleware.
+
+Dependencies:
+    pydantic
+"""
+
+from typing import Dict
+
+from pydantic import BaseModel
+
+
+class SignalResponse(BaseModel):
+    """Response model for divergence signal."""
+    date: str
+    z: float
+    eps: float
+    beta_xau: float
+    alpha: float
+    window_days: int
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "date": "2025-10-12",
+                "z": -1.23,
+                "eps": -0.0087,
+                "beta_xau": -0.418,
+                "alpha": 0.0009,
+                "window_days": 90
+            }
+        }
+
+
+class DivergenceResponse(BaseModel):
+    """Response model for an arbitrary-pair divergence signal."""
+    y: str
+    x: str
+    start: str
+    date: str
+    z: float
+    eps: float
+    beta: float
+    alpha: float
+    window_days: int
+    observations: int
+
+
+class HealthResponse(BaseModel):
+    """Health check response."""
+    status: str
+    timestamp: str
+
+
+class ConcordanceResponse(BaseModel):
+    """Response model for the concordance signal."""
+    date: str
+    concordance_score: float
+    prob_concordant: float
+    betas: Dict[str, float]
+    latest_inputs: Dict[str, float]
+
+
+def numeric_fields(model):
+    """Names of a response model's numeric scalar (int / float) fields."""
+    return tuple(name for name, info in model.model_fields.items()
+                 if info.annotation in (int, float))
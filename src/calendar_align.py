@@ -0,0 +1,190 @@
+"""
+calendar_align.py
+
+Align per-ticker daily series onto a master trading calendar.
+
+Futures (GC=F), indices (^VIX) and ETFs trade on different holiday calendars,
+so an inner join of their closes drops every date on which any one of them
+was shut, and with many tickers almost nothing survives. Here each ticker is
+merged onto the master calendar independently: every calendar session takes
+the ticker's last close at or before it (an as-of merge), unless that close
+is more than `max_stale` sessions old, in which case the cell is missing.
+
+Each merge is a searchsorted over the ticker's sorted int64 dates, written
+straight into one preallocated float64 block, so the cost is
+O(n_tickers * n_sessions * log n_obs) with no per-ticker reindexed frames
+and no object-dtype intermediate.
+
+Dependencies:
+    numpy, pandas
+
+Usage:
+    aligned = align_to_calendar(closes, calendar="^NDX", max_stale=3)
+    aligned.prices       # sessions x tickers, float64
+    aligned.coverage     # per-ticker observed / filled / missing sessions
+    aligned.complete()   # sessions where every ticker has a value
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+MAX_STALE = 3  # sessions a close may be carried forward
+
+
+@dataclass
+class Alignment:
+    """Aligned prices and per-ticker coverage on one master calendar."""
+    prices: pd.DataFrame
+    coverage: pd.DataFrame
+
+    def complete(self):
+        """Sessions where every ticker has a (possibly carried) value."""
+        values = self.prices.to_numpy()
+        return self.prices[~np.isnan(values).any(axis=1)]
+
+    def report(self, threshold=1.0):
+        """One line per ticker whose coverage is below `threshold`."""
+        low = self.coverage[self.coverage["coverage"] < threshold]
+        return [
+            f"{symbol}: {row.observed}/{row.sessions} sessions observed, "
+            f"{row.filled} carried forward, {row.missing} missing"
+            for symbol, row in low.iterrows()
+        ]
+
+
+def _columns(series):
+    """(symbol, Series) pairs from a mapping or the columns of a DataFrame."""
+    if isinstance(series, pd.DataFrame):
+        return [(symbol, series[symbol]) for symbol in series.columns]
+    return list(series.items())
+
+
+def _asi8(index):
+    """Dates as sorted-comparable int64 nanoseconds."""
+    return np.asarray(index.values, dtype="datetime64[ns]").view(np.int64)
+
+
+def master_calendar(series, calendar="union"):
+    """
+    Build the master calendar for a set of series.
+
+    Parameters
+    ----------
+    series : dict of pd.Series or pd.DataFrame
+        Per-ticker closes indexed by date
+    calendar : str or pd.DatetimeIndex
+        "union" (any ticker traded), "intersection" (every ticker traded),
+        "business" (Mon-Fri between the first and last date), a ticker
+        symbol (that ticker's sessions) or an explicit index
+
+    Returns
+    -------
+    pd.DatetimeIndex
+        Sorted, unique session dates
+    """
+    if isinstance(calendar, pd.DatetimeIndex):
+        return calendar.sort_values().unique()
+
+    columns = _columns(series)
+    lookup = dict(columns)
+    if calendar in lookup:
+        dates = np.unique(_asi8(lookup[calendar].dropna().index))
+    elif calendar in ("union", "intersection", "business"):
+        all_dates = [np.unique(_asi8(s.dropna().index)) for _, s in columns]
+        if not all_dates:
+            return pd.DatetimeIndex([], name="Date")
+        stacked = np.concatenate(all_dates)
+        if calendar == "intersection":
+            dates, counts = np.unique(stacked, return_counts=True)
+            dates = dates[counts == len(all_dates)]
+        else:
+            dates = np.unique(stacked)
+        if calendar == "business" and len(dates):
+            dates = _asi8(pd.bdate_range(pd.Timestamp(dates[0]), pd.Timestamp(dates[-1])))
+    else:
+        raise ValueError(f"Unknown calendar {calendar!r}: not a ticker, "
+                         f"'union', 'intersection' or 'business'")
+    # Keep the inputs' datetime resolution so the result joins cleanly with them
+    index = pd.DatetimeIndex(dates.view("datetime64[ns]"), name="Date")
+    return index.as_unit(getattr(columns[0][1].index, "unit", "ns"))
+
+
+def align_to_calendar(series, calendar="union", fill="ffill", max_stale=MAX_STALE):
+    """
+    Merge each ticker onto the master calendar.
+
+    Parameters
+    ----------
+    series : dict of pd.Series or pd.DataFrame
+        Per-ticker closes indexed by date (NaN closes are ignored)
+    calendar : str or pd.DatetimeIndex
+        Master calendar (see master_calendar)
+    fill : str or None
+        "ffill" carries the last close forward onto sessions the ticker did
+        not trade; None keeps exact-date matches only
+    max_stale : int or None
+        Most sessions a close may be carried forward (None: unlimited)
+
+    Returns
+    -------
+    Alignment
+        prices (calendar x tickers, float64, columns in input order) and
+        coverage (first, last, sessions, observed, filled, missing, coverage)
+    """
+    if fill not in ("ffill", None):
+        raise ValueError(f"Unknown fill {fill!r}: expected 'ffill' or None")
+
+    columns = _columns(series)
+    index = master_calendar(series, calendar)
+    cal = _asi8(index)
+    steps = np.arange(len(cal))
+    # Column-major: each ticker fills a contiguous column, which is also the
+    # layout of a pandas float block, so the frame wraps it without a copy
+    out = np.full((len(cal), len(columns)), np.nan, order="F")
+    stats = []
+
+    for j, (symbol, s) in enumerate(columns):
+        values = s.to_numpy(dtype=np.float64)
+        dates = _asi8(s.index)
+        present = ~np.isnan(values)
+        if not present.all():
+            values, dates = values[present], dates[present]
+        if len(dates) > 1 and (np.diff(dates) < 0).any():
+            order = np.argsort(dates, kind="stable")
+            values, dates = values[order], dates[order]
+        if not len(dates) or not len(cal):
+            stats.append((symbol, pd.NaT, pd.NaT, 0, 0, 0, 0))
+            continue
+
+        # Last observation at or before each session, and the session each
+        # observation falls on (or the next one, for off-calendar dates)
+        pos = np.searchsorted(dates, cal, side="right") - 1
+        seen = pos >= 0
+        pos[~seen] = 0
+        exact = seen & (dates[pos] == cal)
+        if fill == "ffill":
+            age = steps - np.searchsorted(cal, dates, side="left")[pos]
+            keep = seen if max_stale is None else seen & (age <= max_stale)
+        else:
+            keep = exact
+        column = values[pos]
+        column[~keep] = np.nan
+        out[:, j] = column
+
+        # Coverage over the sessions the ticker was listed for
+        lo = np.searchsorted(cal, dates[0], side="left")
+        hi = np.searchsorted(cal, dates[-1], side="right")
+        observed = int(np.count_nonzero(exact))
+        carried = keep & ~exact
+        sessions = int(hi - lo)
+        stats.append((symbol, pd.Timestamp(dates[0]), pd.Timestamp(dates[-1]), sessions, observed,
+                      int(np.count_nonzero(carried)),
+                      sessions - observed - int(np.count_nonzero(carried[lo:hi]))))
+
+    prices = pd.DataFrame(out, index=index, columns=[symbol for symbol, _ in columns], copy=False)
+    coverage = pd.DataFrame(stats, columns=["symbol", "first", "last", "sessions", "observed",
+                                            "filled", "missing"]).set_index("symbol")
+    coverage["coverage"] = (coverage["observed"] / coverage["sessions"].where(coverage["sessions"] > 0)).fillna(0.0)
+    return Alignment(prices=prices, coverage=coverage)
@@ -0,0 +1,336 @@
+"""
+changepoint.py
+
+Online change-point detection for the gold vs. Nasdaq signal.
+
+Two detectors, each O(1) per update:
+
+    beta_xau   regression CUSUM. A reference fit of r_NQ on r_XAU is frozen
+               after a warm-up; each new day contributes the standardized
+               score (x - mean_x) * (y - a - b x), whose mean moves away
+               from zero (with the sign of the shift) once the true beta
+               departs from the reference.
+    resid_var  CUSUM on log e(t)^2, where e(t) is the out-of-sample error of
+               the previous day's rolling fit,
+               e(t) = r_NQ(t) - alpha(t-1) - beta_xau(t-1) * r_XAU(t),
+               standardized against a slowly adapting EWMA baseline.
+
+The rolling estimates themselves are too autocorrelated to test directly;
+these streams are close to independent under a stable relationship.
+
+The upward and downward drift statistics accumulate and a change is flagged
+when either exceeds `h`. After a change the baseline (or reference fit) is
+re-learned over a warm-up so the new regime becomes the reference.
+
+State (baselines, drift statistics, run lengths, last processed date) is
+JSON-serializable and persisted between refreshes, so each refresh only
+feeds the dates it has not seen.
+
+Dependencies:
+    numpy, pandas
+
+Usage:
+    monitor = RegimeMonitor.load("gold-nq")
+    flags = monitor.update(signal_df, prices)   # only dates after the last update
+    monitor.save()
+    monitor.summary()                      # latest flags and run lengths
+"""
+
+import json
+import math
+import os
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from signal_history import history_dir
+
+# log(chi2_1) is heavily left-skewed; floor tiny residuals so a single
+# near-zero eps does not look like a variance collapse
+_LOG_FLOOR = 1e-12
+
+
+class Cusum:
+    """
+    Two-sided CUSUM on a standardized stream with an adaptive baseline.
+
+    Parameters
+    ----------
+    k : float
+        Allowance (slack) in baseline standard deviations; shifts smaller than
+        about 2k are ignored
+    h : float
+        Decision threshold for the cumulative drift statistics
+    alpha : float
+        EWMA weight used to track the baseline between changes
+    warmup : int
+        Observations used to (re)estimate the baseline before testing
+    """
+
+    FIELDS = ("n", "mean", "m2", "var", "g_pos", "g_neg", "run_length", "last_change", "last_direction")
+
+    def __init__(self, k=0.5, h=8.0, alpha=0.01, warmup=60):
+        self.k, self.h, self.alpha, self.warmup = k, h, alpha, warmup
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.var = 0.0
+        self.g_pos = 0.0
+        self.g_neg = 0.0
+        self.run_length = 0
+        self.last_change = None
+        self.last_direction = 0
+
+    def update(self, x, label=None):
+        """
+        Consume one observation.
+
+        Returns
+        -------
+        int
+            +1 for an upward change, -1 for a downward change, 0 otherwise
+        """
+        self.run_length += 1
+        if self.n < self.warmup:
+            # Welford estimate of the (new) baseline; no testing yet
+            self.n += 1
+            delta = x - self.mean
+            self.mean += delta / self.n
+            self.m2 += delta * (x - self.mean)
+            if self.n == self.warmup:
+                self.var = max(self.m2 / max(self.n - 1, 1), 1e-18)
+            return 0
+
+        direction = self._step((x - self.mean) / math.sqrt(self.var), label)
+        if direction:
+            return direction
+
+        delta = x - self.mean
+        self.mean += self.alpha * delta
+        self.var = (1 - self.alpha) * (self.var + self.alpha * delta * delta)
+        return 0
+
+    def _step(self, z, label):
+        """Accumulate a standardized value; reset and return the direction on a change."""
+        self.g_pos = max(0.0, self.g_pos + z - self.k)
+        self.g_neg = max(0.0, self.g_neg - z - self.k)
+        if self.g_pos > self.h or self.g_neg > self.h:
+            direction = 1 if self.g_pos > self.h else -1
+            self._reset(label, direction)
+            return direction
+        return 0
+
+    def _reset(self, label, direction):
+        self.n, self.mean, self.m2, self.var = 0, 0.0, 0.0, 0.0
+        self.g_pos = self.g_neg = 0.0
+        self.run_length = 0
+        self.last_change = label
+        self.last_direction = direction
+
+    def to_dict(self):
+        params = {"k": self.k, "h": self.h, "alpha": self.alpha, "warmup": self.warmup}
+        return {"params": params, "state": {f: getattr(self, f) for f in self.FIELDS}}
+
+    @classmethod
+    def from_dict(cls, data):
+        detector = cls(**data["params"])
+        for field, value in data["state"].items():
+            setattr(detector, field, value)
+        return detector
+
+
+class RegressionCusum(Cusum):
+    """
+    CUSUM for a shift in the slope of y on x against a frozen reference fit.
+
+    The first `warmup` observations after a start or a change fit the
+    reference (a, b) by OLS; afterwards each observation adds the score
+    (x - mean_x) * (y - a - b x), scaled by sd(x) * sd(residual).
+    """
+
+    FIELDS = Cusum.FIELDS + ("sx", "sy", "sxx", "sxy", "syy", "a", "b", "mean_x", "scale")
+
+    def __init__(self, k=0.25, h=15.0, alpha=0.0, warmup=120):
+        super().__init__(k=k, h=h, alpha=alpha, warmup=warmup)
+        self._reset_fit()
+
+    def _reset_fit(self):
+        self.sx = self.sy = self.sxx = self.sxy = self.syy = 0.0
+        self.a = self.b = self.mean_x = 0.0
+        self.scale = 1.0
+
+    def _reset(self, label, direction):
+        super()._reset(label, direction)
+        self._reset_fit()
+
+    def update(self, x, y, label=None):
+        """Consume one (x, y) pair; returns +1/-1 on an upward/downward slope change."""
+        self.run_length += 1
+        if self.n < self.warmup:
+            self.n += 1
+            self.sx += x
+            self.sy += y
+            self.sxx += x * x
+            self.sxy += x * y
+            self.syy += y * y
+            if self.n == self.warmup:
+                n = self.n
+                self.mean_x = self.sx / n
+                var_x = max(self.sxx / n - self.mean_x ** 2, 1e-18)
+                cov_xy = self.sxy / n - self.mean_x * self.sy / n
+                self.b = cov_xy / var_x
+                self.a = self.sy / n - self.b * self.mean_x
+                var_e = max(self.syy / n - (self.sy / n) ** 2 - self.b * cov_xy, 1e-18)
+                self.scale = math.sqrt(var_x * var_e)
+            return 0
+
+        score = (x - self.mean_x) * (y - self.a - self.b * x) / self.scale
+        return self._step(score, label)
+
+
+def detector_inputs(signal_df, prices):
+    """
+    Per-date detector streams from a signal frame and its prices.
+
+    Parameters
+    ----------
+    signal_df : pd.DataFrame
+        Output of compute_rolling_signal (alpha, beta_xau)
+    prices : pd.DataFrame
+        The prices it was computed from (Nasdaq first, gold second)
+
+    Returns
+    -------
+    pd.DataFrame
+        x, y (gold and Nasdaq log returns) and resid_var (log e^2),
+        indexed like signal_df
+    """
+    returns = np.log(prices / prices.shift(1)).reindex(signal_df.index)
+    y = returns.iloc[:, 0].to_numpy(dtype=np.float64)
+    x = returns.iloc[:, 1].to_numpy(dtype=np.float64)
+    alpha_prev = signal_df["alpha"].shift(1).to_numpy(dtype=np.float64)
+    beta_prev = signal_df["beta_xau"].shift(1).to_numpy(dtype=np.float64)
+
+    error = y - alpha_prev - beta_prev * x
+    return pd.DataFrame({
+        "x": x,
+        "y": y,
+        "resid_var": np.log(np.maximum(np.square(error), _LOG_FLOOR)),
+    }, index=signal_df.index)
+
+
+DETECTORS = {"beta_xau": RegressionCusum, "resid_var": Cusum}
+
+
+class RegimeMonitor:
+    """
+    CUSUM detectors for beta_xau and residual variance, with persistence.
+
+    Parameters
+    ----------
+    name : str
+        Signal name (state file is {name}.changepoint.json in the history dir)
+    directory : Path or None
+        Override for the state directory
+    """
+
+    STREAMS = ("beta_xau", "resid_var")
+
+    def __init__(self, name="gold-nq", directory=None, detectors=None):
+        directory = Path(directory) if directory is not None else history_dir()
+        self.name = name
+        self.path = directory / f"{name}.changepoint.json"
+        self.detectors = detectors or {
+            "beta_xau": RegressionCusum(k=0.25, h=15.0, warmup=120),
+            "resid_var": Cusum(k=0.25, h=12.0, alpha=0.01, warmup=60),
+        }
+        self.last_date = None
+
+    @classmethod
+    def load(cls, name="gold-nq", directory=None):
+        """Restore persisted state, or a fresh monitor if none exists."""
+        monitor = cls(name, directory)
+        try:
+            with open(monitor.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return monitor
+        monitor.detectors = {s: DETECTORS[s].from_dict(d) for s, d in data["detectors"].items()}
+        monitor.last_date = data.get("last_date")
+        return monitor
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = {"last_date": self.last_date,
+                "detectors": {s: d.to_dict() for s, d in self.detectors.items()}}
+        fd, tmp = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp, self.path)
+
+    def update(self, signal_df, prices):
+        """
+        Feed the rows of `signal_df` dated after the last update.
+
+        Parameters
+        ----------
+        signal_df : pd.DataFrame
+            Output of compute_rolling_signal
+        prices : pd.DataFrame
+            The prices it was computed from (Nasdaq first, gold second)
+
+        Returns
+        -------
+        pd.DataFrame
+            For the new rows: cp_beta, cp_var (+1/-1/0) and
+            rl_beta, rl_var (observations since the last change)
+        """
+        inputs = detector_inputs(signal_df, prices)
+        if self.last_date is not None:
+            inputs = inputs[inputs.index > pd.Timestamp(self.last_date)]
+        x, y, log_e2 = (inputs[c].to_numpy() for c in ("x", "y", "resid_var"))
+        labels = inputs.index.strftime("%Y-%m-%d").tolist()
+        flags = {s: np.zeros(len(inputs), dtype=np.int8) for s in self.STREAMS}
+        run_lengths = {s: np.zeros(len(inputs), dtype=np.int32) for s in self.STREAMS}
+
+        beta, var = self.detectors["beta_xau"], self.detectors["resid_var"]
+        for i, label in enumerate(labels):
+            if np.isfinite(x[i]) and np.isfinite(y[i]):
+                flags["beta_xau"][i] = beta.update(float(x[i]), float(y[i]), label)
+            if np.isfinite(log_e2[i]):
+                flags["resid_var"][i] = var.update(float(log_e2[i]), label)
+            run_lengths["beta_xau"][i] = beta.run_length
+            run_lengths["resid_var"][i] = var.run_length
+
+        if labels:
+            self.last_date = labels[-1]
+        return pd.DataFrame({
+            "cp_beta": flags["beta_xau"], "cp_var": flags["resid_var"],
+            "rl_beta": run_lengths["beta_xau"], "rl_var": run_lengths["resid_var"],
+        }, index=inputs.index)
+
+    def summary(self):
+        """
+        Latest regime state per stream, for the API payload.
+
+        change_point is True when the last processed date was itself a change
+        point, which holds across refreshes that bring no new dates.
+        """
+        out = {}
+        for stream in self.STREAMS:
+            detector = self.detectors[stream]
+            out[stream] = {
+                "change_point": self.last_date is not None and detector.last_change == self.last_date,
+                "run_length": detector.run_length,
+                "last_change": detector.last_change,
+                "last_direction": detector.last_direction,
+            }
+        out["as_of"] = self.last_date
+        return out
+
+
+def detect_regimes(signal_df, prices):
+    """Change-point flags and run lengths for a full history (fresh state)."""
+    return RegimeMonitor(directory=tempfile.gettempdir()).update(signal_df, prices)
@@ -0,0 +1,207 @@
+"""
+chunked_signal.py
+
+Out-of-core computation of the gold vs. Nasdaq and concordance signals for
+histories too large for RAM (years of minute bars).
+
+Prices are streamed from disk in chunks of rows. Each stream keeps only the
+state its windows need across a chunk boundary:
+
+    RollingSignalStream   the last log price and the last 2 * window - 2
+                          returns (the OLS window plus the residual window)
+    ConcordanceStream     the last log price and the last window - 1
+                          concordance indicators
+
+and each chunk's rows are written out before the next one is read, so peak
+memory is bounded by the chunk size plus the window, independent of the
+history length. Per-window sums come from the window's own elements
+(rolling_signal_arrays, integer prefix sums for the indicator), so the output
+is identical to the compact in-memory path (compute_rolling_signal /
+compute_concordance with compact=True) for any chunk size.
+
+Dependencies:
+    numpy, pandas
+
+Usage:
+    python chunked_signal.py prices.csv signal.csv --signal gold-nq --chunk-rows 1000000
+
+    stream = RollingSignalStream(window=90)
+    run_chunked(read_price_chunks("prices.csv", 1_000_000), stream, CsvSink("signal.csv"))
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from gold_vs_nasdaq import rolling_signal_arrays
+
+
+def read_price_chunks(path, chunk_rows=1_000_000):
+    """
+    Stream a date-indexed price CSV in chunks of `chunk_rows` rows.
+
+    Yields
+    ------
+    pd.DataFrame
+        Consecutive row chunks, first column parsed as the DatetimeIndex
+    """
+    yield from pd.read_csv(path, index_col=0, parse_dates=True, chunksize=chunk_rows)
+
+
+class _ReturnStream:
+    """Log returns across chunk boundaries (the previous chunk's last price is carried)."""
+
+    def __init__(self):
+        self._last_logp = None
+
+    def _returns(self, chunk):
+        logp = np.log(chunk.to_numpy(dtype=np.float64))
+        index = chunk.index
+        if self._last_logp is not None:
+            logp = np.vstack([self._last_logp, logp])
+        else:
+            index = index[1:]
+        if len(logp):
+            self._last_logp = logp[-1:]
+        returns = logp[1:] - logp[:-1]
+
+        valid = ~np.isnan(returns).any(axis=1)
+        if not valid.all():
+            returns, index = returns[valid], index[valid]
+        return returns, index
+
+
+class RollingSignalStream(_ReturnStream):
+    """
+    Chunked compute_rolling_signal(compact=True): alpha, beta_xau, eps,
+    eps_std, z as float32. Columns are Nasdaq first, gold second.
+    """
+
+    COLUMNS = ["alpha", "beta_xau", "eps", "eps_std", "z"]
+
+    def __init__(self, window=90):
+        super().__init__()
+        self.window = window
+        self._y = np.empty(0)
+        self._x = np.empty(0)
+
+    def feed(self, chunk):
+        """Signal rows completed by this chunk (possibly none)."""
+        returns, index = self._returns(chunk)
+        y = np.concatenate([self._y, returns[:, 0]])
+        x = np.concatenate([self._x, returns[:, 1]])
+
+        carry = 2 * self.window - 2
+        self._y, self._x = y[-carry:], x[-carry:]
+        if len(y) <= carry:
+            return pd.DataFrame({name: np.empty(0, dtype=np.float32) for name in self.COLUMNS},
+                                index=index[:0])
+
+        arrays = rolling_signal_arrays(y, x, self.window)
+        n = len(arrays["z"])
+        return pd.DataFrame(
+            {name: arrays[name].astype(np.float32) for name in self.COLUMNS},
+            index=index[len(index) - n:], copy=False
+        )
+
+
+class ConcordanceStream(_ReturnStream):
+    """
+    Chunked compute_concordance(compact=True): float32 returns, dRealY, the
+    int8 indicator I and the float32 rolling score S.
+    """
+
+    def __init__(self, window=90):
+        super().__init__()
+        self.window = window
+        self._indicator = np.empty(0, dtype=np.int8)
+
+    def feed(self, chunk):
+        """Concordance rows completed by this chunk (possibly none)."""
+        returns, index = self._returns(chunk)
+        col = {name: i for i, name in enumerate(chunk.columns)}
+        eq, xau, ust = returns[:, col["EQ"]], returns[:, col["XAU"]], returns[:, col["UST"]]
+        fresh = ((eq > 0) & ((xau > 0) | (ust > 0))).astype(np.int8)
+
+        carried = len(self._indicator)
+        indicator = np.concatenate([self._indicator, fresh])
+        self._indicator = indicator[-(self.window - 1):] if self.window > 1 else indicator[:0]
+
+        csum = np.concatenate([[0], np.cumsum(indicator, dtype=np.int32)])
+        score = ((csum[self.window:] - csum[:-self.window]) / self.window).astype(np.float32)
+
+        # Rows of this chunk whose window is complete
+        start = max(self.window - 1 - carried, 0)
+        data = {name: returns[start:, i].astype(np.float32) for name, i in col.items()}
+        data["dRealY"] = -data["UST"]
+        data["I"] = fresh[start:]
+        data["S"] = score[len(score) - len(fresh[start:]):]
+        return pd.DataFrame(data, index=index[start:], copy=False)
+
+
+class CsvSink:
+    """Append result chunks to one CSV (header written with the first chunk)."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.rows = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.unlink(missing_ok=True)
+
+    def write(self, frame):
+        frame.to_csv(self.path, mode="a", header=self.rows == 0)
+        self.rows += len(frame)
+
+
+def run_chunked(chunks, stream, sink=None):
+    """
+    Feed every chunk through `stream`, writing each result before reading on.
+
+    Parameters
+    ----------
+    chunks : iterable of pd.DataFrame
+        Consecutive price chunks (e.g. read_price_chunks)
+    stream : RollingSignalStream or ConcordanceStream
+    sink : CsvSink or None
+        Destination; None collects and returns the whole result in memory
+        (small inputs and checks only)
+
+    Returns
+    -------
+    pd.DataFrame or int
+        The concatenated result without a sink, else the rows written
+    """
+    parts = []
+    for chunk in chunks:
+        result = stream.feed(chunk)
+        if sink is None:
+            parts.append(result)
+        elif len(result):
+            sink.write(result)
+    if sink is None:
+        return pd.concat(parts) if parts else pd.DataFrame()
+    return sink.rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chunked out-of-core signal computation")
+    parser.add_argument("prices", help="date-indexed price CSV (gold-nq: Nasdaq, gold; "
+                                       "concordance: EQ, XAU, UST, DXY, VIX, REAL)")
+    parser.add_argument("output", help="signal CSV to write")
+    parser.add_argument("--signal", choices=["gold-nq", "concordance"], default="gold-nq")
+    parser.add_argument("--window", type=int, default=90)
+    parser.add_argument("--chunk-rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    streams = {"gold-nq": RollingSignalStream, "concordance": ConcordanceStream}
+    began = time.perf_counter()
+    rows = run_chunked(read_price_chunks(args.prices, args.chunk_rows),
+                       streams[args.signal](window=args.window), CsvSink(args.output))
+    print(f"Wrote {rows:,} {args.signal} rows to {args.output} in {time.perf_counter() - began:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
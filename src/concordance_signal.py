@@ -1,19 +1,22 @@
 """
 concordance_signal.py
 Compute concordance score and logit model for equities + safe havens.
-Dependencies: pandas, numpy, yfinance, statsmodels
+Dependencies: pandas, numpy, httpx, statsmodels
 """
 import pandas as pd
 import numpy as np
-import yfinance as yf
-import statsmodels.api as sm
 from pathlib import Path
 
+from result_cache import memory_footprint
+
 START = "2020-01-01"
 END = None  # defaults to today
 
 def fetch_prices():
     """Download daily prices for equities, gold, bonds, USD, VIX."""
+    from calendar_align import align_to_calendar
+    from market_data import MarketDataFetcher
+    
     tickers = {
         "EQ": "QQQ",       # Nasdaq proxy
         "XAU": "GLD",      # Gold ETF (more liquid than GC=F for daily)
@@ -23,25 +26,32 @@ def fetch_prices():
         "REAL": "^TNX",    # 10Y nominal yield (we'll proxy real yield)
     }
     
-    # Download with error handling
-    try:
-        data = yf.download(list(tickers.values()), start=START, end=END, progress=False)
-        if isinstance(data.columns, pd.MultiIndex):
-            data = data["Adj Close"]
-        data.columns = list(tickers.keys())
-        
-        # Check if we got valid data
-        if len(data) == 0:
-            raise ValueError("No data retrieved from yfinance")
-        
-        return data.dropna()
-    except Exception as e:
-        print(f"Error fetching data: {e}")
-        print("This may be due to API rate limits or network issues.")
-        print("If running this repeatedly, consider caching data or adding delays.")
-        raise
+    # Per-ticker concurrent requests with rate limiting and retry/backoff
+    with MarketDataFetcher() as fetcher:
+        result = fetcher.fetch(list(tickers.values()), start=START, end=END)
+    
+    if result.failures:
+        details = "; ".join(result.failures.values())
+        raise ValueError(
+            f"Failed to fetch {len(result.failures)}/{len(tickers)} tickers "
+            f"after retries ({result.stats.throttled} rate-limited responses): {details}"
+        )
+    
+    # QQQ sessions define the rows; futures, index and ETF closes are carried
+    # over their own holidays (up to MAX_STALE sessions)
+    aligned = align_to_calendar(result.prices[list(tickers.values())], calendar=tickers["EQ"])
+    for line in aligned.report():
+        print(f"  coverage {line}")
+    data = aligned.complete()
+    data.columns = list(tickers.keys())
+    
+    # Check if we got valid data
+    if len(data) == 0:
+        raise ValueError("No data retrieved from Yahoo Finance")
+    
+    return data
 
-def compute_concordance(df, window=90):
+def compute_concordance(df, window=90, compact=False):
     """
     Compute concordance indicator I_t and rolling score S_t.
     
@@ -51,12 +61,18 @@ def compute_concordance(df, window=90):
         Columns: EQ, XAU, UST, DXY, VIX, REAL
     window : int
         Rolling window in days
+    compact : bool
+        If True, build the frame from NumPy arrays with float32 returns,
+        an int8 indicator and a float32 score (no intermediate frames)
     
     Returns
     -------
     pd.DataFrame
         Columns: I (indicator), S (rolling score), returns, real yield change
     """
+    if compact:
+        return _compact_concordance(df, window)
+    
     # Log returns
     returns = np.log(df / df.shift(1)).dropna()
     
@@ -75,7 +91,32 @@ def compute_concordance(df, window=90):
     
     return returns.dropna()
 
-def fit_logit(df):
+def _compact_concordance(df, window):
+    """Low-memory compute_concordance: same columns, float32 / int8 dtypes."""
+    logp = np.log(df.to_numpy(dtype=np.float64))
+    r = logp[1:] - logp[:-1]
+    index = df.index[1:]
+    
+    valid = ~np.isnan(r).any(axis=1)
+    if not valid.all():
+        r, index = r[valid], index[valid]
+    
+    col = {name: i for i, name in enumerate(df.columns)}
+    eq, xau, ust = r[:, col["EQ"]], r[:, col["XAU"]], r[:, col["UST"]]
+    indicator = ((eq > 0) & ((xau > 0) | (ust > 0))).astype(np.int8)
+    
+    # Rolling mean of the indicator via integer prefix sums (exact)
+    csum = np.concatenate([[0], np.cumsum(indicator, dtype=np.int32)])
+    score = ((csum[window:] - csum[:-window]) / window).astype(np.float32)
+    
+    k = window - 1
+    data = {name: r[k:, i].astype(np.float32) for name, i in col.items()}
+    data["dRealY"] = -data["UST"]
+    data["I"] = indicator[k:]
+    data["S"] = score
+    return pd.DataFrame(data, index=index[k:], copy=False)
+
+def fit_logit(df, start_params=None):
     """
     Fit logistic regression: P(I=1) ~ dRealY + rDXY + rVIX.
     
@@ -83,11 +124,16 @@ def fit_logit(df):
     ----------
     df : pd.DataFrame
         Must have columns: I, dRealY, DXY, VIX
+    start_params : array-like, optional
+        Initial (const, dRealY, DXY, VIX) for Newton's method, e.g. the
+        coefficients of a fit on a shorter history; None starts from zero
     
     Returns
     -------
     model : statsmodels.LogitResults
     """
+    import statsmodels.api as sm  # deferred: slowest import in the pipeline
+    
     # Drop any remaining NaNs (VIX can have gaps)
     data = df[["I", "dRealY", "DXY", "VIX"]].dropna()
     
@@ -97,9 +143,78 @@ def fit_logit(df):
     y = data["I"]
     
     # Fit logit
-    model = sm.Logit(y, X).fit(disp=0)
+    model = sm.Logit(y, X).fit(disp=0, start_params=start_params)
     return model
 
+LOGIT_INPUTS = ["dRealY", "DXY", "VIX"]
+
+def materialize_probabilities(signal, model):
+    """
+    Fitted P(I=1), indicator I and score S for every date in one pass.
+    
+    The logistic link is applied to the whole design matrix at once
+    (X @ params) instead of calling model.predict on small slices.
+    
+    Parameters
+    ----------
+    signal : pd.DataFrame
+        Output of compute_concordance
+    model : statsmodels.LogitResults
+        Output of fit_logit
+    
+    Returns
+    -------
+    pd.DataFrame
+        Columns: I, S, P (NaN where a logit input is missing)
+    """
+    params = model.params
+    X = signal[LOGIT_INPUTS].to_numpy(dtype=np.float64)
+    linear = params["const"] + X @ params[LOGIT_INPUTS].to_numpy(dtype=np.float64)
+    
+    return pd.DataFrame({
+        "I": signal["I"].to_numpy(),
+        "S": signal["S"].to_numpy(),
+        "P": 1.0 / (1.0 + np.exp(-linear)),
+    }, index=signal.index)
+
+def latest_payload(signal, model):
+    """
+    Build the API payload for the most recent concordance observation.
+    
+    Parameters
+    ----------
+    signal : pd.DataFrame
+        Output of compute_concordance
+    model : statsmodels.LogitResults
+        Output of fit_logit
+    
+    Returns
+    -------
+    dict
+        date, concordance_score, prob_concordant, betas, latest_inputs
+    """
+    latest = signal.iloc[-1]
+    latest_prob = float(materialize_probabilities(signal.tail(1), model)["P"].iloc[-1])
+    
+    betas = {
+        "const": float(model.params["const"]),
+        "dRealY": float(model.params["dRealY"]),
+        "DXY": float(model.params["DXY"]),
+        "VIX": float(model.params["VIX"]),
+    }
+    
+    return {
+        "date": str(signal.index[-1].date()),
+        "concordance_score": float(latest["S"]),
+        "prob_concordant": latest_prob,
+        "betas": betas,
+        "latest_inputs": {
+            "dRealY": float(latest["dRealY"]),
+            "rDXY": float(latest["DXY"]),
+            "rVIX": float(latest["VIX"]),
+        }
+    }
+
 if __name__ == "__main__":
     try:
         # Fetch data
@@ -116,10 +231,9 @@ if __name__ == "__main__":
     except Exception as e:
         print(f"\n✗ Error: {e}")
         print("\nNote: This script requires internet access and may fail due to:")
-        print("  - Yahoo Finance API rate limits or downtime")
+        print("  - Yahoo Finance downtime or rate limits that outlast the retries")
         print("  - Network connectivity issues")
         print("  - Insufficient data after filtering")
-        print("\nFor production use, implement caching and retry logic.")
         import sys
         sys.exit(1)
     
@@ -129,10 +243,12 @@ if __name__ == "__main__":
     print("="*60)
     print(model.summary().tables[1])
     
+    # Fitted P(I=1) for every date, computed once
+    probs = materialize_probabilities(signal, model)
+    
     # Latest values
     latest = signal.iloc[-1]
-    latest_X = sm.add_constant(signal[["dRealY", "DXY", "VIX"]].iloc[-1])
-    latest_prob = model.predict(latest_X)[0]
+    latest_prob = probs["P"].iloc[-1]
     
     print("\n" + "="*60)
     print("LATEST SIGNAL")
@@ -150,16 +266,14 @@ if __name__ == "__main__":
     print("LAST 10 DAYS")
     print("="*60)
     summary = signal[["I", "S", "dRealY", "DXY"]].tail(10)
-    # Compute predicted probs for last 10
-    X_last10 = sm.add_constant(signal[["dRealY", "DXY", "VIX"]].tail(10))
-    summary["P(I=1)"] = model.predict(X_last10)
+    summary["P(I=1)"] = probs["P"].tail(10)
     print(summary.to_string())
     
     # Save to CSV if data folder exists
     data_dir = Path("./data")
     if data_dir.exists():
         out_path = data_dir / "concordance_signal.csv"
-        signal.to_csv(out_path)
+        signal.join(probs[["P"]]).to_csv(out_path)
         print(f"\n✓ Saved full history to {out_path}")
     else:
         print("\n(data/ folder not found; skipping CSV export)")
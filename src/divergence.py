@@ -0,0 +1,250 @@
+"""
+divergence.py
+
+Rolling divergence z-score for an arbitrary (y, x) ticker pair.
+
+Generalizes gold_vs_nasdaq.py (y = ^NDX, x = GC=F, window 90) to any pair,
+window and start date. Each stage is a separately cached sub-result, so
+requests that differ in only some parameters reuse the common work:
+
+    ("prices", ticker, fetch_start)     daily closes of one ticker, fetched
+                                        from FETCH_FLOOR (or earlier if asked)
+                                        and shared by every pair using it
+    ("returns", y, x, start)            log returns aligned on y's sessions,
+                                        shared by every window
+    ("signal", y, x, window, start)     the latest payload
+
+All three live in one ResultCache, so they share its memory budget and TTL,
+and concurrent requests for the same key compute it once. A derived entry
+expires no later than the entries it was computed from, so a result is never
+served from closes that have already been refetched. A ticker that cannot be
+fetched is remembered for NEGATIVE_TTL seconds, so repeated requests for a
+bad symbol do not each spend the rate limit on retries.
+
+Every fetch goes through the service's one MarketDataFetcher: one connection
+pool and one token bucket per worker, however many requests are in flight.
+
+Dependencies:
+    pandas, numpy, httpx
+
+Usage:
+    service = DivergenceService(ResultCache(max_bytes=256 * 2**20))
+    params = normalize_params("^ndx", "GC=F", 60, "2018-01-01")
+    payload = service.signal(params)
+    service.close()
+"""
+
+import contextvars
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from calendar_align import align_to_calendar
+from gold_vs_nasdaq import rolling_signal_arrays
+from result_cache import Expiring, ResultCache
+from signal_trace import span
+
+MIN_WINDOW = 20
+MAX_WINDOW = 500
+EARLIEST_START = "1990-01-01"
+
+# Closes are fetched from here unless a request starts earlier, so pairs with
+# different start dates share one price series per ticker
+FETCH_FLOOR = "2010-01-01"
+
+# Seconds a failed ticker fetch is remembered before it is retried
+NEGATIVE_TTL = 30.0
+
+_TICKER = re.compile(r"[A-Z0-9^=.\-]{1,20}")
+
+
+@dataclass(frozen=True)
+class DivergenceParams:
+    """Normalized request parameters (the cache key of the final result)."""
+    y: str
+    x: str
+    window: int
+    start: str
+
+
+def normalize_params(y, x, window, start):
+    """
+    Canonicalize and validate pair parameters.
+
+    Tickers are upper-cased and stripped, the start date is reformatted to
+    YYYY-MM-DD, so equivalent requests map to one cache key.
+
+    Raises
+    ------
+    ValueError
+        For malformed tickers, identical tickers, a window outside
+        [MIN_WINDOW, MAX_WINDOW] or an unparseable / out-of-range start
+    """
+    y, x = y.strip().upper(), x.strip().upper()
+    for ticker in (y, x):
+        if not _TICKER.fullmatch(ticker):
+            raise ValueError(f"invalid ticker {ticker!r}")
+    if y == x:
+        raise ValueError("y and x must be different tickers")
+    if not MIN_WINDOW <= window <= MAX_WINDOW:
+        raise ValueError(f"window must be between {MIN_WINDOW} and {MAX_WINDOW}")
+    try:
+        day = pd.Timestamp(start).normalize()
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"invalid start date: {e}")
+    if day < pd.Timestamp(EARLIEST_START) or day > pd.Timestamp.now():
+        raise ValueError(f"start must be between {EARLIEST_START} and today")
+    return DivergenceParams(y, x, int(window), day.strftime("%Y-%m-%d"))
+
+
+def fetch_close(ticker, start, fetcher=None):
+    """
+    Daily closes for one ticker (NaN sessions dropped).
+
+    Parameters
+    ----------
+    fetcher : MarketDataFetcher or None
+        Shared fetcher (and so shared rate limit); a temporary one if None
+
+    Raises
+    ------
+    LookupError
+        If the ticker could not be fetched or returned no data
+    """
+    from market_data import FetchError, MarketDataFetcher
+
+    if fetcher is None:
+        with MarketDataFetcher() as own:
+            return fetch_close(ticker, start, own)
+    try:
+        closes = fetcher.fetch_one(ticker, start).dropna()
+    except FetchError as e:
+        raise LookupError(str(e))
+    if closes.empty:
+        raise LookupError(f"No data returned for {ticker}")
+    return closes
+
+
+class _FetchFailed:
+    """Negative cache entry: the error of a failed fetch."""
+    __slots__ = ("message",)
+
+    def __init__(self, message):
+        self.message = message
+
+
+class DivergenceService:
+    """
+    Cached pair-divergence computation.
+
+    Parameters
+    ----------
+    cache : ResultCache or None
+        Shared cache for prices, returns and results
+    fetch : callable or None
+        fetch(ticker, start) -> pd.Series of closes, raising LookupError on
+        failure (default: fetch_close through the service's own
+        MarketDataFetcher)
+    """
+
+    def __init__(self, cache=None, fetch=None):
+        self.cache = cache if cache is not None else ResultCache()
+        self._fetcher = None
+        if fetch is None:
+            from market_data import MarketDataFetcher
+            self._fetcher = MarketDataFetcher()
+            fetch = partial(fetch_close, fetcher=self._fetcher)
+        self.fetch = fetch
+        self._pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="divergence-fetch")
+
+    def close(self):
+        self._pool.shutdown(wait=False)
+        if self._fetcher is not None:
+            self._fetcher.close()
+
+    def _prices(self, ticker, start):
+        fetch_start = min(start, FETCH_FLOOR)
+
+        def fetch():
+            with span("fetch", tickers=ticker, start=fetch_start):
+                try:
+                    return self.fetch(ticker, fetch_start)
+                except LookupError as e:
+                    return Expiring(_FetchFailed(str(e)), time.monotonic() + NEGATIVE_TTL)
+
+        closes, expires_at = self.cache.get_or_compute(("prices", ticker, fetch_start), fetch,
+                                                       with_expiry=True)
+        if isinstance(closes, _FetchFailed):
+            raise LookupError(closes.message)
+        return closes[closes.index >= pd.Timestamp(start)], expires_at
+
+    def prices(self, ticker, start):
+        """Closes of `ticker` from `start`, sliced from the shared per-ticker entry."""
+        return self._prices(ticker, start)[0]
+
+    def _returns(self, y, x, start):
+        def compute():
+            # Both tickers at once (each fetch is single-flighted on its own
+            # key), in copies of the caller's context so fetch spans nest
+            futures = [self._pool.submit(contextvars.copy_context().run, self._prices, t, start)
+                       for t in (y, x)]
+            (py, ey), (px, ex) = (f.result() for f in futures)
+            with span("returns", y=y, x=x):
+                aligned = align_to_calendar({y: py, x: px}, calendar=y).complete()
+                logp = np.log(aligned.to_numpy(dtype=np.float64))
+                returns = pd.DataFrame(logp[1:] - logp[:-1], index=aligned.index[1:], columns=[y, x])
+            return Expiring(returns, min(ey, ex))
+
+        return self.cache.get_or_compute(("returns", y, x, start), compute, with_expiry=True)
+
+    def returns(self, y, x, start):
+        """
+        Log returns of y and x on y's sessions (x carried over its holidays).
+
+        Returns
+        -------
+        pd.DataFrame
+            float64 columns [y, x]
+        """
+        return self._returns(y, x, start)[0]
+
+    def signal(self, params):
+        """
+        Latest divergence payload for `params`.
+
+        Raises
+        ------
+        ValueError
+            If the history is shorter than two windows
+        LookupError
+            If a ticker cannot be fetched
+        """
+        def compute():
+            returns, expires_at = self._returns(params.y, params.x, params.start)
+            need = 2 * params.window - 1
+            if len(returns) < need:
+                raise ValueError(f"Insufficient data: {len(returns)} returns since {params.start}, "
+                                 f"{need} needed for a {params.window}-day window")
+            # Only the last two windows determine the latest value
+            tail = returns.to_numpy()[-need:]
+            with span("regression", window=params.window):
+                arrays = rolling_signal_arrays(tail[:, 0], tail[:, 1], params.window)
+            return Expiring({
+                "y": params.y,
+                "x": params.x,
+                "start": params.start,
+                "date": returns.index[-1].strftime("%Y-%m-%d"),
+                "z": round(float(arrays["z"][-1]), 4),
+                "eps": round(float(arrays["eps"][-1]), 6),
+                "beta": round(float(arrays["beta_xau"][-1]), 4),
+                "alpha": round(float(arrays["alpha"][-1]), 6),
+                "window_days": params.window,
+                "observations": len(returns),
+            }, expires_at)
+
+        return self.cache.get_or_compute(("signal", params.y, params.x, params.window, params.start), compute)
@@ -0,0 +1,407 @@
+"""
+executor_workers.py
+
+Run orchestrator steps on a pool of Executor worker processes instead of in
+the API process.
+
+Steps travel through a broker as tasks with idempotent ids
+("{run_id}:{step_id}"). Delivery is at-least-once: a task handed to a worker
+is leased for `visibility_timeout` seconds and goes back on the queue if the
+worker does not ack in time (crash, hang, lost node), up to `max_deliveries`.
+Results are keyed by task id and the first ack wins, so a redelivered step
+that ran twice still yields exactly one ExecutionLog for the run.
+
+Two transports share the same Broker:
+    - in-process: worker threads call the Broker directly (tests, CI)
+    - socket: serve_broker() exposes it through multiprocessing.managers, and
+      worker processes, on this host or others, connect with connect_broker()
+
+The socket transport unpickles whatever an authenticated peer sends, so the
+authkey is the only thing standing between the port and code execution. There
+is no default key: broker_authkey() takes EXECUTOR_AUTHKEY, or generates a
+random key for a loopback-only broker with local workers, and refuses to
+expose a broker on any other address without an explicit key.
+
+Dependencies:
+    pydantic (via orchestrator_demo)
+
+Usage:
+    broker = Broker()
+    authkey = broker_authkey("127.0.0.1")    # EXECUTOR_AUTHKEY or a random key
+    server, address = serve_broker(broker, ("127.0.0.1", 50000), authkey)
+    pool = WorkerPool(address, authkey, processes=4)
+    run_orchestrator(goal, executor=RemoteExecutor(broker, run_id))
+
+    # on another node
+    EXECUTOR_AUTHKEY=... python src/executor_workers.py --connect host:50000 --processes 8
+"""
+
+import argparse
+import importlib
+import ipaddress
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from multiprocessing.managers import BaseManager
+from typing import List
+
+from orchestrator_demo import Executor, LogRecord, StepRecord, ToolRegistry, as_dict
+
+
+class Broker:
+    """
+    Thread-safe work queue with leases, redelivery and an idempotent result store.
+
+    Parameters
+    ----------
+    visibility_timeout : float
+        Seconds a delivered task may stay un-acked before it is redelivered
+    max_deliveries : int
+        Deliveries before a task is failed instead of redelivered
+    max_results : int
+        Completed results kept (oldest evicted first)
+    """
+
+    def __init__(self, visibility_timeout=30.0, max_deliveries=3, max_results=100_000):
+        self.visibility_timeout = visibility_timeout
+        self.max_deliveries = max_deliveries
+        self.max_results = max_results
+        self._cond = threading.Condition()
+        self._queue = deque()
+        self._tasks = {}          # task_id -> task, while pending or leased
+        self._leases = {}         # task_id -> (deadline, worker_id)
+        self._results = OrderedDict()
+        self.stats = {"submitted": 0, "duplicates": 0, "delivered": 0, "redelivered": 0,
+                      "acked": 0, "duplicate_acks": 0, "failed": 0}
+
+    def submit(self, task_id, payload):
+        """
+        Enqueue a task. Re-submitting a task id that is pending, leased or
+        already done is a no-op.
+        """
+        with self._cond:
+            if task_id in self._tasks or task_id in self._results:
+                self.stats["duplicates"] += 1
+                return False
+            self._tasks[task_id] = {"task_id": task_id, "payload": payload, "deliveries": 0}
+            self._queue.append(task_id)
+            self.stats["submitted"] += 1
+            self._cond.notify_all()
+            return True
+
+    def _expire_leases(self, now):
+        for task_id, (deadline, _) in list(self._leases.items()):
+            if deadline > now:
+                continue
+            del self._leases[task_id]
+            task = self._tasks[task_id]
+            if task["deliveries"] >= self.max_deliveries:
+                del self._tasks[task_id]
+                self._store(task_id, {"error": f"not acked after {task['deliveries']} deliveries"})
+                self.stats["failed"] += 1
+            else:
+                self._queue.append(task_id)
+                self.stats["redelivered"] += 1
+
+    def _store(self, task_id, result):
+        self._results[task_id] = result
+        if len(self._results) > self.max_results:
+            self._results.popitem(last=False)
+        self._cond.notify_all()
+
+    def get(self, worker_id, timeout=1.0):
+        """
+        Lease the next task for `worker_id`; None if nothing arrived in `timeout`.
+
+        Returns
+        -------
+        dict or None
+            {"task_id", "payload", "deliveries"}
+        """
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                self._expire_leases(now)
+                while self._queue:
+                    task_id = self._queue.popleft()
+                    if task_id not in self._tasks:
+                        continue  # Finished by an earlier delivery meanwhile
+                    task = self._tasks[task_id]
+                    task["deliveries"] += 1
+                    self._leases[task_id] = (now + self.visibility_timeout, worker_id)
+                    self.stats["delivered"] += 1
+                    return dict(task)
+                remaining = deadline - now
+                if remaining <= 0:
+                    return None
+                # Wake up for new work or the next lease expiry
+                next_expiry = min((d for d, _ in self._leases.values()), default=now + remaining)
+                self._cond.wait(max(0.01, min(remaining, next_expiry - now)))
+
+    def ack(self, task_id, result):
+        """Record a task's result; later acks for the same id are ignored."""
+        with self._cond:
+            self._leases.pop(task_id, None)
+            self._tasks.pop(task_id, None)
+            if task_id in self._results:
+                self.stats["duplicate_acks"] += 1
+                return False
+            self._store(task_id, result)
+            self.stats["acked"] += 1
+            return True
+
+    def is_done(self, task_id):
+        with self._cond:
+            return task_id in self._results
+
+    def wait_result(self, task_id, timeout=None):
+        """Block until `task_id` has a result; None on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while task_id not in self._results:
+                now = time.monotonic()
+                self._expire_leases(now)
+                if task_id in self._results:
+                    break
+                if deadline is not None and now >= deadline:
+                    return None
+                wait = 0.5 if deadline is None else min(0.5, deadline - now)
+                self._cond.wait(max(0.01, wait))
+            return self._results[task_id]
+
+    def snapshot(self):
+        with self._cond:
+            return {"queued": len(self._queue), "leased": len(self._leases), **self.stats}
+
+
+# ============================================================================
+# Socket transport (multiprocessing.managers)
+# ============================================================================
+
+class BrokerClient(BaseManager):
+    pass
+
+
+BrokerClient.register("broker")
+
+
+def is_loopback(host):
+    """Whether `host` only accepts connections from this machine."""
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False  # Any other hostname may resolve to a public interface
+
+
+def broker_authkey(host, env=None):
+    """
+    Authkey for a broker bound to `host`.
+
+    Uses EXECUTOR_AUTHKEY when set. Otherwise a random 32-byte key is
+    generated, which only in-process and local (WorkerPool) workers can be
+    given, so this is refused unless `host` is a loopback address.
+
+    Raises
+    ------
+    ValueError
+        If `host` is not loopback and no EXECUTOR_AUTHKEY is set
+    """
+    env = os.environ if env is None else env
+    key = env.get("EXECUTOR_AUTHKEY")
+    if key:
+        return key.encode()
+    if not is_loopback(host):
+        raise ValueError(f"Refusing to serve the executor broker on {host} without EXECUTOR_AUTHKEY")
+    return os.urandom(32)
+
+
+def serve_broker(broker, address, authkey):
+    """
+    Serve `broker` on a socket from a daemon thread of this process.
+
+    `authkey` is required (see broker_authkey): any peer holding it can make
+    this process unpickle arbitrary objects.
+
+    Returns
+    -------
+    (server, address)
+        The bound address (useful with port 0)
+    """
+    # A subclass per server keeps its registry (bound to this broker) separate
+    manager_cls = type("BrokerServer", (BaseManager,), {})
+    manager_cls.register("broker", callable=lambda: broker)
+    server = manager_cls(address=tuple(address), authkey=authkey).get_server()
+    threading.Thread(target=server.serve_forever, name="executor-broker", daemon=True).start()
+    return server, server.address
+
+
+def connect_broker(address, authkey):
+    """Proxy to a broker served by serve_broker, with the Broker method set."""
+    manager = BrokerClient(address=tuple(address), authkey=authkey)
+    manager.connect()
+    return manager.broker()
+
+
+# ============================================================================
+# Workers
+# ============================================================================
+
+def load_registry(spec=None):
+    """ToolRegistry instance from "module:attr" (a class or factory), default ToolRegistry."""
+    if not spec:
+        return ToolRegistry()
+    module, attr = spec.split(":", 1)
+    return getattr(importlib.import_module(module), attr)()
+
+
+def run_worker(broker, registry, worker_id=None, stop=None, poll_timeout=1.0, max_retries=2):
+    """
+    Lease, execute and ack steps until `stop` is set.
+
+    Each step runs through a regular Executor, so tool retries and
+    verification behave as in-process. A task whose result is already
+    known (a redelivery racing a slow ack) is acked without running.
+    """
+    worker_id = worker_id or f"{os.getpid()}-{uuid.uuid4().hex[:6]}"
+    executor = Executor(registry, max_retries=max_retries, fast=True)
+    while stop is None or not stop.is_set():
+        task = broker.get(worker_id, poll_timeout)
+        if task is None:
+            continue
+        if broker.is_done(task["task_id"]):
+            continue
+        step = StepRecord(**task["payload"])
+        log = executor.execute_step(step)
+        broker.ack(task["task_id"], log.as_dict())
+
+
+def _worker_process(address, authkey, registry_spec, worker_id):
+    broker = connect_broker(address, authkey)
+    run_worker(broker, load_registry(registry_spec), worker_id=worker_id)
+
+
+class WorkerPool:
+    """
+    Executor worker processes connected to a socket broker.
+
+    Parameters
+    ----------
+    address : tuple
+        (host, port) of serve_broker
+    authkey : bytes
+        Shared secret for the broker connection
+    processes : int
+        Number of worker processes
+    registry_spec : str or None
+        "module:attr" ToolRegistry factory, importable in the workers
+    """
+
+    def __init__(self, address, authkey, processes=4, registry_spec=None):
+        context = multiprocessing.get_context("spawn")
+        self.processes = [
+            context.Process(target=_worker_process, args=(tuple(address), authkey, registry_spec, f"w{i}"),
+                            name=f"executor-worker-{i}", daemon=True)
+            for i in range(processes)
+        ]
+        for process in self.processes:
+            process.start()
+
+    def close(self):
+        for process in self.processes:
+            process.terminate()
+        for process in self.processes:
+            process.join(timeout=5)
+
+
+class ThreadWorkers:
+    """In-process stand-in for WorkerPool: worker threads on a local Broker."""
+
+    def __init__(self, broker, registry=None, threads=4):
+        self.stop = threading.Event()
+        self.threads = [
+            threading.Thread(target=run_worker, args=(broker, registry or ToolRegistry(), f"t{i}", self.stop),
+                             kwargs={"poll_timeout": 0.1}, name=f"executor-thread-{i}", daemon=True)
+            for i in range(threads)
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def close(self):
+        self.stop.set()
+        for thread in self.threads:
+            thread.join(timeout=5)
+
+
+# ============================================================================
+# Dispatcher side
+# ============================================================================
+
+class RemoteExecutor:
+    """
+    Executor stand-in that sends a run's steps to workers through a broker.
+
+    Steps run in plan order; each becomes task "{run_id}:{step_id}", so
+    retrying a whole run with the same run_id never executes a finished
+    step again.
+    """
+
+    def __init__(self, broker, run_id=None, timeout_s=60.0):
+        self.broker = broker
+        self.run_id = run_id or str(uuid.uuid4())
+        self.timeout_s = timeout_s
+
+    def task_id(self, step) -> str:
+        return f"{self.run_id}:{step.step_id}"
+
+    def execute_step(self, step) -> LogRecord:
+        task_id = self.task_id(step)
+        began = time.time()
+        self.broker.submit(task_id, as_dict(step))
+        result = self.broker.wait_result(task_id, self.timeout_s)
+        if result is None or ("error" in result and "step_id" not in result):
+            reason = "timed out waiting for a worker" if result is None else result["error"]
+            return LogRecord(
+                step_id=step.step_id,
+                tool=step.tool,
+                input=step.input,
+                output={"error": reason},
+                success=False,
+                duration_ms=(time.time() - began) * 1000,
+                verified=False,
+                verification_msg=f"Worker execution failed: {reason}"
+            )
+        return LogRecord(**result)
+
+    def execute_steps(self, steps) -> List[LogRecord]:
+        return [self.execute_step(step) for step in steps]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Executor worker processes for a remote broker")
+    parser.add_argument("--connect", required=True, help="broker address host:port")
+    parser.add_argument("--authkey", default=os.environ.get("EXECUTOR_AUTHKEY"),
+                        help="broker shared secret (default: $EXECUTOR_AUTHKEY)")
+    parser.add_argument("--processes", type=int, default=os.cpu_count())
+    parser.add_argument("--registry", default=None, help="ToolRegistry factory as module:attr")
+    args = parser.parse_args()
+    if not args.authkey:
+        parser.error("an authkey is required: pass --authkey or set EXECUTOR_AUTHKEY")
+
+    host, port = args.connect.rsplit(":", 1)
+    pool = WorkerPool((host, int(port)), args.authkey.encode(), args.processes, args.registry)
+    print(f"{len(pool.processes)} workers connected to {args.connect}")
+    try:
+        for process in pool.processes:
+            process.join()
+    except KeyboardInterrupt:
+        pool.close()
+
+
+if __name__ == "__main__":
+    main()
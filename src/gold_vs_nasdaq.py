@@ -6,10 +6,11 @@ Production-ready computation of rolling divergence z-score between Nasdaq and go
 This script downloads daily price data for ^NDX (Nasdaq 100) and GC=F (gold futures),
 computes log returns, and runs a rolling OLS regression to measure divergence.
 
-Output: Latest z-score printed to console + full history saved to CSV.
+Output: Latest z-score printed to console + full history saved to CSV, with
+change-point flags (cp_beta, cp_var) and run lengths (rl_beta, rl_var).
 
 Dependencies:
-    pandas, numpy, yfinance, statsmodels
+    pandas, numpy, httpx, statsmodels
 
 Usage:
     python gold_vs_nasdaq.py
@@ -17,12 +18,14 @@ Usage:
 
 import pandas as pd
 import numpy as np
-import yfinance as yf
-from statsmodels.regression.rolling import RollingOLS
-import statsmodels.api as sm
 import warnings
 from pathlib import Path
 
+from calendar_align import align_to_calendar
+from changepoint import detect_regimes
+from result_cache import memory_footprint
+from signal_trace import span
+
 warnings.filterwarnings("ignore", category=RuntimeWarning)
 
 # Configuration
@@ -50,30 +53,31 @@ def fetch_prices(tickers, start, end):
     Returns
     -------
     pd.DataFrame
-        Adjusted close prices with tickers as columns
+        Adjusted close prices with tickers as columns, on the first ticker's
+        trading sessions (other tickers carried forward over their holidays)
     
     Raises
     ------
     ValueError
         If download fails or returns empty data
     """
+    from market_data import fetch_closes
+    
     try:
         print(f"Fetching data for {', '.join(tickers)} from {start}...")
-        data = yf.download(tickers, start=start, end=end, progress=False, auto_adjust=True)
+        # One concurrent, rate-limited request per ticker (see market_data.py)
+        with span("fetch", tickers=",".join(tickers)):
+            data = fetch_closes(tickers, start, end)
         
         if data.empty:
-            raise ValueError("No data returned from yfinance")
-        
-        # Handle multi-index columns (when multiple tickers)
-        if isinstance(data.columns, pd.MultiIndex):
-            data = data["Close"]
-        else:
-            # Single ticker case
-            data = data[["Close"]]
-            data.columns = tickers
+            raise ValueError("No data returned from Yahoo Finance")
         
-        # Drop rows with any missing values
-        data = data.dropna()
+        # Nasdaq sessions define the rows; gold closes are carried over its
+        # own holidays (up to MAX_STALE sessions) instead of dropping the date
+        aligned = align_to_calendar(data, calendar=tickers[0])
+        for line in aligned.report():
+            print(f"  coverage {line}")
+        data = aligned.complete()
         
         if len(data) < WINDOW:
             raise ValueError(f"Insufficient data: {len(data)} days < {WINDOW} window")
@@ -85,7 +89,7 @@ def fetch_prices(tickers, start, end):
         raise ValueError(f"Failed to fetch price data: {e}")
 
 
-def compute_rolling_signal(df, window=90):
+def compute_rolling_signal(df, window=90, bands=False, compact=False, **bootstrap_kwargs):
     """
     Compute rolling regression of Nasdaq on gold returns and extract divergence metrics.
     
@@ -102,6 +106,15 @@ def compute_rolling_signal(df, window=90):
         Index: DatetimeIndex
     window : int
         Rolling window size in days
+    bands : bool
+        If True, add block-bootstrap confidence bands for alpha, beta_xau
+        and z at every date (see bootstrap_bands)
+    compact : bool
+        If True, skip statsmodels and the intermediate DataFrames: returns
+        and window sums are computed on NumPy arrays and the result columns
+        are float32 (half the memory of the default path)
+    **bootstrap_kwargs
+        Passed to bootstrap_bands (n_boot, block, ci, seed, n_jobs)
     
     Returns
     -------
@@ -111,10 +124,23 @@ def compute_rolling_signal(df, window=90):
             - z: z-score of residuals
             - beta_xau: rolling beta coefficient (Nasdaq sensitivity to gold)
             - alpha: rolling intercept
+            - {alpha,beta_xau,z}_{lo,hi}: confidence bands (only if bands=True)
     """
+    if compact:
+        result = _compact_rolling_signal(df, window)
+        if bands:
+            result = result.join(bootstrap_bands(df, window=window, **bootstrap_kwargs))
+        print(f"Generated {len(result)} signal observations ({memory_footprint(result) / 1024:.0f} KiB)")
+        return result
+    
+    # Deferred: statsmodels is the slowest import in the pipeline
+    from statsmodels.regression.rolling import RollingOLS
+    import statsmodels.api as sm
+    
     # Compute log returns
-    returns = np.log(df / df.shift(1)).dropna()
-    returns.columns = ["NQ", "XAU"]
+    with span("returns", rows=len(df)):
+        returns = np.log(df / df.shift(1)).dropna()
+        returns.columns = ["NQ", "XAU"]
     
     print(f"Computing rolling OLS with {window}-day window...")
     
@@ -123,12 +149,13 @@ def compute_rolling_signal(df, window=90):
     y = returns["NQ"]
     
     # Rolling OLS: NQ ~ const + XAU
-    model = RollingOLS(y, X, window=window)
-    fitted = model.fit()
-    
-    # Compute residuals manually: y - y_hat
-    y_hat = fitted.params["const"] + fitted.params["XAU"] * returns["XAU"]
-    residuals = y - y_hat
+    with span("regression", window=window, rows=len(returns)):
+        model = RollingOLS(y, X, window=window)
+        fitted = model.fit()
+        
+        # Compute residuals manually: y - y_hat
+        y_hat = fitted.params["const"] + fitted.params["XAU"] * returns["XAU"]
+        residuals = y - y_hat
     
     # Extract results
     result = pd.DataFrame({
@@ -137,19 +164,238 @@ def compute_rolling_signal(df, window=90):
         "eps": residuals,
     }, index=returns.index)
     
-    # Rolling standard deviation of residuals
-    result["eps_std"] = result["eps"].rolling(window).std()
-    
-    # Z-score: standardized residual
-    result["z"] = result["eps"] / result["eps_std"]
+    with span("z", window=window):
+        # Rolling standard deviation of residuals
+        result["eps_std"] = result["eps"].rolling(window).std()
+        
+        # Z-score: standardized residual
+        result["z"] = result["eps"] / result["eps_std"]
     
     # Drop rows with NaN (first window days)
     result = result.dropna()
     
-    print(f"Generated {len(result)} signal observations")
+    if bands:
+        result = result.join(bootstrap_bands(df, window=window, **bootstrap_kwargs))
+    
+    print(f"Generated {len(result)} signal observations ({memory_footprint(result) / 1024:.0f} KiB)")
     return result
 
 
+def rolling_signal_arrays(y, x, window):
+    """
+    Closed-form rolling OLS of y on [1, x] plus the residual z-score.
+    
+    Every window's sums are computed from its own elements (a strided view,
+    no (n, window) copy), so results depend only on the data inside the
+    window, not on where an input array starts.
+    
+    Parameters
+    ----------
+    y, x : np.ndarray
+        float64 returns (Nasdaq, gold), same length n
+    window : int
+        Rolling window size
+    
+    Returns
+    -------
+    dict of np.ndarray
+        alpha, beta_xau, eps, eps_std, z for the last n - 2 * window + 2
+        observations (the rows compute_rolling_signal keeps)
+    """
+    from numpy.lib.stride_tricks import sliding_window_view
+    
+    def window_sum(a):
+        return sliding_window_view(a, window).sum(axis=1)
+    
+    w = window
+    sx, sy = window_sum(x), window_sum(y)
+    beta = (window_sum(x * y) - sx * sy / w) / (window_sum(x * x) - sx * sx / w)
+    alpha = (sy - beta * sx) / w
+    eps = y[w - 1:] - alpha - beta * x[w - 1:]
+    
+    # Sample std (ddof=1) of the last `window` residuals, like pandas rolling().std()
+    se = window_sum(eps)
+    eps_std = np.sqrt((window_sum(eps * eps) - se * se / w) / (w - 1))
+    
+    k = w - 1
+    eps = eps[k:]
+    return {
+        "alpha": alpha[k:],
+        "beta_xau": beta[k:],
+        "eps": eps,
+        "eps_std": eps_std,
+        "z": eps / eps_std,
+    }
+
+
+def _compact_rolling_signal(df, window):
+    """float32 variant of compute_rolling_signal built straight from NumPy arrays."""
+    with span("returns", rows=len(df), compact=True):
+        logp = np.log(df.to_numpy(dtype=np.float64))
+        returns = logp[1:] - logp[:-1]
+        index = df.index[1:]
+        
+        valid = ~np.isnan(returns).any(axis=1)
+        if not valid.all():
+            returns, index = returns[valid], index[valid]
+    
+    print(f"Computing rolling OLS with {window}-day window (compact)...")
+    # Closed-form window sums give the fit and z together
+    with span("regression", window=window, rows=len(returns), compact=True, includes_z=True):
+        arrays = rolling_signal_arrays(returns[:, 0], returns[:, 1], window)
+    index = index[2 * window - 2:]
+    
+    columns = ["alpha", "beta_xau", "eps", "eps_std", "z"]
+    return pd.DataFrame(
+        {name: arrays[name].astype(np.float32) for name in columns}, index=index, copy=False
+    )
+
+
+# Peak number of live (rows, n_boot, window) 8-byte arrays in one batch:
+# idx or xs, ys, dx and a temporary product
+_BOOT_ARRAYS = 5
+
+
+def bootstrap_bands(df, window=90, n_boot=1000, block=5, ci=0.95, seed=0,
+                    n_jobs=None, last=None, chunk_size=64, max_bytes=512 * 2**20):
+    """
+    Moving-block bootstrap confidence bands for alpha, beta_xau and z.
+    
+    For every signal date, the returns in its regression window are resampled
+    in blocks of `block` days (preserving short-range autocorrelation), the
+    OLS is refit in closed form on each resample, and the current day's
+    residual under each refit is divided by the same rolling eps_std as the
+    point z, so the z band brackets z. All resamples for a chunk of windows
+    are one batched NumPy operation over an array of shape
+    (windows, n_boot, window); chunks run on a thread pool.
+    
+    Output is reproducible for a given seed: each date's resamples come from
+    a fixed child seed, so they do not depend on n_jobs or `last`.
+    
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Prices, same input as compute_rolling_signal
+    window : int
+        Rolling window size in days
+    n_boot : int
+        Bootstrap resamples per date
+    block : int
+        Block length in days
+    ci : float
+        Two-sided confidence level (0.95 -> 2.5% / 97.5% percentiles)
+    seed : int
+        Random seed
+    n_jobs : int or None
+        Worker threads (None = all cores)
+    last : int or None
+        Only compute the last N dates (e.g. 1 for the latest signal)
+    chunk_size : int
+        Windows per chunk of the seed grid
+    max_bytes : int
+        Budget for the batched arrays of all threads together; chunks are
+        processed in smaller batches when n_jobs full chunks would exceed it
+        (the resamples, and so the output, do not change)
+    
+    Returns
+    -------
+    pd.DataFrame
+        Columns alpha_lo, alpha_hi, beta_xau_lo, beta_xau_hi, z_lo, z_hi,
+        indexed like compute_rolling_signal's output
+    """
+    import os
+    from concurrent.futures import ThreadPoolExecutor
+    
+    returns = np.log(df / df.shift(1)).dropna()
+    y = returns.iloc[:, 0].to_numpy(dtype=np.float64)
+    x = returns.iloc[:, 1].to_numpy(dtype=np.float64)
+    
+    # Signal dates: the z needs a full window of per-window residuals
+    first = 2 * window - 2
+    ends = np.arange(first, len(returns))
+    if last is not None:
+        ends = ends[-last:]
+    
+    n_blocks = -(-window // block)
+    offsets = np.arange(block)
+    q = [(1 - ci) / 2, 1 - (1 - ci) / 2]
+    
+    # Point-z denominators: rolling std of the per-window residuals
+    eps_std = rolling_signal_arrays(y, x, window)["eps_std"]
+    
+    # Split the budget across threads: rows per batch so that n_jobs batches
+    # of _BOOT_ARRAYS (rows, n_boot, window) arrays fit in max_bytes
+    n_jobs = n_jobs or os.cpu_count() or 1
+    per_row = _BOOT_ARRAYS * n_boot * window * 8
+    batch = int(max(1, min(chunk_size, max_bytes // (n_jobs * per_row))))
+    
+    # Chunks sit on a fixed grid of signal dates with one child seed each, so a
+    # date's bands do not depend on `last`, chunking of the request or n_jobs
+    grid = (ends - first) // chunk_size
+    chunks = [(g, ends[grid == g]) for g in np.unique(grid)]
+    
+    def run(chunk_id, chunk):
+        rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(int(chunk_id),)))
+        # Block starts for the whole grid chunk: (chunk_size, n_boot, n_blocks)
+        starts = rng.integers(0, window - block + 1, size=(chunk_size, n_boot, n_blocks))
+        starts = starts[(chunk - first) % chunk_size]
+        return np.vstack([fit(chunk[i:i + batch], starts[i:i + batch])
+                          for i in range(0, len(chunk), batch)])
+    
+    def fit(ends_b, starts_b):
+        rel = (starts_b[..., None] + offsets).reshape(len(ends_b), n_boot, -1)[..., :window]
+        idx = (ends_b - window + 1)[:, None, None] + rel
+        
+        xs, ys = x[idx], y[idx]
+        del idx
+        mx, my = xs.mean(axis=2), ys.mean(axis=2)
+        dx = xs - mx[..., None]
+        beta = (dx * (ys - my[..., None])).sum(axis=2) / (dx * dx).sum(axis=2)
+        alpha = my - beta * mx
+        del xs, ys, dx
+        
+        sigma = eps_std[ends_b - first][:, None]
+        z = (y[ends_b][:, None] - alpha - beta * x[ends_b][:, None]) / sigma
+        
+        return np.concatenate([np.quantile(v, q, axis=1).T for v in (alpha, beta, z)], axis=1)
+    
+    with ThreadPoolExecutor(max_workers=n_jobs) as pool:
+        parts = list(pool.map(lambda c: run(*c), chunks))
+    
+    columns = ["alpha_lo", "alpha_hi", "beta_xau_lo", "beta_xau_hi", "z_lo", "z_hi"]
+    values = np.vstack(parts) if parts else np.empty((0, len(columns)))
+    return pd.DataFrame(values, index=returns.index[ends], columns=columns)
+
+
+def latest_payload(signal_df, window=WINDOW):
+    """
+    Build the API payload for the most recent signal observation.
+    
+    Parameters
+    ----------
+    signal_df : pd.DataFrame
+        Output of compute_rolling_signal
+    window : int
+        Rolling window size used to compute the signal
+    
+    Returns
+    -------
+    dict
+        date, z, eps, beta_xau, alpha, window_days (rounded for display)
+    """
+    latest = signal_df.iloc[-1]
+    latest_date = signal_df.index[-1]
+    
+    return {
+        "date": latest_date.strftime("%Y-%m-%d"),
+        "z": round(float(latest["z"]), 4),
+        "eps": round(float(latest["eps"]), 6),
+        "beta_xau": round(float(latest["beta_xau"]), 4),
+        "alpha": round(float(latest["alpha"]), 6),
+        "window_days": window
+    }
+
+
 def save_output(signal_df, output_path):
     """
     Save signal DataFrame to CSV.
@@ -206,8 +452,9 @@ def main():
         # Step 1: Fetch price data
         prices = fetch_prices(TICKERS, START, END)
         
-        # Step 2: Compute rolling signal
+        # Step 2: Compute rolling signal and flag regime changes
         signal = compute_rolling_signal(prices, window=WINDOW)
+        signal = signal.join(detect_regimes(signal, prices))
         
         # Step 3: Save to CSV
         save_output(signal, OUTPUT_FILE)
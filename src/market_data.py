@@ -0,0 +1,285 @@
+"""
+market_data.py
+
+Concurrent, pooled and rate-limit-aware daily price fetcher.
+
+Each ticker is requested separately from the Yahoo Finance chart endpoint over
+one pooled HTTP client, fanned out on a thread pool. Requests are paced by a
+shared token bucket, retried with exponential backoff and full jitter on 429 /
+5xx / transport errors (honouring Retry-After), and failures are reported per
+ticker instead of failing the whole batch.
+
+The base URL is configurable so the same code runs against a local stand-in
+server (see scripts/bench_fetcher.py) for offline benchmarks.
+
+Dependencies:
+    httpx, pandas
+
+Usage:
+    fetcher = MarketDataFetcher()
+    result = fetcher.fetch(["^NDX", "GC=F"], start="2015-01-01")
+    result.prices      # DataFrame, one column per successful ticker
+    result.failures    # {symbol: error message}
+"""
+
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, Optional
+from urllib.parse import quote
+
+import httpx
+import pandas as pd
+
+from calendar_align import align_to_calendar
+from rate_limit import TokenBucket
+
+YAHOO_CHART_URL = "https://query1.finance.yahoo.com/v8/finance/chart"
+USER_AGENT = "Mozilla/5.0 (compatible; rg-portfolio-signals/1.0)"
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class FetchError(Exception):
+    """Raised when a ticker cannot be fetched after all retries."""
+
+    def __init__(self, symbol, message, status=None):
+        super().__init__(f"{symbol}: {message}")
+        self.symbol = symbol
+        self.status = status
+
+
+@dataclass
+class FetchStats:
+    """Counters for one fetch() call."""
+    requests: int = 0
+    retries: int = 0
+    throttled: int = 0
+    elapsed_s: float = 0.0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add(self, **counts):
+        with self._lock:
+            for name, value in counts.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def as_dict(self):
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "throttled": self.throttled,
+            "elapsed_s": round(self.elapsed_s, 3),
+        }
+
+
+@dataclass
+class FetchResult:
+    """Outcome of a multi-ticker fetch: whatever succeeded plus per-ticker errors."""
+    prices: pd.DataFrame
+    failures: Dict[str, str]
+    stats: FetchStats
+
+    @property
+    def ok(self):
+        return not self.failures
+
+
+def _to_epoch(date_str):
+    if date_str is None:
+        return int(time.time())
+    return int(datetime.strptime(date_str, "%Y-%m-%d").replace(tzinfo=timezone.utc).timestamp())
+
+
+def parse_chart(symbol, payload):
+    """
+    Convert a chart API response into a daily close series.
+
+    Uses the adjusted close when present (what yfinance's auto_adjust and
+    "Adj Close" gave us before), otherwise the raw close.
+
+    Returns
+    -------
+    pd.Series
+        Prices indexed by exchange-local trading date, named `symbol`
+    """
+    chart = payload.get("chart") or {}
+    if chart.get("error"):
+        raise FetchError(symbol, chart["error"].get("description", "chart error"))
+    results = chart.get("result") or []
+    if not results or not results[0].get("timestamp"):
+        raise FetchError(symbol, "no data returned")
+
+    result = results[0]
+    indicators = result.get("indicators", {})
+    adj = indicators.get("adjclose") or [{}]
+    closes = adj[0].get("adjclose") or indicators["quote"][0]["close"]
+
+    # Timestamps are session opens in UTC; shift to exchange time to get the date
+    offset = result.get("meta", {}).get("gmtoffset", 0)
+    index = pd.to_datetime(pd.Series(result["timestamp"]) + offset, unit="s").dt.normalize()
+    series = pd.Series(closes, index=pd.DatetimeIndex(index, name="Date"), name=symbol, dtype="float64")
+    return series[~series.index.duplicated(keep="last")]
+
+
+class MarketDataFetcher:
+    """
+    Per-ticker concurrent fetcher with pooling, pacing and retries.
+
+    Parameters
+    ----------
+    base_url : str
+        Chart endpoint; requests go to {base_url}/{symbol}
+    max_workers : int
+        Concurrent requests (also the connection pool size)
+    rate, burst : float
+        Token bucket pacing shared by all workers (requests/s, burst size)
+    max_retries : int
+        Retries per ticker after the first attempt
+    backoff_base, backoff_cap : float
+        Exponential backoff parameters in seconds (full jitter is applied)
+    timeout : float
+        Per-request timeout in seconds
+    client : httpx.Client or None
+        Pre-built client (e.g. with a custom transport); owned by the caller
+    """
+
+    def __init__(self, base_url=YAHOO_CHART_URL, max_workers=8, rate=5.0, burst=10,
+                 max_retries=4, backoff_base=0.5, backoff_cap=8.0, timeout=10.0,
+                 client: Optional[httpx.Client] = None, seed=None):
+        self.base_url = base_url.rstrip("/")
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.bucket = TokenBucket(rate=rate, burst=burst)
+        self._random = random.Random(seed)
+        self._owns_client = client is None
+        self.client = client or httpx.Client(
+            timeout=timeout,
+            headers={"User-Agent": USER_AGENT},
+            limits=httpx.Limits(max_connections=max_workers, max_keepalive_connections=max_workers),
+        )
+
+    def close(self):
+        if self._owns_client:
+            self.client.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _backoff(self, attempt, retry_after=None):
+        """Full-jitter exponential backoff, never shorter than Retry-After."""
+        ceiling = min(self.backoff_cap, self.backoff_base * (2 ** attempt))
+        delay = self._random.uniform(0, ceiling)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+    def fetch_one(self, symbol, start, end=None, stats=None):
+        """
+        Fetch one ticker, retrying transient failures.
+
+        Returns
+        -------
+        pd.Series
+            Daily closes for `symbol`
+
+        Raises
+        ------
+        FetchError
+            On a non-retryable response or once retries are exhausted
+        """
+        stats = stats or FetchStats()
+        params = {
+            "period1": _to_epoch(start),
+            "period2": _to_epoch(end),
+            "interval": "1d",
+            "events": "div,split",
+            "includeAdjustedClose": "true",
+        }
+        url = f"{self.base_url}/{quote(symbol, safe='')}"
+
+        last_error = "unknown error"
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire()
+            stats.add(requests=1)
+            retry_after = None
+            try:
+                resp = self.client.get(url, params=params)
+            except httpx.TransportError as e:
+                last_error = f"transport error: {e}"
+            else:
+                if resp.status_code == 200:
+                    return parse_chart(symbol, resp.json())
+                last_error = f"HTTP {resp.status_code}"
+                if resp.status_code not in RETRYABLE_STATUS:
+                    raise FetchError(symbol, last_error, status=resp.status_code)
+                if resp.status_code == 429:
+                    stats.add(throttled=1)
+                header = resp.headers.get("Retry-After")
+                if header and header.isdigit():
+                    retry_after = float(header)
+
+            if attempt < self.max_retries:
+                stats.add(retries=1)
+                time.sleep(self._backoff(attempt, retry_after))
+
+        raise FetchError(symbol, f"{last_error} after {self.max_retries} retries")
+
+    def fetch(self, symbols, start, end=None):
+        """
+        Fetch many tickers concurrently.
+
+        Returns
+        -------
+        FetchResult
+            Prices for the tickers that succeeded (outer-joined on date, columns
+            in the order requested) and an error message per failed ticker
+        """
+        stats = FetchStats()
+        began = time.perf_counter()
+        series, failures = {}, {}
+
+        def run(symbol):
+            try:
+                series[symbol] = self.fetch_one(symbol, start, end, stats)
+            except Exception as e:
+                failures[symbol] = str(e)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            list(pool.map(run, symbols))
+
+        stats.elapsed_s = time.perf_counter() - began
+        ordered = {s: series[s] for s in symbols if s in series}
+        prices = align_to_calendar(ordered, "union", fill=None).prices if ordered else pd.DataFrame()
+        return FetchResult(prices=prices, failures=failures, stats=stats)
+
+
+def fetch_closes(symbols, start, end=None, **fetcher_kwargs):
+    """
+    Fetch closes for `symbols` and fail if any ticker could not be fetched.
+
+    Convenience wrapper for scripts that need every ticker.
+
+    Returns
+    -------
+    pd.DataFrame
+        Closes with symbols as columns (rows not yet aligned or dropped)
+
+    Raises
+    ------
+    ValueError
+        If any ticker failed, listing every failure
+    """
+    with MarketDataFetcher(**fetcher_kwargs) as fetcher:
+        result = fetcher.fetch(symbols, start, end)
+    if result.failures:
+        details = "; ".join(result.failures.values())
+        raise ValueError(f"Failed to fetch {len(result.failures)}/{len(symbols)} tickers: {details}")
+    return result.prices
@@ -3,12 +3,19 @@ orchestrator_demo.py
 Minimal Phase 1 orchestrator: planner, executor, verifier, policy gate.
 Run: python src/orchestrator_demo.py
 """
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable, Tuple
 from pydantic import BaseModel, Field
+from concurrent.futures import Future, TimeoutError as FutureTimeout
 from datetime import datetime
+import threading
 import time
 import json
 
+try:
+    import orjson
+except ImportError:  # optional: compact encoding falls back to json
+    orjson = None
+
 # ============================================================================
 # Tool Definitions (typed contracts)
 # ============================================================================
@@ -53,6 +60,10 @@ class ToolRegistry:
     def search(input: SearchInput) -> SearchOutput:
         """Mock search tool."""
         time.sleep(0.1)  # Simulate latency
+        return ToolRegistry._search_result(input)
+    
+    @staticmethod
+    def _search_result(input: SearchInput) -> SearchOutput:
         # Mock: return gold vs Nasdaq search results
         if "gold" in input.query.lower() and "nasdaq" in input.query.lower():
             return SearchOutput(
@@ -66,6 +77,12 @@ class ToolRegistry:
             )
         return SearchOutput(success=True, result="No results", results=[])
     
+    @staticmethod
+    def search_batch(inputs: List[SearchInput]) -> List[SearchOutput]:
+        """Mock batched search: one round trip for many queries."""
+        time.sleep(0.1)  # One latency for the whole batch
+        return [ToolRegistry._search_result(input) for input in inputs]
+    
     @staticmethod
     def calc(input: CalcInput) -> CalcOutput:
         """Mock calculator tool."""
@@ -84,6 +101,14 @@ class ToolRegistry:
         path = f"/notes/{input.filename}"
         return WriteNoteOutput(success=True, result=f"Written to {path}", path=path)
 
+# Tool name -> input model. A tool is batchable when the registry also has
+# `<tool>_batch(List[input]) -> List[output]`.
+TOOL_INPUTS = {
+    "search": SearchInput,
+    "calc": CalcInput,
+    "write_note": WriteNoteInput,
+}
+
 # ============================================================================
 # Plan & Step Definitions
 # ============================================================================
@@ -100,6 +125,33 @@ class Plan(BaseModel):
     goal: str
     steps: List[Step]
 
+# Internal fast path: plain __slots__ records used between planner, executor
+# and policy gate. The pydantic models above validate at the API boundary;
+# inside a run nothing needs re-validating or copying.
+
+class StepRecord:
+    __slots__ = ("step_id", "tool", "input", "acceptance")
+    
+    def __init__(self, step_id: int, tool: str, input: Dict[str, Any], acceptance: str):
+        self.step_id = step_id
+        self.tool = tool
+        self.input = input
+        self.acceptance = acceptance
+    
+    def as_dict(self) -> Dict[str, Any]:
+        return {"step_id": self.step_id, "tool": self.tool, "input": self.input,
+                "acceptance": self.acceptance}
+
+class PlanRecord:
+    __slots__ = ("goal", "steps")
+    
+    def __init__(self, goal: str, steps: List[StepRecord]):
+        self.goal = goal
+        self.steps = steps
+    
+    def as_dict(self) -> Dict[str, Any]:
+        return {"goal": self.goal, "steps": [step.as_dict() for step in self.steps]}
+
 # ============================================================================
 # Planner (rule-based, no LLM dependency)
 # ============================================================================
@@ -108,32 +160,39 @@ class Planner:
     """Deterministic planner for demo purposes."""
     
     @staticmethod
-    def plan(goal: str) -> Plan:
-        """Generate plan from goal."""
+    def steps_for(goal: str) -> List[Dict[str, Any]]:
+        """Step specs (plain dicts) for a goal."""
         # Simple pattern matching
         if "briefing" in goal.lower() and "gold" in goal.lower() and "nasdaq" in goal.lower():
-            return Plan(
-                goal=goal,
-                steps=[
-                    Step(
-                        step_id=1,
-                        tool="search",
-                        input={"query": "gold vs Nasdaq divergence latest"},
-                        acceptance="At least 2 results returned"
-                    ),
-                    Step(
-                        step_id=2,
-                        tool="write_note",
-                        input={
-                            "filename": "gold_nq_briefing.txt",
-                            "content": "Gold-Nasdaq divergence briefing based on search results"
-                        },
-                        acceptance="Note written successfully"
-                    )
-                ]
-            )
+            return [
+                dict(
+                    step_id=1,
+                    tool="search",
+                    input={"query": "gold vs Nasdaq divergence latest"},
+                    acceptance="At least 2 results returned"
+                ),
+                dict(
+                    step_id=2,
+                    tool="write_note",
+                    input={
+                        "filename": "gold_nq_briefing.txt",
+                        "content": "Gold-Nasdaq divergence briefing based on search results"
+                    },
+                    acceptance="Note written successfully"
+                )
+            ]
         # Default: empty plan
-        return Plan(goal=goal, steps=[])
+        return []
+    
+    @staticmethod
+    def plan(goal: str) -> Plan:
+        """Generate plan from goal."""
+        return Plan(goal=goal, steps=[Step(**spec) for spec in Planner.steps_for(goal)])
+    
+    @staticmethod
+    def plan_fast(goal: str) -> PlanRecord:
+        """Generate plan as unvalidated records (internal fast path)."""
+        return PlanRecord(goal=goal, steps=[StepRecord(**spec) for spec in Planner.steps_for(goal)])
 
 # ============================================================================
 # Executor (runs steps with retries, verification)
@@ -149,14 +208,211 @@ class ExecutionLog(BaseModel):
     duration_ms: float
     verified: bool
     verification_msg: str
+    batch_size: int = 1
+
+class LogRecord:
+    """Fast-path ExecutionLog: same fields, no validation or copying."""
+    __slots__ = ("step_id", "tool", "input", "output", "success", "duration_ms",
+                 "verified", "verification_msg", "batch_size")
+    
+    def __init__(self, step_id: int, tool: str, input: Dict[str, Any], output: Dict[str, Any],
+                 success: bool, duration_ms: float, verified: bool, verification_msg: str,
+                 batch_size: int = 1):
+        self.step_id = step_id
+        self.tool = tool
+        self.input = input
+        self.output = output
+        self.success = success
+        self.duration_ms = duration_ms
+        self.verified = verified
+        self.verification_msg = verification_msg
+        self.batch_size = batch_size
+    
+    def as_dict(self) -> Dict[str, Any]:
+        return {"step_id": self.step_id, "tool": self.tool, "input": self.input,
+                "output": self.output, "success": self.success, "duration_ms": self.duration_ms,
+                "verified": self.verified, "verification_msg": self.verification_msg,
+                "batch_size": self.batch_size}
+
+def as_dict(record) -> Dict[str, Any]:
+    """Plain dict for a fast-path record or a pydantic model."""
+    return record.as_dict() if hasattr(record, "as_dict") else record.dict()
+
+def encode_run(record: Dict[str, Any]) -> bytes:
+    """Compact JSON encoding of a run record (orjson when installed)."""
+    if orjson is not None:
+        return orjson.dumps(record)
+    return json.dumps(record, separators=(",", ":")).encode()
+
+class StepBatcher:
+    """
+    Coalesces calls to batchable tools across concurrent callers.
+    
+    The first call for a tool opens a batching window; every call for the
+    same tool that arrives within `window_ms` (from this plan or any other
+    run sharing the batcher) joins it, and the window is flushed as a single
+    `<tool>_batch` call. A window flushes early once it holds `max_batch`
+    calls. Each caller gets a Future resolving to its own output; a caller
+    that cancels its Future before the window flushes is left out of the
+    batch, one that cannot cancel must wait, as its call is already running.
+    """
+    
+    def __init__(self, registry: ToolRegistry, window_ms: float = 5.0, max_batch: int = 32):
+        self.registry = registry
+        self.window_ms = window_ms
+        self.max_batch = max_batch
+        self._lock = threading.Lock()
+        self._pending: Dict[str, list] = {}
+        self._timers: Dict[str, threading.Timer] = {}
+    
+    def batch_fn(self, tool: str) -> Optional[Callable]:
+        """The registry's batch interface for `tool`, or None."""
+        return getattr(self.registry, f"{tool}_batch", None)
+    
+    def submit(self, tool: str, input_obj: ToolInput) -> Future:
+        """Queue one call; returns a Future with (output, batch_size)."""
+        future = Future()
+        with self._lock:
+            pending = self._pending.setdefault(tool, [])
+            pending.append((input_obj, future))
+            opened, full = len(pending) == 1, len(pending) >= self.max_batch
+            if opened and not full:
+                timer = threading.Timer(self.window_ms / 1000, self._flush, args=(tool, pending))
+                timer.daemon = True
+                self._timers[tool] = timer
+                timer.start()
+        if full:
+            self._flush(tool, pending)
+        return future
+    
+    def _flush(self, tool: str, window: list):
+        with self._lock:
+            if self._pending.get(tool) is not window:
+                return  # Already flushed because the window filled up
+            del self._pending[tool]
+            timer = self._timers.pop(tool, None)
+        if timer is not None:
+            timer.cancel()  # No-op when the timer is what flushed the window
+        
+        # Drop calls whose caller gave up (timed out) before the flush
+        batch = [(input_obj, future) for input_obj, future in window
+                 if future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        
+        try:
+            outputs = self.batch_fn(tool)([input_obj for input_obj, _ in batch])
+            if len(outputs) != len(batch):
+                raise ValueError(f"{tool}_batch returned {len(outputs)} outputs for {len(batch)} inputs")
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        for (_, future), output in zip(batch, outputs):
+            future.set_result((output, len(batch)))
 
 class Executor:
     """Executes steps with timeouts, retries, verification."""
     
-    def __init__(self, registry: ToolRegistry, max_retries: int = 2, timeout_ms: float = 5000):
+    def __init__(self, registry: ToolRegistry, max_retries: int = 2, timeout_ms: float = 5000,
+                 batcher: Optional[StepBatcher] = None, fast: bool = False):
         self.registry = registry
         self.max_retries = max_retries
         self.timeout_ms = timeout_ms
+        self.batcher = batcher
+        # fast: trust planner-built inputs (model_construct) and emit LogRecords
+        self.fast = fast
+        self.log_cls = LogRecord if fast else ExecutionLog
+    
+    def _input(self, step: Step) -> ToolInput:
+        if self.fast:
+            return TOOL_INPUTS[step.tool].model_construct(**step.input)
+        return TOOL_INPUTS[step.tool](**step.input)
+    
+    def _log(self, step: Step, output: ToolOutput, duration: float, batch_size: int = 1) -> ExecutionLog:
+        # Verify acceptance criteria
+        verified, msg = self.verify(step, output)
+        
+        if self.fast:
+            # Tool outputs are flat models: a shallow copy of the fields is the dict
+            return LogRecord(step.step_id, step.tool, step.input, dict(output.__dict__),
+                             output.success, duration, verified, msg, batch_size)
+        
+        return ExecutionLog(
+            step_id=step.step_id,
+            tool=step.tool,
+            input=step.input,
+            output=output.dict(),
+            success=output.success,
+            duration_ms=duration,
+            verified=verified,
+            verification_msg=msg,
+            batch_size=batch_size
+        )
+    
+    def _batchable(self, step: Step) -> bool:
+        return self.batcher is not None and self.batcher.batch_fn(step.tool) is not None
+    
+    def execute_steps(self, steps: List[Step]) -> List[ExecutionLog]:
+        """
+        Execute a plan's steps in order, batching where possible.
+        
+        Consecutive steps for the same batchable tool are submitted to the
+        batcher together (and may share a call with other in-flight runs);
+        their outputs are split back into one ExecutionLog per step. A step
+        whose batch fails, or that times out before its batch is sent, is
+        retried on its own via execute_step; a step timing out while its
+        batch runs waits for that batch instead of executing twice.
+        
+        The members of a group run concurrently, so each is charged only the
+        wait since the previous member finished: their duration_ms values add
+        up to the group's wall time (what PolicyGate should see), not N times
+        the batch latency.
+        """
+        logs = []
+        i = 0
+        while i < len(steps):
+            step = steps[i]
+            if not self._batchable(step):
+                logs.append(self.execute_step(step))
+                i += 1
+                continue
+            
+            group = [step]
+            while i + len(group) < len(steps) and steps[i + len(group)].tool == step.tool:
+                group.append(steps[i + len(group)])
+            i += len(group)
+            
+            mark = time.time()
+            futures = []
+            for member in group:
+                try:
+                    input_obj = self._input(member)
+                except Exception:
+                    futures.append(None)  # Invalid input: let execute_step report it
+                    continue
+                futures.append(self.batcher.submit(member.tool, input_obj))
+            
+            for member, future in zip(group, futures):
+                try:
+                    if future is None:
+                        raise ValueError("invalid input")
+                    try:
+                        output, batch_size = future.result(timeout=self.timeout_ms / 1000)
+                    except FutureTimeout:
+                        if future.cancel():
+                            raise  # Left out of the batch: safe to run on its own
+                        # The batch already holds this call: wait for it rather
+                        # than running the step a second time
+                        output, batch_size = future.result()
+                except Exception:
+                    logs.append(self.execute_step(member))
+                    mark = time.time()  # execute_step logged its own duration
+                    continue
+                now = time.time()
+                logs.append(self._log(member, output, (now - mark) * 1000, batch_size))
+                mark = now
+        return logs
     
     def execute_step(self, step: Step) -> ExecutionLog:
         """Execute a single step with retries."""
@@ -164,37 +420,17 @@ class Executor:
             start = time.time()
             try:
                 # Route to tool
-                if step.tool == "search":
-                    input_obj = SearchInput(**step.input)
-                    output = self.registry.search(input_obj)
-                elif step.tool == "calc":
-                    input_obj = CalcInput(**step.input)
-                    output = self.registry.calc(input_obj)
-                elif step.tool == "write_note":
-                    input_obj = WriteNoteInput(**step.input)
-                    output = self.registry.write_note(input_obj)
-                else:
+                if step.tool not in TOOL_INPUTS:
                     raise ValueError(f"Unknown tool: {step.tool}")
+                input_obj = self._input(step)
+                output = getattr(self.registry, step.tool)(input_obj)
                 
                 duration = (time.time() - start) * 1000
-                
-                # Verify acceptance criteria
-                verified, msg = self.verify(step, output)
-                
-                return ExecutionLog(
-                    step_id=step.step_id,
-                    tool=step.tool,
-                    input=step.input,
-                    output=output.dict(),
-                    success=output.success,
-                    duration_ms=duration,
-                    verified=verified,
-                    verification_msg=msg
-                )
+                return self._log(step, output, duration)
             except Exception as e:
                 if attempt == self.max_retries:
                     duration = (time.time() - start) * 1000
-                    return ExecutionLog(
+                    return self.log_cls(
                         step_id=step.step_id,
                         tool=step.tool,
                         input=step.input,
@@ -206,7 +442,7 @@ class Executor:
                     )
                 time.sleep(0.5)  # Backoff
         
-    def verify(self, step: Step, output: ToolOutput) -> tuple[bool, str]:
+    def verify(self, step: Step, output: ToolOutput) -> Tuple[bool, str]:
         """Check acceptance criteria."""
         if not output.success:
             return False, "Tool execution failed"
@@ -238,7 +474,7 @@ class PolicyGate:
         self.max_cost_ms = max_cost_ms
         self.require_approval = require_approval
     
-    def check(self, plan: Plan, logs: List[ExecutionLog]) -> tuple[bool, str]:
+    def check(self, plan: Plan, logs: List[ExecutionLog]) -> Tuple[bool, str]:
         """Check if execution passes policy."""
         # Cost check
         total_ms = sum(log.duration_ms for log in logs)
@@ -261,47 +497,65 @@ class PolicyGate:
 # Main Orchestrator
 # ============================================================================
 
-def run_orchestrator(goal: str, max_cost_ms: float = 10000, require_approval: bool = False):
-    """Full orchestration: plan → execute → verify → approve."""
-    print("=" * 70)
-    print(f"GOAL: {goal}")
-    print("=" * 70)
+def run_orchestrator(goal: str, max_cost_ms: float = 10000, require_approval: bool = False,
+                     batcher: Optional[StepBatcher] = None, registry: Optional[ToolRegistry] = None,
+                     verbose: bool = True, executor=None, fast: bool = False):
+    """
+    Full orchestration: plan → execute → verify → approve.
+    
+    Pass a StepBatcher shared between concurrent runs to coalesce their
+    batchable tool calls, and/or a registry to swap the tool implementations
+    (e.g. simulated tools under load). An explicit executor (e.g. a
+    RemoteExecutor sending steps to worker processes) overrides both.
+    verbose=False silences the step log for use behind an API.
+    fast=True runs the plan and logs as __slots__ records without
+    re-validation; callers validate at their own boundary.
+    """
+    if verbose:
+        print("=" * 70)
+        print(f"GOAL: {goal}")
+        print("=" * 70)
     
     # 1. Plan
     planner = Planner()
-    plan = planner.plan(goal)
-    print(f"\n[PLANNER] Generated {len(plan.steps)} steps:")
-    for step in plan.steps:
-        print(f"  Step {step.step_id}: {step.tool}({step.input}) → {step.acceptance}")
+    plan = planner.plan_fast(goal) if fast else planner.plan(goal)
+    if verbose:
+        print(f"\n[PLANNER] Generated {len(plan.steps)} steps:")
+        for step in plan.steps:
+            print(f"  Step {step.step_id}: {step.tool}({step.input}) → {step.acceptance}")
     
     # 2. Execute
-    registry = ToolRegistry()
-    executor = Executor(registry, max_retries=2, timeout_ms=5000)
-    logs = []
-    print(f"\n[EXECUTOR] Running steps...")
-    for step in plan.steps:
-        log = executor.execute_step(step)
-        logs.append(log)
-        status = "✓" if log.verified else "✗"
-        print(f"  {status} Step {log.step_id}: {log.tool} → {log.duration_ms:.0f}ms → {log.verification_msg}")
+    if executor is None:
+        if registry is None:
+            registry = batcher.registry if batcher is not None else ToolRegistry()
+        executor = Executor(registry, max_retries=2, timeout_ms=5000, batcher=batcher, fast=fast)
+    if verbose:
+        print(f"\n[EXECUTOR] Running steps...")
+    logs = executor.execute_steps(plan.steps)
+    if verbose:
+        for log in logs:
+            status = "✓" if log.verified else "✗"
+            batched = f" (batch of {log.batch_size})" if log.batch_size > 1 else ""
+            print(f"  {status} Step {log.step_id}: {log.tool} → {log.duration_ms:.0f}ms{batched} → {log.verification_msg}")
     
     # 3. Policy gate
     gate = PolicyGate(max_cost_ms=max_cost_ms, require_approval=require_approval)
     passed, verdict = gate.check(plan, logs)
-    print(f"\n[POLICY GATE] {verdict}")
     
     # 4. Result
-    print("\n" + "=" * 70)
-    if passed:
-        print("✓ EXECUTION COMPLETE")
-    else:
-        print("✗ EXECUTION BLOCKED")
-    print("=" * 70)
+    if verbose:
+        print(f"\n[POLICY GATE] {verdict}")
+        print("\n" + "=" * 70)
+        if passed:
+            print("✓ EXECUTION COMPLETE")
+        else:
+            print("✗ EXECUTION BLOCKED")
+        print("=" * 70)
     
     return {
         "goal": goal,
-        "plan": plan.dict(),
-        "logs": [log.dict() for log in logs],
+        "plan": as_dict(plan),
+        "logs": [as_dict(log) for log in logs],
         "verdict": verdict,
         "passed": passed,
         "timestamp": datetime.utcnow().isoformat()
@@ -0,0 +1,87 @@
+"""
+rate_limit.py
+
+Thread-safe token bucket used to pace outbound requests and admit inbound ones.
+
+Dependencies:
+    standard library only
+
+Usage:
+    bucket = TokenBucket(rate=5, burst=10)   # 5 tokens/s, bursts of 10
+    bucket.acquire()                         # blocks until a token is free
+    if not bucket.try_acquire(): ...         # non-blocking variant
+"""
+
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Classic token bucket.
+
+    Parameters
+    ----------
+    rate : float
+        Tokens added per second (sustained request rate)
+    burst : float
+        Bucket capacity (maximum burst size)
+    clock : callable
+        Monotonic time source, overridable for deterministic tests
+    """
+
+    def __init__(self, rate, burst, clock=time.monotonic):
+        if rate <= 0 or burst <= 0:
+            raise ValueError("rate and burst must be positive")
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self._clock = clock
+        self._tokens = float(burst)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+            self._updated = now
+
+    def try_acquire(self, tokens=1.0):
+        """Take `tokens` if available right now; return whether it succeeded."""
+        with self._lock:
+            self._refill(self._clock())
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def wait_time(self, tokens=1.0):
+        """Seconds until `tokens` would be available (0 if available now)."""
+        with self._lock:
+            self._refill(self._clock())
+            deficit = tokens - self._tokens
+            return max(0.0, deficit / self.rate)
+
+    def acquire(self, tokens=1.0, timeout=None):
+        """
+        Block until `tokens` are available.
+
+        Returns
+        -------
+        bool
+            True once acquired, False if `timeout` seconds elapsed first
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                self._refill(self._clock())
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return True
+                wait = (tokens - self._tokens) / self.rate
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
@@ -0,0 +1,217 @@
+"""
+result_cache.py
+
+Per-worker, memory-bounded LRU + TTL cache with single-flight computation.
+
+Entries are keyed by any hashable (normalized request parameters, or the
+sub-results several requests share) and charged their approximate size in
+bytes; the least recently used entries are evicted once the total exceeds
+`max_bytes`, and entries older than `ttl_seconds` are recomputed. Concurrent
+misses on the same key run the computation once: the first caller computes,
+the others wait for its result (or its exception).
+
+A computation may return Expiring(value, expires_at) to end its entry sooner
+than the TTL, e.g. a result derived from other entries that must not outlive
+them; get_or_compute(..., with_expiry=True) hands out that deadline with the
+value so the caller can pass it on.
+
+Unlike signal_cache.py (one fixed JSON payload shared host-wide through
+shared memory) this holds arbitrary Python objects in one process, for
+parameterized results whose key space is open-ended.
+
+Dependencies:
+    standard library; numpy / pandas objects are sized when present
+
+Usage:
+    cache = ResultCache(max_bytes=256 * 2**20, ttl_seconds=300)
+    payload = cache.get_or_compute(("signal", "^NDX", "GC=F", 60), compute)
+"""
+
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, NamedTuple
+
+
+def memory_footprint(df):
+    """Bytes held by a DataFrame (columns plus index)."""
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+def sizeof(value):
+    """
+    Approximate memory held by a cached value, in bytes.
+
+    DataFrames / Series report their deep memory usage and arrays their
+    buffer size; containers are summed recursively.
+    """
+    memory_usage = getattr(value, "memory_usage", None)
+    if memory_usage is not None:
+        usage = memory_usage(deep=True)
+        return int(usage.sum()) if hasattr(usage, "sum") else int(usage)
+    nbytes = getattr(value, "nbytes", None)
+    if isinstance(nbytes, int):
+        return nbytes
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(sizeof(k) + sizeof(v) for k, v in value.items())
+    if isinstance(value, (list, tuple, set)):
+        return sys.getsizeof(value) + sum(sizeof(v) for v in value)
+    return sys.getsizeof(value)
+
+
+class Expiring(NamedTuple):
+    """A computed value with its own deadline (time.monotonic() seconds)."""
+    value: Any
+    expires_at: float
+
+
+class _Flight:
+    __slots__ = ("done", "value", "expires_at", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.expires_at = None
+        self.error = None
+
+
+class ResultCache:
+    """
+    Thread-safe LRU + TTL cache bounded by total entry size.
+
+    Parameters
+    ----------
+    max_bytes : int
+        Budget for all entries; least recently used entries are evicted
+        beyond it, and a single value larger than it is returned uncached
+    ttl_seconds : float
+        Lifetime of an entry
+    """
+
+    def __init__(self, max_bytes=256 * 2**20, ttl_seconds=300):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()   # key -> (value, size, expires_at)
+        self._flights = {}              # key -> _Flight for computations in progress
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.stats = {"hits": 0, "misses": 0, "shared": 0, "evictions": 0, "expired": 0}
+
+    def get(self, key):
+        """Cached value for `key`, or None when absent or expired."""
+        with self._lock:
+            entry = self._lookup(key, time.monotonic())
+        return None if entry is None else entry[0]
+
+    def _lookup(self, key, now):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[2] <= now:
+            self._remove(key)
+            self.stats["expired"] += 1
+            return None
+        self._entries.move_to_end(key)
+        self.stats["hits"] += 1
+        return entry
+
+    def put(self, key, value, ttl_seconds=None, expires_at=None):
+        """
+        Store `value`, evicting least recently used entries to fit it.
+
+        The entry expires after `ttl_seconds` (default: the cache TTL), or
+        at `expires_at` (time.monotonic() seconds) if that is sooner.
+
+        Returns
+        -------
+        float
+            The entry's expiry
+        """
+        deadline = time.monotonic() + (self.ttl_seconds if ttl_seconds is None else ttl_seconds)
+        if expires_at is not None:
+            deadline = min(deadline, expires_at)
+        size = sizeof(value)
+        if size > self.max_bytes:
+            return deadline
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size, deadline)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.stats["evictions"] += 1
+        return deadline
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self.bytes -= size
+
+    def get_or_compute(self, key, compute, ttl_seconds=None, with_expiry=False):
+        """
+        Return the cached value for `key`, computing it at most once at a
+        time across threads.
+
+        Parameters
+        ----------
+        key : hashable
+            Normalized cache key
+        compute : callable
+            Zero-argument function producing the value, or Expiring(value,
+            expires_at) to end the entry before its TTL
+        ttl_seconds : float or None
+            Lifetime override for this entry
+        with_expiry : bool
+            Return (value, expires_at) instead of the value
+
+        Raises
+        ------
+        Exception
+            Whatever `compute` raised (also re-raised in every waiting caller);
+            failures are not cached
+        """
+        with self._lock:
+            entry = self._lookup(key, time.monotonic())
+            if entry is not None:
+                return (entry[0], entry[2]) if with_expiry else entry[0]
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.stats["misses"] += 1
+            else:
+                self.stats["shared"] += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return (flight.value, flight.expires_at) if with_expiry else flight.value
+
+        try:
+            value = compute()
+            expires_at = None
+            if isinstance(value, Expiring):
+                value, expires_at = value
+            flight.value = value
+            flight.expires_at = self.put(key, value, ttl_seconds, expires_at)
+            return (flight.value, flight.expires_at) if with_expiry else flight.value
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def snapshot(self):
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self.bytes,
+                    "max_bytes": self.max_bytes, **self.stats}
@@ -0,0 +1,234 @@
+"""
+signal_aggregates.py
+
+Server-side aggregates of the gold vs. Nasdaq z-score for BI dashboards.
+
+Instead of loading the full signal CSV and binning it in Tableau / Power BI,
+dashboards fetch one small precomputed body:
+
+    regimes     day counts per regime (dashboard/README.md thresholds), all
+                history and the last 90 observations
+    bands       day counts per colour band (|z| <= 1, <= 1.5, > 1.5) and
+                the current streak in the latest band
+    histogram   z counts on fixed 0.25-wide bins over [-4, 4] plus under-
+                and overflow
+    series      z and beta_xau per chart range (90d, 1y, 5y, all),
+                downsampled with Largest-Triangle-Three-Buckets
+
+Counts are running totals persisted between refreshes and updated only with
+the bars after the last one seen, so a refresh costs O(new bars). Only
+completed bars are folded into the totals: the latest bar, still moving
+intraday, is added on the fly when the body is built.
+
+Dependencies:
+    numpy, pandas
+
+Usage:
+    aggregates = SignalAggregates.load("gold-nq")
+    aggregates.update(signal_df)
+    aggregates.save()
+    body = aggregates.payload(signal_df)
+"""
+
+import json
+import os
+import tempfile
+from collections import deque
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from signal_history import history_dir
+
+# dashboard/README.md "Signal Regime": z > 1.5 strong risk-on, > 1 moderate
+# risk-on, > -1 normal, > -1.5 moderate risk-off, else strong risk-off
+REGIMES = ["strong_risk_off", "moderate_risk_off", "normal", "moderate_risk_on", "strong_risk_on"]
+REGIME_EDGES = np.array([-1.5, -1.0, 1.0, 1.5])
+
+# "Signal Color": |z| > 1.5 red, > 1 yellow, else green
+BANDS = ["green", "yellow", "red"]
+BAND_EDGES = np.array([1.0, 1.5])
+
+HIST_EDGES = np.linspace(-4.0, 4.0, 33)
+RECENT = 90
+
+RANGES = {"90d": pd.DateOffset(days=90), "1y": pd.DateOffset(years=1),
+          "5y": pd.DateOffset(years=5), "all": None}
+
+
+def lttb(x, y, threshold):
+    """
+    Largest-Triangle-Three-Buckets downsampling.
+
+    Keeps the first and last points and, from each of `threshold - 2` equal
+    buckets in between, the point forming the largest triangle with the
+    previously kept point and the next bucket's mean.
+
+    Parameters
+    ----------
+    x, y : np.ndarray
+        float64 coordinates, x increasing
+    threshold : int
+        Points to keep
+
+    Returns
+    -------
+    np.ndarray
+        Indices of the kept points
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    kept = np.empty(threshold, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # Mean of the next bucket (the last point for the final bucket)
+        nlo, nhi = hi, edges[i + 2] if i + 2 < len(edges) else n
+        mx, my = x[nlo:nhi].mean(), y[nlo:nhi].mean()
+        area = np.abs((x[a] - mx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (my - y[a]))
+        a = lo + int(np.argmax(area))
+        kept[i + 1] = a
+    return kept
+
+
+class SignalAggregates:
+    """
+    Running regime, band and histogram counts for a z-score series.
+
+    Parameters
+    ----------
+    name : str
+        Signal name (state file is {name}.aggregates.json in the history dir)
+    directory : Path or None
+        Override for the state directory
+    """
+
+    def __init__(self, name="gold-nq", directory=None):
+        directory = Path(directory) if directory is not None else history_dir()
+        self.name = name
+        self.path = directory / f"{name}.aggregates.json"
+        self.last_date = None
+        self.count = 0
+        self.regimes = np.zeros(len(REGIMES), dtype=np.int64)
+        self.bands = np.zeros(len(BANDS), dtype=np.int64)
+        self.histogram = np.zeros(len(HIST_EDGES) + 1, dtype=np.int64)
+        self.recent = deque(maxlen=RECENT)
+        self.streak = (None, 0)
+
+    @classmethod
+    def load(cls, name="gold-nq", directory=None):
+        """Restore persisted counts, or empty ones if none exist."""
+        aggregates = cls(name, directory)
+        try:
+            with open(aggregates.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return aggregates
+        aggregates.last_date = data["last_date"]
+        aggregates.count = data["count"]
+        aggregates.regimes = np.array(data["regimes"], dtype=np.int64)
+        aggregates.bands = np.array(data["bands"], dtype=np.int64)
+        aggregates.histogram = np.array(data["histogram"], dtype=np.int64)
+        aggregates.recent.extend(data["recent"])
+        aggregates.streak = tuple(data["streak"])
+        return aggregates
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = {"last_date": self.last_date, "count": self.count, "regimes": self.regimes.tolist(),
+                "bands": self.bands.tolist(), "histogram": self.histogram.tolist(),
+                "recent": list(self.recent), "streak": list(self.streak)}
+        fd, tmp = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp, self.path)
+
+    @staticmethod
+    def _classify(z):
+        return (np.searchsorted(REGIME_EDGES, z, side="left"),
+                np.searchsorted(BAND_EDGES, np.abs(z), side="left"),
+                np.searchsorted(HIST_EDGES, z, side="right"))
+
+    def _fold(self, z):
+        """Add z values to the running counts (vectorized)."""
+        regime, band, bin_ = self._classify(z)
+        self.count += len(z)
+        self.regimes += np.bincount(regime, minlength=len(REGIMES))
+        self.bands += np.bincount(band, minlength=len(BANDS))
+        self.histogram += np.bincount(bin_, minlength=len(self.histogram))
+        self.recent.extend(regime[-RECENT:].tolist())
+        # Streak: same band as the previous run continues it
+        current, length = self.streak
+        changes = np.flatnonzero(band != band[-1])
+        run = len(band) - (changes[-1] + 1 if len(changes) else 0)
+        if len(changes) == 0 and current == int(band[-1]):
+            run += length
+        self.streak = (int(band[-1]), int(run))
+
+    def update(self, signal_df):
+        """
+        Fold in the completed bars of `signal_df` dated after the last update.
+
+        Returns
+        -------
+        int
+            Bars added
+        """
+        completed = signal_df["z"].iloc[:-1].dropna()
+        if self.last_date is not None:
+            completed = completed[completed.index > pd.Timestamp(self.last_date)]
+        if completed.empty:
+            return 0
+        self._fold(completed.to_numpy(dtype=np.float64))
+        self.last_date = completed.index[-1].strftime("%Y-%m-%d")
+        return len(completed)
+
+    def payload(self, signal_df, points=300):
+        """
+        Dashboard body: counts including the latest (provisional) bar, plus
+        LTTB series of at most `points` per range.
+        """
+        totals = SignalAggregates.__new__(SignalAggregates)
+        totals.count, totals.streak = self.count, self.streak
+        totals.regimes, totals.bands = self.regimes.copy(), self.bands.copy()
+        totals.histogram, totals.recent = self.histogram.copy(), deque(self.recent, maxlen=RECENT)
+        latest = signal_df["z"].iloc[-1:]
+        if self.last_date is None or latest.index[-1] > pd.Timestamp(self.last_date):
+            totals._fold(latest.to_numpy(dtype=np.float64))
+
+        recent = np.bincount(np.array(totals.recent, dtype=np.int64), minlength=len(REGIMES))
+        share = totals.count or 1
+        return {
+            "as_of": signal_df.index[-1].strftime("%Y-%m-%d"),
+            "observations": totals.count,
+            "regimes": {name: {"count": int(c), "share": round(c / share, 4)}
+                        for name, c in zip(REGIMES, totals.regimes)},
+            "regimes_recent": {"observations": len(totals.recent),
+                               **{name: int(c) for name, c in zip(REGIMES, recent)}},
+            "bands": {name: int(c) for name, c in zip(BANDS, totals.bands)},
+            "current_band": {"band": BANDS[totals.streak[0]], "days": totals.streak[1]},
+            "histogram": {"edges": HIST_EDGES.tolist(), "counts": totals.histogram[1:-1].tolist(),
+                          "underflow": int(totals.histogram[0]), "overflow": int(totals.histogram[-1])},
+            "series": series_ranges(signal_df, points),
+        }
+
+
+def series_ranges(signal_df, points=300, columns=("z", "beta_xau")):
+    """LTTB-downsampled {range: {column: {"date": [...], "value": [...]}}}."""
+    end = signal_df.index[-1]
+    out = {}
+    for label, span in RANGES.items():
+        frame = signal_df if span is None else signal_df[signal_df.index > end - span]
+        x = frame.index.values.astype("datetime64[s]").astype(np.float64)
+        out[label] = {}
+        for column in columns:
+            y = frame[column].to_numpy(dtype=np.float64)
+            kept = lttb(x, y, points)
+            out[label][column] = {"date": frame.index[kept].strftime("%Y-%m-%d").tolist(),
+                                  "value": np.round(y[kept], 4).tolist()}
+    return out
@@ -0,0 +1,383 @@
+"""
+signal_alerts.py
+
+Threshold-crossing alerts evaluated after each signal refresh.
+
+Subscribers register rules such as "gold-nq z crosses above 1.5", "gold-nq
+beta_xau changes sign" or "concordance score drops below 0.3". Rules are indexed
+by (signal, field) with their levels kept sorted, so a refresh only looks at the
+levels between the previous and the new value: O(log n + fired) per field,
+independent of how many subscribers exist.
+
+Fired alerts are grouped per webhook URL and POSTed in batches by an async
+dispatcher with retries and jittered backoff.
+
+Dependencies:
+    httpx
+
+Usage:
+    store = RuleStore()                      # persisted under data/alerts/
+    store.add(AlertRule(signal="gold-nq", field="z", condition="cross_above",
+                        level=1.5, webhook_url="http://localhost:9000/hook"))
+    engine = AlertEngine(store)
+    engine.on_refresh(state)                 # state from signal_service.refresh_all
+"""
+
+import asyncio
+import bisect
+import json
+import os
+import random
+import tempfile
+import threading
+import uuid
+from collections import defaultdict
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List
+
+try:
+    import fcntl
+except ImportError:  # Windows: writes are serialized per process only
+    fcntl = None
+
+CONDITIONS = ("cross_above", "cross_below", "cross", "sign_change")
+
+
+@dataclass
+class AlertRule:
+    """
+    One subscriber rule.
+
+    condition is one of:
+        cross_above  previous < level <= current
+        cross_below  previous >= level > current
+        cross        either of the above
+        sign_change  cross at level 0 (level is ignored)
+    """
+    signal: str
+    field: str
+    condition: str
+    webhook_url: str
+    level: float = 0.0
+    rule_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+
+    def __post_init__(self):
+        if self.condition not in CONDITIONS:
+            raise ValueError(f"Unknown condition '{self.condition}', expected one of {CONDITIONS}")
+        if self.condition == "sign_change":
+            self.level = 0.0
+
+
+class RuleIndex:
+    """
+    Rules indexed by (signal, field) -> sorted levels -> direction -> rules.
+
+    Upward moves only visit levels in (previous, current], downward moves
+    levels in (current, previous], found by bisection.
+    """
+
+    def __init__(self, rules=()):
+        self._levels: Dict[tuple, List[float]] = defaultdict(list)
+        self._rules: Dict[tuple, Dict[float, Dict[str, List[AlertRule]]]] = defaultdict(dict)
+        for rule in rules:
+            self.add(rule)
+
+    def add(self, rule: AlertRule):
+        key = (rule.signal, rule.field)
+        by_level = self._rules[key]
+        if rule.level not in by_level:
+            bisect.insort(self._levels[key], rule.level)
+            by_level[rule.level] = {"up": [], "down": []}
+        if rule.condition in ("cross_above", "cross", "sign_change"):
+            by_level[rule.level]["up"].append(rule)
+        if rule.condition in ("cross_below", "cross", "sign_change"):
+            by_level[rule.level]["down"].append(rule)
+
+    def keys(self):
+        return list(self._rules.keys())
+
+    def crossed(self, signal, field, previous, current):
+        """
+        Rules fired by a move of `field` from `previous` to `current`.
+
+        Returns
+        -------
+        list of (AlertRule, direction)
+        """
+        key = (signal, field)
+        levels = self._levels.get(key)
+        if not levels or previous is None or current is None or previous == current:
+            return []
+
+        if current > previous:
+            direction = "up"
+            # previous < level <= current
+            lo = bisect.bisect_right(levels, previous)
+            hi = bisect.bisect_right(levels, current)
+        else:
+            direction = "down"
+            # current < level <= previous
+            lo = bisect.bisect_right(levels, current)
+            hi = bisect.bisect_right(levels, previous)
+
+        by_level = self._rules[key]
+        return [(rule, direction) for level in levels[lo:hi] for rule in by_level[level][direction]]
+
+
+class RuleStore:
+    """
+    Subscriber rules persisted as JSON so every worker sees the same set.
+
+    The elected refresh writer reloads the file when it changed on disk.
+    Writers hold an flock on a sidecar lock file across load, modify and save
+    (as signal_cache.py does), so concurrent adds from different workers
+    never drop each other's rules.
+    """
+
+    def __init__(self, directory=None):
+        directory = Path(directory or os.environ.get("SIGNAL_ALERTS_DIR", "./data/alerts"))
+        self.path = directory / "rules.json"
+        self.lock_path = directory / "rules.lock"
+        self._lock = threading.Lock()
+        self._lock_fd = None
+        self._mtime = None
+        self._rules: Dict[str, AlertRule] = {}
+        self._index = RuleIndex()
+
+    def _acquire(self):
+        """Take the host-wide writer lock; the caller already holds self._lock."""
+        if fcntl is None:
+            return
+        if self._lock_fd is None:
+            self.lock_path.parent.mkdir(parents=True, exist_ok=True)
+            self._lock_fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+
+    def _release(self):
+        if fcntl is not None:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+    def _load(self):
+        try:
+            st = self.path.stat()
+            # os.replace gives every save a new inode, so this catches writes
+            # landing within the filesystem's mtime granularity too
+            mtime = (st.st_mtime_ns, st.st_ino)
+        except FileNotFoundError:
+            mtime = None
+        if mtime == self._mtime:
+            return
+        rules = {}
+        if mtime is not None:
+            with open(self.path, "r", encoding="utf-8") as f:
+                rules = {r["rule_id"]: AlertRule(**r) for r in json.load(f)}
+        self._rules, self._index, self._mtime = rules, RuleIndex(rules.values()), mtime
+
+    def _save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump([asdict(r) for r in self._rules.values()], f)
+        os.replace(tmp, self.path)
+        st = self.path.stat()
+        self._mtime = (st.st_mtime_ns, st.st_ino)
+
+    def add(self, rule: AlertRule):
+        return self.add_many([rule])[0]
+
+    def add_many(self, rules):
+        """Add several rules with a single write of the rules file."""
+        with self._lock:
+            self._acquire()
+            try:
+                self._load()
+                for rule in rules:
+                    self._rules[rule.rule_id] = rule
+                    self._index.add(rule)
+                self._save()
+            finally:
+                self._release()
+        return rules
+
+    def remove(self, rule_id):
+        with self._lock:
+            self._acquire()
+            try:
+                self._load()
+                if self._rules.pop(rule_id, None) is None:
+                    return False
+                self._index = RuleIndex(self._rules.values())
+                self._save()
+                return True
+            finally:
+                self._release()
+
+    def rules(self):
+        with self._lock:
+            self._load()
+            return list(self._rules.values())
+
+    def index(self):
+        with self._lock:
+            self._load()
+            return self._index
+
+
+class WebhookDispatcher:
+    """
+    Batched async webhook delivery.
+
+    Events are grouped per URL and sent as {"events": [...]} in batches of at
+    most `max_batch`. Failed batches (transport error, 429, 5xx) are retried
+    with full-jitter exponential backoff; other 4xx responses are dropped.
+    """
+
+    def __init__(self, max_batch=100, max_retries=3, backoff_base=0.5, backoff_cap=10.0,
+                 concurrency=20, timeout=5.0, transport=None):
+        self.max_batch = max_batch
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.transport = transport
+
+    async def _send(self, client, semaphore, url, batch):
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with semaphore:
+                    resp = await client.post(url, json={"events": batch})
+                if resp.status_code < 300:
+                    return True
+                if resp.status_code != 429 and resp.status_code < 500:
+                    return False
+            except Exception:
+                pass
+            if attempt < self.max_retries:
+                ceiling = min(self.backoff_cap, self.backoff_base * (2 ** attempt))
+                await asyncio.sleep(random.uniform(0, ceiling))
+        return False
+
+    async def dispatch(self, events):
+        """
+        Deliver `events` (dicts with a "webhook_url" key).
+
+        Returns
+        -------
+        dict
+            {"delivered": n_events, "failed": n_events, "batches": n_batches}
+        """
+        import httpx
+
+        by_url = defaultdict(list)
+        for event in events:
+            by_url[event["webhook_url"]].append(event)
+
+        jobs = []
+        for url, url_events in by_url.items():
+            for i in range(0, len(url_events), self.max_batch):
+                jobs.append((url, url_events[i:i + self.max_batch]))
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        limits = httpx.Limits(max_connections=self.concurrency)
+        async with httpx.AsyncClient(timeout=self.timeout, limits=limits, transport=self.transport) as client:
+            results = await asyncio.gather(*(self._send(client, semaphore, url, batch) for url, batch in jobs))
+
+        delivered = sum(len(batch) for (_, batch), ok in zip(jobs, results) if ok)
+        return {"delivered": delivered, "failed": len(events) - delivered, "batches": len(jobs)}
+
+
+class AlertEngine:
+    """
+    Evaluates rules after each refresh and dispatches fired alerts.
+
+    The previous value of every watched field is persisted next to the
+    rules, so a restart or a different elected writer does not re-fire or
+    miss crossings.
+    """
+
+    def __init__(self, store: RuleStore, dispatcher: WebhookDispatcher = None):
+        self.store = store
+        self.dispatcher = dispatcher or WebhookDispatcher()
+        self.state_path = store.path.parent / "last_values.json"
+
+    def _load_previous(self):
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_previous(self, values):
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.state_path.parent, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(values, f)
+        os.replace(tmp, self.state_path)
+
+    def evaluate(self, signals, previous):
+        """
+        Compare new signal payloads against previous values.
+
+        Parameters
+        ----------
+        signals : dict
+            {signal_name: payload} from the latest refresh
+        previous : dict
+            {"signal/field": value} from the last evaluation
+
+        Returns
+        -------
+        (list of event dicts, dict of new "signal/field" values)
+        """
+        index = self.store.index()
+        events, current = [], dict(previous)
+        for signal, field_name in index.keys():
+            payload = signals.get(signal)
+            if payload is None or field_name not in payload:
+                continue
+            key = f"{signal}/{field_name}"
+            try:
+                value = float(payload[field_name])
+            except (TypeError, ValueError):
+                continue  # Not numeric (e.g. a rule stored before validation): skip only its rules
+            for rule, direction in index.crossed(signal, field_name, previous.get(key), value):
+                events.append({
+                    "rule_id": rule.rule_id,
+                    "webhook_url": rule.webhook_url,
+                    "signal": signal,
+                    "field": field_name,
+                    "condition": rule.condition,
+                    "level": rule.level,
+                    "direction": direction,
+                    "previous": previous.get(key),
+                    "value": value,
+                    "date": payload.get("date"),
+                })
+            current[key] = value
+        return events, current
+
+    def on_refresh(self, state, wait=False):
+        """
+        Evaluate alerts for a refresh result and deliver any that fired.
+
+        Evaluation is synchronous and cheap; delivery (which may retry for
+        several seconds) runs on its own thread and event loop unless
+        `wait` is True.
+
+        Returns
+        -------
+        list of dict
+            Fired events
+        """
+        previous = self._load_previous()
+        events, current = self.evaluate(state.get("signals", {}), previous)
+        self._save_previous(current)
+        if events:
+            deliver = lambda: print(f"Alerts: {asyncio.run(self.dispatcher.dispatch(events))}")
+            if wait:
+                deliver()
+            else:
+                threading.Thread(target=deliver, name="alert-dispatch", daemon=True).start()
+        return events
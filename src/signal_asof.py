@@ -0,0 +1,270 @@
+"""
+signal_asof.py
+
+Point-in-time ("as of") signal values, as they would have been published on
+a past date, without lookahead.
+
+The refresh writer records each signal's aligned input prices in an
+append-only table (HistoryStore "{name}.inputs") the first time it sees them,
+and every `every` stored rows it writes a checkpoint of the model state at
+that date. A query for date D loads the latest checkpoint at or before D and
+replays only the stored rows after it, so the history after D is never read
+and the history before the checkpoint is not recomputed.
+
+A row enters the inputs table only once a later date exists, so an intraday
+close that is still moving is never frozen into the record. Dates after the
+last stored row have no as-of value yet.
+
+Models:
+    GoldNqModel        state is the trailing 2 * window - 1 returns (all that
+                       the value at the checkpoint date itself depends on); the
+                       value at D is the closed-form rolling OLS over that
+                       buffer plus the replayed returns
+    ConcordanceModel   state is the logit coefficients fitted on the history
+                       up to the checkpoint (warm-started from the previous
+                       checkpoint's) and the trailing `window` indicators I;
+                       D's score S is the replayed indicators' rolling mean
+                       and P(I=1) applies the checkpoint's coefficients to D's
+                       inputs, so no query refits the logit
+
+A stored date's as-of value can never change, so answered queries are kept in
+a memory-bounded per-worker cache keyed by date; repeated queries (a chart
+stepping through dates) cost a lookup.
+
+Dependencies:
+    numpy, pandas (statsmodels for the concordance logit)
+
+Usage:
+    asof = AsOfSignal("gold-nq", GoldNqModel(window=90))
+    asof.record(frame)            # refresh writer, after computing the signal
+    asof.query("2024-03-15")      # payload as published on that date
+"""
+
+import bisect
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+from result_cache import ResultCache
+from signal_history import HistoryStore, history_dir
+
+# Per-worker cache of answered as-of queries (payloads are a few hundred bytes)
+QUERY_CACHE_BYTES = 16 * 2**20
+QUERY_CACHE_TTL = 24 * 3600
+
+
+class CheckpointStore:
+    """
+    One JSON file per checkpoint date under {history_dir}/{name}.checkpoints/.
+
+    The sorted date list is cached until the directory changes, so finding
+    the checkpoint for a query is a bisect plus a single file read.
+    """
+
+    def __init__(self, name, directory=None):
+        directory = Path(directory) if directory is not None else history_dir()
+        self.path = directory / f"{name}.checkpoints"
+        self._lock = threading.Lock()
+        self._stamp = None
+        self._dates = []
+
+    def dates(self):
+        try:
+            stamp = self.path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return []
+        with self._lock:
+            if stamp != self._stamp:
+                self._dates = sorted(p.stem for p in self.path.glob("*.json"))
+                self._stamp = stamp
+            return self._dates
+
+    def latest(self, date):
+        """(date, state) of the last checkpoint at or before `date`, or (None, None)."""
+        dates = self.dates()
+        i = bisect.bisect_right(dates, date)
+        if i == 0:
+            return None, None
+        with open(self.path / f"{dates[i - 1]}.json", "r", encoding="utf-8") as f:
+            return dates[i - 1], json.load(f)
+
+    def write(self, date, state):
+        self.path.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp, self.path / f"{date}.json")
+
+
+class GoldNqModel:
+    """Rolling Nasdaq-on-gold OLS; checkpoint state is the trailing return buffer."""
+
+    def __init__(self, window=90):
+        self.window = window
+
+    def checkpoint(self, frame, previous=None):
+        returns = np.diff(np.log(frame.to_numpy(dtype=np.float64)), axis=0)
+        buffer = returns[-(2 * self.window - 1):]
+        return {"y": buffer[:, 0].tolist(), "x": buffer[:, 1].tolist()}
+
+    def evaluate(self, table, start, end, state):
+        """Payload for row `end` from the checkpoint at row `start` (-1: none)."""
+        import gold_vs_nasdaq as gnq
+
+        prices = table.iloc[max(start, 0):end + 1].to_numpy(dtype=np.float64)
+        returns = np.diff(np.log(prices), axis=0)
+        y, x = returns[:, 0], returns[:, 1]
+        if state is not None:
+            y = np.concatenate([state["y"], y])
+            x = np.concatenate([state["x"], x])
+
+        need = 2 * self.window - 1
+        if len(y) < need:
+            raise LookupError(f"Insufficient history before {table.index[end].date()}")
+        arrays = gnq.rolling_signal_arrays(y[-need:], x[-need:], self.window)
+        signal = pd.DataFrame({k: v[-1:] for k, v in arrays.items()}, index=table.index[end:end + 1])
+        return gnq.latest_payload(signal, window=self.window)
+
+
+class ConcordanceModel:
+    """Concordance score and logit; checkpoint state is the fitted coefficients."""
+
+    def __init__(self, window=90):
+        self.window = window
+
+    def _fit(self, frame, params):
+        import concordance_signal as cs
+
+        signal = cs.compute_concordance(frame, window=self.window)
+        if signal.empty:
+            raise LookupError(f"Insufficient history before {frame.index[-1].date()}")
+
+        # The likelihood is concave, so a warm start reaches the same optimum;
+        # fall back to a cold start if Newton diverges from a poor one (fits
+        # on very short early histories can be nearly separated)
+        error = None
+        for start in ([params, None] if params is not None else [None]):
+            try:
+                return signal, cs.fit_logit(signal, start_params=start)
+            except np.linalg.LinAlgError as e:
+                error = e
+        raise LookupError(f"Logit fit failed as of {frame.index[-1].date()}: {error}")
+
+    def checkpoint(self, frame, previous=None):
+        import concordance_signal as cs
+
+        _, model = self._fit(frame, previous and previous["params"])
+        # window=1 keeps every return row, so I is the indicator series the
+        # rolling score is built from; the last `window` of them are all that
+        # S at a later date needs from before the checkpoint
+        recent = cs.compute_concordance(frame.iloc[-(self.window + 1):], window=1)
+        return {"params": model.params.tolist(), "I": recent["I"].tolist(),
+                "S": float(np.mean(recent["I"]))}
+
+    def evaluate(self, table, start, end, state):
+        """Payload for row `end` from the checkpoint at row `start` (-1: none)."""
+        import concordance_signal as cs
+
+        if state is None:
+            # Before the first checkpoint: fit on the (short) prefix itself
+            state, start = self.checkpoint(table.iloc[:end + 1]), end
+
+        # Replay from the checkpoint row: returns for rows start..end, the
+        # first of which repeats the last stored indicator
+        replay = cs.compute_concordance(table.iloc[start - 1:end + 1], window=1)
+        indicators = np.concatenate([state["I"][:-1], replay["I"].to_numpy()])
+        signal = replay.tail(1).assign(S=float(np.mean(indicators[-self.window:])))
+
+        # latest_payload only reads the coefficients
+        params = pd.Series(state["params"], index=["const"] + cs.LOGIT_INPUTS)
+        return cs.latest_payload(signal, SimpleNamespace(params=params))
+
+
+class AsOfSignal:
+    """
+    Input record, checkpoints and as-of queries for one signal.
+
+    Parameters
+    ----------
+    name : str
+        Signal name (files are {name}.inputs.csv and {name}.checkpoints/)
+    model : GoldNqModel or ConcordanceModel
+        checkpoint(frame, previous) -> state, evaluate(table, start, end, state) -> payload
+    every : int
+        Stored rows between checkpoints (bounds the replay length)
+    directory : Path or None
+        Override for the history directory
+    cache : ResultCache or None
+        Cache for answered queries (default: QUERY_CACHE_BYTES per signal)
+    """
+
+    def __init__(self, name, model, every=21, directory=None, cache=None):
+        self.name = name
+        self.model = model
+        self.every = every
+        self.inputs = HistoryStore(f"{name}.inputs", directory, float_format="%.17g")
+        self.checkpoints = CheckpointStore(name, directory)
+        self.cache = cache if cache is not None else ResultCache(QUERY_CACHE_BYTES, QUERY_CACHE_TTL)
+
+    def record(self, frame):
+        """
+        Store the completed rows of a signal's input frame and checkpoint them.
+
+        Returns
+        -------
+        int
+            Number of rows appended
+        """
+        before = len(self.inputs.load())
+        appended = self.inputs.append(frame.iloc[:-1])
+        if appended:
+            table = self.inputs.load()
+            state = None
+            # Positions are stable (append-only), so checkpoint dates never move
+            for pos in range(self.every - 1, len(table), self.every):
+                if pos < before:
+                    continue
+                try:
+                    state = self.model.checkpoint(table.iloc[:pos + 1], state)
+                except LookupError:
+                    continue
+                self.checkpoints.write(table.index[pos].strftime("%Y-%m-%d"), state)
+        return appended
+
+    def query(self, as_of):
+        """
+        Payload as published for `as_of` (the last stored date on or before it).
+
+        Raises
+        ------
+        ValueError
+            `as_of` is not a date
+        LookupError
+            No stored data on or before `as_of`, or `as_of` is after the last
+            completed date
+        """
+        date = pd.Timestamp(as_of)
+        table = self.inputs.load()
+        if table.empty or date < table.index[0]:
+            raise LookupError(f"No {self.name} data on or before {date.date()}")
+        if date > table.index[-1]:
+            raise LookupError(f"{self.name} is recorded through {table.index[-1].date()}; "
+                              f"{date.date()} is not final yet")
+
+        end = table.index.searchsorted(date, "right") - 1
+        day = table.index[end].strftime("%Y-%m-%d")
+
+        def evaluate():
+            label, state = self.checkpoints.latest(day)
+            start = table.index.searchsorted(pd.Timestamp(label)) if label else -1
+            return self.model.evaluate(table, start, end, state)
+
+        # Keyed by the stored date the query resolves to, so weekends and
+        # holidays share their previous session's entry
+        return self.cache.get_or_compute(day, evaluate)
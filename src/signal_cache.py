@@ -0,0 +1,272 @@
+"""
+signal_cache.py
+
+Cross-process signal cache shared by every uvicorn worker on a host.
+
+Each cache is a fixed-size mmap file (in /dev/shm when available) guarded by a
+seqlock, so reads never take a lock: a reader copies the payload and retries if
+the sequence counter moved underneath it. Refreshes are serialized by a file
+lock; the worker that wins the lock is the elected writer and recomputes the
+signal, everyone else keeps serving the previous value until it lands.
+
+Dependencies:
+    standard library only (fcntl on POSIX; falls back to a per-process lock)
+
+Usage:
+    cache = SharedSignalCache("gold-nq", ttl_seconds=300)
+    data = cache.get_or_compute(compute_fn)
+"""
+
+import json
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows: election degrades to one writer per process
+    fcntl = None
+
+# Header layout: sequence counter, write timestamp (epoch seconds), payload length
+_HEADER = struct.Struct("<QdI")
+_DEFAULT_CAPACITY = 1 << 20  # 1 MiB per signal is plenty for JSON payloads
+_READ_RETRIES = 100
+
+
+def default_cache_dir():
+    """Directory for cache files: $SIGNAL_CACHE_DIR, /dev/shm, or the temp dir."""
+    env_dir = os.environ.get("SIGNAL_CACHE_DIR")
+    if env_dir:
+        return Path(env_dir)
+    shm = Path("/dev/shm")
+    if shm.is_dir() and os.access(shm, os.W_OK):
+        return shm
+    return Path(tempfile.gettempdir())
+
+
+class SharedSignalCache:
+    """
+    Host-wide cache for one computed signal.
+
+    Parameters
+    ----------
+    name : str
+        Cache name, used for the backing file (e.g. "gold-nq")
+    ttl_seconds : float
+        Age after which the cached value is considered stale
+    capacity : int
+        Maximum serialized payload size in bytes
+    directory : Path or None
+        Where to place the backing files (defaults to default_cache_dir())
+    """
+
+    def __init__(self, name, ttl_seconds=300, capacity=_DEFAULT_CAPACITY, directory=None):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.capacity = capacity
+
+        directory = Path(directory) if directory is not None else default_cache_dir()
+        directory.mkdir(parents=True, exist_ok=True)
+        self.path = directory / f"rg-signal-{name}.cache"
+        self.lock_path = directory / f"rg-signal-{name}.lock"
+
+        size = _HEADER.size + capacity
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            # Only ever grow the file: shrinking could truncate a live payload
+            if os.fstat(fd).st_size < size:
+                os.ftruncate(fd, size)
+            self._mm = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+
+        self._lock_fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        # flock is per open file, so threads in this process also need a mutex
+        self._thread_lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Lock-free read path
+    # ------------------------------------------------------------------
+
+    def read(self):
+        """
+        Read the cached value without taking any lock.
+
+        Returns
+        -------
+        tuple of (dict, float) or None
+            Cached data and the epoch time it was written, or None if empty
+        """
+        mm = self._mm
+        for _ in range(_READ_RETRIES):
+            seq, written_at, length = _HEADER.unpack_from(mm, 0)
+            if seq & 1:
+                # Writer is mid-update
+                time.sleep(0)
+                continue
+            payload = mm[_HEADER.size:_HEADER.size + length]
+            if _HEADER.unpack_from(mm, 0)[0] != seq:
+                continue
+            if seq == 0 or length == 0:
+                return None
+            return json.loads(payload), written_at
+        return None
+
+    def peek(self):
+        """
+        Lock-free header read: (sequence, written_at) without the payload.
+
+        The sequence changes on every write, so callers can memoize anything
+        derived from the payload and only re-read when it moves.
+        """
+        for _ in range(_READ_RETRIES):
+            seq, written_at, _length = _HEADER.unpack_from(self._mm, 0)
+            if not seq & 1:
+                return seq, written_at
+            time.sleep(0)
+        return seq, written_at
+
+    def is_fresh(self, written_at):
+        """Whether an entry written at `written_at` is still inside the TTL."""
+        return (time.time() - written_at) < self.ttl_seconds
+
+    # ------------------------------------------------------------------
+    # Elected writer
+    # ------------------------------------------------------------------
+
+    def write(self, data, written_at=None):
+        """
+        Publish a new value. Callers must hold the writer lock.
+
+        Parameters
+        ----------
+        data : dict
+            JSON-serializable signal payload
+        written_at : float or None
+            Epoch time to record for the entry (defaults to now)
+        """
+        payload = json.dumps(data, separators=(",", ":")).encode("utf-8")
+        if len(payload) > self.capacity:
+            raise ValueError(
+                f"Payload for '{self.name}' is {len(payload)} bytes, capacity is {self.capacity}"
+            )
+
+        mm = self._mm
+        seq = _HEADER.unpack_from(mm, 0)[0]
+        # Odd sequence marks the write in progress for readers
+        _HEADER.pack_into(mm, 0, seq + 1, 0.0, 0)
+        mm[_HEADER.size:_HEADER.size + len(payload)] = payload
+        written_at = time.time() if written_at is None else written_at
+        _HEADER.pack_into(mm, 0, seq + 2, written_at, len(payload))
+
+    def _acquire(self, blocking):
+        if not self._thread_lock.acquire(blocking=blocking):
+            return False
+        if fcntl is None:
+            return True
+        flags = fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB
+        try:
+            fcntl.flock(self._lock_fd, flags)
+        except BlockingIOError:
+            self._thread_lock.release()
+            return False
+        return True
+
+    def _release(self):
+        if fcntl is not None:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+        self._thread_lock.release()
+
+    def seed(self, data, written_at):
+        """
+        Publish `data` only if the cache is empty (e.g. from a startup snapshot).
+
+        Returns
+        -------
+        bool
+            True if this call populated the cache
+        """
+        if not self._acquire(blocking=False):
+            return False
+        try:
+            if self.read() is not None:
+                return False
+            self.write(data, written_at=written_at)
+            return True
+        finally:
+            self._release()
+
+    def _refresh_in_background(self, compute):
+        """Recompute on a daemon thread; the caller already holds the writer lock."""
+        def run():
+            try:
+                self.write(compute())
+            except Exception as e:
+                print(f"Background refresh of '{self.name}' failed: {e}")
+            finally:
+                self._release()
+
+        threading.Thread(target=run, name=f"refresh-{self.name}", daemon=True).start()
+
+    def get_or_compute(self, compute, background=False):
+        """
+        Return the cached value, recomputing it at most once per host per TTL.
+
+        If the cache is stale and another worker is already refreshing it, the
+        stale value is served instead of waiting. Only a cold cache blocks.
+
+        Parameters
+        ----------
+        compute : callable
+            Zero-argument function returning a JSON-serializable dict
+        background : bool
+            If True and a stale value exists, the elected writer also returns
+            the stale value immediately and refreshes on a background thread
+
+        Returns
+        -------
+        dict
+            Signal payload
+        """
+        cached = self.read()
+        if cached is not None and self.is_fresh(cached[1]):
+            return cached[0]
+
+        if not self._acquire(blocking=False):
+            if cached is not None:
+                return cached[0]
+            # Cold cache: wait for the elected writer, then re-check
+            self._acquire(blocking=True)
+        elif background and cached is not None:
+            # Another worker may have finished a refresh between our read and
+            # taking the lock; re-check so the host refreshes once per TTL
+            latest = self.read()
+            if latest is not None and self.is_fresh(latest[1]):
+                self._release()
+                return latest[0]
+            self._refresh_in_background(compute)
+            return cached[0]
+
+        try:
+            cached = self.read()
+            if cached is not None and self.is_fresh(cached[1]):
+                return cached[0]
+            data = compute()
+            self.write(data)
+            return data
+        finally:
+            self._release()
+
+    def clear(self):
+        """Drop the cached value (next read recomputes)."""
+        self._acquire(blocking=True)
+        try:
+            seq = _HEADER.unpack_from(self._mm, 0)[0]
+            _HEADER.pack_into(self._mm, 0, seq + 1, 0.0, 0)
+            _HEADER.pack_into(self._mm, 0, seq + 2, 0.0, 0)
+        finally:
+            self._release()
@@ -0,0 +1,110 @@
+"""
+signal_history.py
+
+Append-only per-date signal history tables.
+
+Each signal keeps one CSV under data/history/ indexed by date. Refreshes append
+only the dates after the last stored one, and readers keep the parsed table in
+memory until the file changes on disk, so serving a date range is a binary
+search plus a slice.
+
+Dependencies:
+    pandas
+
+Usage:
+    store = HistoryStore("concordance")
+    store.append(frame)                     # only new dates are written
+    store.range("2024-01-01", "2024-06-30")
+"""
+
+import os
+import threading
+from pathlib import Path
+
+import pandas as pd
+
+
+def history_dir():
+    """Directory for history tables: $SIGNAL_HISTORY_DIR or ./data/history."""
+    return Path(os.environ.get("SIGNAL_HISTORY_DIR", "./data/history"))
+
+
+class HistoryStore:
+    """
+    CSV-backed, date-indexed history for one signal.
+
+    Parameters
+    ----------
+    name : str
+        Signal name (file is {name}.csv)
+    directory : Path or None
+        Override for the history directory
+    float_format : str
+        Format for float columns ("%.17g" round-trips float64 exactly)
+    """
+
+    def __init__(self, name, directory=None, float_format="%.10g"):
+        directory = Path(directory) if directory is not None else history_dir()
+        self.name = name
+        self.path = directory / f"{name}.csv"
+        self.float_format = float_format
+        self._lock = threading.Lock()
+        self._stamp = None
+        self._frame = None
+
+    def load(self):
+        """Full table (cached until the file changes); empty frame if none yet."""
+        try:
+            stat = self.path.stat()
+            stamp = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            return pd.DataFrame(index=pd.DatetimeIndex([], name="date"))
+
+        with self._lock:
+            if stamp != self._stamp:
+                frame = pd.read_csv(self.path, index_col="date", parse_dates=["date"],
+                                    float_precision="round_trip")
+                self._frame, self._stamp = frame.sort_index(), stamp
+            return self._frame
+
+    def last_date(self):
+        frame = self.load()
+        return frame.index[-1] if len(frame) else None
+
+    def append(self, frame):
+        """
+        Append the rows of `frame` dated after the last stored date.
+
+        Returns
+        -------
+        int
+            Number of rows written
+        """
+        last = self.last_date()
+        new = frame if last is None else frame[frame.index > last]
+        if new.empty:
+            return 0
+
+        new = new.rename_axis("date")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # One write call per refresh so concurrent readers see whole lines
+        text = new.to_csv(header=last is None, float_format=self.float_format, date_format="%Y-%m-%d")
+        with open(self.path, "a", encoding="utf-8", newline="") as f:
+            f.write(text)
+        return len(new)
+
+    def range(self, start=None, end=None):
+        """Rows with start <= date <= end (either bound optional)."""
+        frame = self.load()
+        lo = frame.index.searchsorted(pd.Timestamp(start), "left") if start else 0
+        hi = frame.index.searchsorted(pd.Timestamp(end), "right") if end else len(frame)
+        return frame.iloc[lo:hi]
+
+
+def to_columns(frame):
+    """Columnar JSON-ready dict: {"date": [...], column: [...]} with NaN as None."""
+    out = {"date": frame.index.strftime("%Y-%m-%d").tolist()}
+    for column in frame.columns:
+        values = frame[column].astype(object).where(frame[column].notna(), None)
+        out[column] = values.tolist()
+    return out
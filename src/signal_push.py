@@ -0,0 +1,204 @@
+"""
+signal_push.py
+
+Fan-out of signal updates to WebSocket subscribers.
+
+Each update is serialized once and the same message object is offered to
+every subscriber of that signal. Subscribers hold at most one pending update
+per signal, drained by their own sender task: publishing never awaits a
+socket, a slow consumer's pending update for a signal is replaced by the newer
+one (it always receives the latest value of every signal it follows, never a
+backlog), and a send that stalls past `send_timeout` closes that one
+connection. Control replies go through the same queue, so the sender task is
+the only writer on the socket.
+
+Dependencies:
+    standard library only (asyncio)
+
+Usage:
+    hub = SignalHub(max_queue=8)
+    client = hub.connect(websocket.send_text, websocket.close)
+    sender = asyncio.create_task(client.run())
+    hub.subscribe(client, ["gold-nq"])
+    client.offer('{"type":"subscribed",...}')   # control reply, never coalesced
+    hub.publish("gold-nq", etag, message)     # from the refresh watcher
+"""
+
+import asyncio
+import itertools
+
+
+class Subscriber:
+    """
+    One connection: its subscriptions, pending messages and a sender loop.
+
+    Parameters
+    ----------
+    send : coroutine function
+        Sends one message (e.g. WebSocket.send_text)
+    close : coroutine function or None
+        Called with a close code when the sender gives up on the client
+    max_queue : int
+        Pending control replies kept; the oldest is dropped when full
+        (updates are bounded separately, at one per subscribed signal)
+    send_timeout : float
+        Seconds a single send may take before the client is disconnected
+    """
+
+    __slots__ = ("send", "close", "max_queue", "send_timeout", "signals", "pending",
+                 "_controls", "_serial", "wake", "sent", "dropped")
+
+    def __init__(self, send, close=None, max_queue=8, send_timeout=10.0):
+        self.send = send
+        self.close = close
+        self.max_queue = max_queue
+        self.send_timeout = send_timeout
+        self.signals = set()
+        self.pending = {}          # signal name or control serial -> message, in send order
+        self._controls = 0
+        self._serial = itertools.count()
+        self.wake = asyncio.Event()
+        self.sent = 0
+        self.dropped = 0
+
+    def offer(self, message, signal=None):
+        """
+        Queue a message without waiting.
+
+        An update (`signal` given) replaces that signal's pending update, if
+        any, keeping its place in the queue. A control reply (`signal` None)
+        is always queued; past `max_queue` of them the oldest is dropped.
+        """
+        if signal is not None:
+            if signal in self.pending:
+                self.dropped += 1
+            self.pending[signal] = message
+        else:
+            if self._controls >= self.max_queue:
+                oldest = next(key for key in self.pending if isinstance(key, int))
+                del self.pending[oldest]
+                self._controls -= 1
+                self.dropped += 1
+            self.pending[next(self._serial)] = message
+            self._controls += 1
+        self.wake.set()
+
+    def _pop(self):
+        key = next(iter(self.pending))
+        if isinstance(key, int):
+            self._controls -= 1
+        return self.pending.pop(key)
+
+    async def run(self):
+        """Drain the queue until the connection fails or stalls."""
+        try:
+            while True:
+                await self.wake.wait()
+                self.wake.clear()
+                while self.pending:
+                    await asyncio.wait_for(self.send(self._pop()), self.send_timeout)
+                    self.sent += 1
+        except asyncio.TimeoutError:
+            if self.close is not None:
+                try:
+                    await self.close(code=1013)  # Try again later: consumer too slow
+                except Exception:
+                    pass
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            pass  # Connection gone; the endpoint notices on its next receive
+
+
+class SignalHub:
+    """
+    Per-worker registry of subscribers and the last message per signal.
+
+    Parameters
+    ----------
+    max_queue : int
+        Pending control replies per subscriber
+    send_timeout : float
+        Seconds a single send may stall before the subscriber is dropped
+    """
+
+    def __init__(self, max_queue=8, send_timeout=10.0):
+        self.max_queue = max_queue
+        self.send_timeout = send_timeout
+        self.clients = set()
+        self._subscribers = {}   # signal -> set of Subscriber
+        self._latest = {}        # signal -> (etag, message)
+        self.stats = {"connected": 0, "published": 0, "deliveries": 0}
+
+    def connect(self, send, close=None):
+        client = Subscriber(send, close, self.max_queue, self.send_timeout)
+        self.clients.add(client)
+        self.stats["connected"] += 1
+        return client
+
+    def disconnect(self, client):
+        self.clients.discard(client)
+        for name in client.signals:
+            subscribers = self._subscribers.get(name)
+            if subscribers is not None:
+                subscribers.discard(client)
+                if not subscribers:
+                    del self._subscribers[name]
+        client.signals.clear()
+
+    def subscribe(self, client, names):
+        """Add subscriptions; the current value of each (if known) is queued at once."""
+        for name in names:
+            if name in client.signals:
+                continue
+            client.signals.add(name)
+            self._subscribers.setdefault(name, set()).add(client)
+            if name in self._latest:
+                client.offer(self._latest[name][1], name)
+
+    def unsubscribe(self, client, names):
+        """Drop subscriptions, including any update for them not yet sent."""
+        for name in names:
+            client.signals.discard(name)
+            client.pending.pop(name, None)
+            subscribers = self._subscribers.get(name)
+            if subscribers is not None:
+                subscribers.discard(client)
+                if not subscribers:
+                    del self._subscribers[name]
+
+    def has_latest(self, name):
+        return name in self._latest
+
+    def signals(self):
+        """Signals with at least one subscriber."""
+        return list(self._subscribers)
+
+    def publish(self, name, etag, message):
+        """
+        Offer `message` to every subscriber of `name` unless `etag` was
+        already published for it.
+
+        Returns
+        -------
+        int
+            Subscribers the message was queued for
+        """
+        latest = self._latest.get(name)
+        if latest is not None and latest[0] == etag:
+            return 0
+        self._latest[name] = (etag, message)
+        subscribers = self._subscribers.get(name, ())
+        for client in subscribers:
+            client.offer(message, name)
+        self.stats["published"] += 1
+        self.stats["deliveries"] += len(subscribers)
+        return len(subscribers)
+
+    def snapshot(self):
+        return {
+            "clients": len(self.clients),
+            "subscriptions": {name: len(s) for name, s in self._subscribers.items()},
+            "dropped": sum(c.dropped for c in self.clients),
+            **self.stats,
+        }
@@ -0,0 +1,914 @@
+"""
+signal_service.py
+
+Unified signal service: one price fetch per refresh, every registered signal
+computed from the shared frame.
+
+Signals register a definition (name, tickers they need, history start and a
+compute function). A refresh takes the union of tickers across definitions,
+downloads each ticker once from the earliest start, then hands every signal
+its own slice of the shared frame. Results are cached host-wide
+(signal_cache.py) and snapshotted for warm starts (signal_snapshot.py).
+
+Dependencies:
+    fastapi, uvicorn, pandas, numpy, httpx, statsmodels
+    orjson (optional, faster response serialization)
+
+Usage:
+    uvicorn signal_service:app --port 8000   (from src/)
+
+Endpoints:
+    GET /signals                 Registered signals and their tickers
+    GET /signals/gold-nq         Latest gold vs. Nasdaq divergence (?as_of=YYYY-MM-DD)
+    GET /signals/gold-nq/history Per-date alpha, beta, z and change-point flags
+    GET /signals/gold-nq/aggregates  Regime / band counts, z histogram, downsampled chart series
+    GET /signals/concordance     Latest concordance score and logit betas (?as_of=)
+    GET /signals/concordance/history  Per-date I, S and fitted P(I=1)
+    POST/GET /alerts/rules       Threshold-crossing webhook subscriptions
+    GET /profiles/{trace_id}     Folded-stack profile of a request sent with X-Profile: 1
+                                 (honored when SIGNAL_PROFILING=1)
+    GET /health                  Health check
+    WS  /ws/signals              Push channel: subscribe to signals, receive each new value
+
+Signal responses are serialized once per refresh and carry a strong ETag and
+a Cache-Control max-age that runs out at the next refresh; repeat polls with
+If-None-Match get an empty 304. As-of responses are immutable once the date
+is final and are cached for a day.
+
+Every request is traced (fetch, returns, regression, z, cache, serialize
+spans; OTLP/JSON lines in data/traces/, see signal_trace.py) and answered
+with its X-Trace-Id.
+"""
+
+from fastapi import FastAPI, HTTPException, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.middleware.cors import CORSMiddleware
+from pydantic import BaseModel, Field
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+import asyncio
+import hashlib
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent))
+
+from api_models import ConcordanceResponse, HealthResponse, SignalResponse, numeric_fields
+from signal_alerts import AlertEngine, AlertRule, CONDITIONS, RuleStore
+from signal_cache import SharedSignalCache
+from signal_push import SignalHub
+from signal_snapshot import save_snapshot, warm_cache
+from signal_trace import TracingMiddleware, configure as configure_tracing, read_profile, span
+
+SERVICE_NAME = "signal-service"
+REFRESH_SECONDS = 300
+WS_POLL_SECONDS = 1.0
+STALE_CHECK_SECONDS = 5.0
+
+
+# ============================================================================
+# Signal registry
+# ============================================================================
+
+@dataclass
+class SignalDefinition:
+    """
+    A signal computed from the shared price frame.
+
+    tickers maps the column names the compute function expects to Yahoo
+    symbols. compute receives a frame with those columns (from `start`, on
+    the sessions of the `calendar` symbol, default the first ticker, with
+    other tickers carried forward up to `max_stale` sessions over their own
+    holidays) and returns (payload, params, extras):
+    the API payload, model parameters for the snapshot, and optional extra
+    sections clients can request (e.g. confidence bands). asof, when set, is
+    a factory for the AsOfSignal that records the inputs each refresh and
+    answers point-in-time queries; it is built on first use so importing the
+    service does not load pandas. max_stale None uses calendar_align.MAX_STALE.
+    alert_fields are the numeric scalar payload fields alert rules may watch.
+    """
+    name: str
+    tickers: Dict[str, str]
+    start: str
+    compute: Callable
+    min_rows: int = 0
+    description: str = ""
+    asof: Optional[Callable] = None
+    calendar: Optional[str] = None
+    max_stale: Optional[int] = None
+    alert_fields: Tuple[str, ...] = ()
+    _asof: object = field(default=None, init=False, repr=False, compare=False)
+
+    def as_of(self):
+        """This signal's AsOfSignal, built on first use (None without one)."""
+        if self.asof is None:
+            return None
+        if self._asof is None:
+            with _asof_lock:
+                if self._asof is None:
+                    self._asof = self.asof()
+        return self._asof
+
+    def align(self, prices):
+        """Align this signal's tickers from the shared frame onto its calendar."""
+        symbols = list(self.tickers.values())
+        missing = [s for s in symbols if s not in prices.columns]
+        if missing:
+            raise ValueError(f"Missing tickers for {self.name}: {', '.join(missing)}")
+        from calendar_align import MAX_STALE, align_to_calendar
+
+        max_stale = MAX_STALE if self.max_stale is None else self.max_stale
+        return align_to_calendar(prices[symbols], calendar=self.calendar or symbols[0],
+                                 max_stale=max_stale)
+
+    def frame(self, prices, aligned=None):
+        """Select, rename and align this signal's columns from the shared frame."""
+        aligned = aligned or self.align(prices)
+        frame = aligned.complete()
+        frame = frame.loc[frame.index >= self.start].set_axis(list(self.tickers.keys()), axis=1)
+        if len(frame) < self.min_rows:
+            raise ValueError(f"Insufficient data for {self.name}: {len(frame)} rows < {self.min_rows}")
+        return frame
+
+
+_asof_lock = threading.Lock()
+
+
+class SignalRegistry:
+    """Ordered collection of signal definitions."""
+
+    def __init__(self):
+        self._definitions: Dict[str, SignalDefinition] = {}
+
+    def register(self, definition: SignalDefinition):
+        if definition.name in self._definitions:
+            raise ValueError(f"Signal already registered: {definition.name}")
+        self._definitions[definition.name] = definition
+        return definition
+
+    def get(self, name) -> SignalDefinition:
+        return self._definitions[name]
+
+    def definitions(self) -> List[SignalDefinition]:
+        return list(self._definitions.values())
+
+    def symbols(self) -> List[str]:
+        """Union of Yahoo symbols needed by all registered signals."""
+        return sorted({s for d in self._definitions.values() for s in d.tickers.values()})
+
+    def start(self) -> str:
+        """Earliest history start across all registered signals."""
+        return min(d.start for d in self._definitions.values())
+
+
+BANDS = {"n_boot": 1000, "block": 5, "ci": 0.95, "seed": 0}
+
+
+def _compute_gold_nq(frame):
+    import gold_vs_nasdaq as gnq
+    from changepoint import RegimeMonitor
+    from signal_aggregates import SignalAggregates
+
+    signal = gnq.compute_rolling_signal(frame, window=gnq.WINDOW)
+    payload = gnq.latest_payload(signal, window=gnq.WINDOW)
+    latest = signal.iloc[-1]
+    params = {
+        "window": gnq.WINDOW,
+        "alpha": float(latest["alpha"]),
+        "beta_xau": float(latest["beta_xau"]),
+        "eps_std": float(latest["eps_std"]),
+    }
+
+    # Bootstrap bands for the latest date only; identical to that date's
+    # bands in a full-history run with the same settings
+    with span("bands", n_boot=BANDS["n_boot"]):
+        band = gnq.bootstrap_bands(frame, window=gnq.WINDOW, last=1, **BANDS).iloc[-1]
+    bands = dict(BANDS)
+    for field in ("alpha", "beta_xau", "z"):
+        bands[field] = [round(float(band[f"{field}_lo"]), 6), round(float(band[f"{field}_hi"]), 6)]
+
+    # Change-point detectors resume from their persisted state and only see
+    # dates after the previous refresh; flagged rows go to the history table.
+    # The latest bar is still moving, so both take completed bars only: a
+    # provisional value would otherwise be frozen into the detector state
+    # and the append-only history.
+    completed = signal.iloc[:-1]
+    with span("regime"):
+        monitor = RegimeMonitor.load("gold-nq")
+        flags = monitor.update(completed, frame)
+        monitor.save()
+    table = completed.loc[flags.index, ["alpha", "beta_xau", "eps", "z"]].join(flags)
+    params["history_appended"] = history("gold-nq").append(table)
+
+    # Dashboard aggregates: running counts advance by the new completed bars
+    with span("aggregates"):
+        aggregates = SignalAggregates.load("gold-nq")
+        aggregates.update(signal)
+        aggregates.save()
+        extras = {"bands": bands, "regime": monitor.summary(), "aggregates": aggregates.payload(signal)}
+    return payload, params, extras
+
+
+def _compute_concordance(frame):
+    import concordance_signal as cs
+
+    signal = cs.compute_concordance(frame, window=90)
+    model = cs.fit_logit(signal)
+    payload = cs.latest_payload(signal, model)
+
+    # Per-date P(I=1), I and S in one vectorized pass; only new completed
+    # dates are stored (the latest bar is still moving)
+    appended = history("concordance").append(cs.materialize_probabilities(signal, model).iloc[:-1])
+    return payload, {"window": 90, "logit": payload["betas"], "history_appended": appended}, {}
+
+
+_histories = {}
+
+
+def history(name):
+    """Per-worker HistoryStore for a signal (parsed table cached until the file changes)."""
+    from signal_history import HistoryStore
+
+    if name not in _histories:
+        _histories[name] = HistoryStore(name)
+    return _histories[name]
+
+
+def _gold_nq_asof():
+    from signal_asof import AsOfSignal, GoldNqModel
+
+    return AsOfSignal("gold-nq", GoldNqModel(window=90))
+
+
+def _concordance_asof():
+    from signal_asof import AsOfSignal, ConcordanceModel
+
+    return AsOfSignal("concordance", ConcordanceModel(window=90))
+
+
+registry = SignalRegistry()
+
+registry.register(SignalDefinition(
+    name="gold-nq",
+    tickers={"NQ": "^NDX", "XAU": "GC=F"},
+    start="2015-01-01",
+    compute=_compute_gold_nq,
+    min_rows=90,
+    description="Rolling Nasdaq-on-gold regression residual z-score",
+    asof=_gold_nq_asof,
+    alert_fields=numeric_fields(SignalResponse),
+))
+
+registry.register(SignalDefinition(
+    name="concordance",
+    tickers={"EQ": "QQQ", "XAU": "GLD", "UST": "TLT", "DXY": "UUP", "VIX": "^VIX", "REAL": "^TNX"},
+    start="2020-01-01",
+    compute=_compute_concordance,
+    min_rows=90,
+    description="Equity/safe-haven concordance score and logit P(I=1)",
+    asof=_concordance_asof,
+    alert_fields=numeric_fields(ConcordanceResponse),
+))
+
+
+# Subscriber rules are shared by all workers; only the elected refresh
+# writer evaluates them, so each crossing is delivered once per host
+alert_store = RuleStore()
+alert_engine = AlertEngine(alert_store)
+
+
+# ============================================================================
+# Shared fetch + refresh
+# ============================================================================
+
+def fetch_union(symbols, start, end=None):
+    """
+    Fetch daily closes for every symbol, one concurrent request per ticker.
+
+    Rows are the union of every ticker's sessions, with NaN where a ticker
+    did not trade; each signal aligns its own tickers onto its calendar.
+    Tickers that fail after retries are left out, so only the signals that
+    need them fail.
+
+    Returns
+    -------
+    pd.DataFrame
+        Adjusted closes with Yahoo symbols as columns
+    """
+    from market_data import MarketDataFetcher
+
+    print(f"Fetching data for {', '.join(symbols)} from {start}...")
+    with span("fetch", symbols=",".join(symbols)) as s, MarketDataFetcher() as fetcher:
+        result = fetcher.fetch(symbols, start, end)
+        s.set(rows=len(result.prices), failed=len(result.failures))
+
+    if result.failures:
+        print(f"Partial fetch, failed tickers: {'; '.join(result.failures.values())}")
+    if result.prices.empty:
+        raise ValueError("No data returned for any ticker")
+    return result.prices
+
+
+def coverage_summary(coverage):
+    """JSON-ready per-ticker coverage from an Alignment."""
+    return {
+        symbol: {"observed": int(row.observed), "filled": int(row.filled),
+                 "missing": int(row.missing), "coverage": round(float(row.coverage), 4)}
+        for symbol, row in coverage.iterrows()
+    }
+
+
+def refresh_all(reg=None):
+    """
+    Fetch the union of tickers once and compute every registered signal.
+
+    A failing signal does not block the others; its error is reported under
+    "errors" and the endpoint for it returns 503 until the next refresh.
+
+    Returns
+    -------
+    dict
+        {"computed_at", "signals": {name: payload}, "extras": {name: {section: ...}},
+         "errors": {name: message}, "coverage": {name: {symbol: {...}}}}
+    """
+    reg = reg or registry
+    with span("refresh", root=True):
+        return _refresh(reg)
+
+
+def _refresh(reg):
+    prices = fetch_union(reg.symbols(), reg.start())
+
+    signals, params, extras, errors, coverage = {}, {}, {}, {}, {}
+    for definition in reg.definitions():
+        try:
+            name = definition.name
+            with span("compute", signal=name):
+                aligned = definition.align(prices)
+                coverage[name] = coverage_summary(aligned.coverage)
+                frame = definition.frame(prices, aligned)
+                signals[name], params[name], extras[name] = definition.compute(frame)
+        except Exception as e:
+            errors[definition.name] = str(e)
+            continue
+        if definition.asof is not None:
+            try:
+                definition.as_of().record(frame)
+            except Exception as e:
+                print(f"As-of record failed for {name}: {e}")
+
+    result = {
+        "computed_at": datetime.utcnow().isoformat(),
+        "signals": signals,
+        "extras": extras,
+        "errors": errors,
+        "coverage": coverage,
+    }
+    if signals:
+        save_snapshot(SERVICE_NAME, result, params=params)
+        try:
+            alert_engine.on_refresh(result)
+        except Exception as e:
+            print(f"Alert evaluation failed: {e}")
+    return result
+
+
+# ============================================================================
+# API
+# ============================================================================
+
+_cache = SharedSignalCache(SERVICE_NAME, ttl_seconds=REFRESH_SECONDS)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    """
+    Seed the shared cache from the last snapshot so cold workers answer
+    instantly, and watch for refreshes to push to WebSocket subscribers.
+    """
+    configure_tracing(SERVICE_NAME)
+    warm_cache(_cache, SERVICE_NAME)
+    watcher = asyncio.create_task(push_updates())
+    yield
+    watcher.cancel()
+
+
+app = FastAPI(
+    title="Signal Service",
+    description="Gold-Nasdaq divergence and concordance signals from one shared price fetch",
+    version="1.0.0",
+    lifespan=lifespan
+)
+
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+    expose_headers=["X-Trace-Id", "X-Profile-Artifact"],
+)
+app.add_middleware(TracingMiddleware)
+
+
+def get_state():
+    """Latest service state, refreshing all signals when stale."""
+    try:
+        return _cache.get_or_compute(refresh_all, background=True)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Signal refresh failed: {str(e)}")
+
+
+def get_signal(name):
+    """Latest payload for a registered signal, refreshing all signals when stale."""
+    state = get_state()
+    if name in state["signals"]:
+        return state["signals"][name]
+    detail = state["errors"].get(name, "signal not computed yet")
+    raise HTTPException(status_code=503, detail=f"{name} unavailable: {detail}")
+
+
+# ----------------------------------------------------------------------------
+# Pre-serialized responses + conditional GET
+# ----------------------------------------------------------------------------
+
+try:
+    import orjson
+
+    def dumps(obj) -> bytes:
+        return orjson.dumps(obj)
+except ImportError:  # orjson is optional; fall back to compact stdlib json
+    import json
+
+    def dumps(obj) -> bytes:
+        return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+
+class RenderedSignals:
+    """
+    Per-worker memo of serialized signal bodies and their ETags.
+
+    Bodies are rendered once per refresh: the shared cache's sequence number
+    is checked lock-free on every request and the cache payload is only
+    re-read and re-serialized when it moves. While the entry is stale (a
+    refresh is running or failed) the rendered bodies keep being served and
+    a refresh is requested at most every STALE_CHECK_SECONDS.
+    """
+
+    def __init__(self, cache):
+        self.cache = cache
+        self._seq = None
+        self._next_stale_check = 0.0
+        self._state = {"signals": {}}
+        self._bodies = {}
+        self._lock = threading.Lock()
+
+    def get(self, name, sections=(), optional=()):
+        """
+        Return (body, etag, written_at) for signal `name`.
+
+        `sections` names extra sections (e.g. "bands") merged into the
+        payload; `optional` ones are merged only when the last refresh
+        produced them (e.g. a default section missing from a warm-start
+        snapshot). Each combination is rendered once per refresh.
+
+        Raises
+        ------
+        HTTPException
+            503 if the signal failed in the last refresh, 400 if a section
+            in `sections` is not available
+        """
+        with span("cache", signal=name) as stage:
+            seq, written_at = self.cache.peek()
+            rendered = seq != self._seq
+            if rendered:
+                self._render(seq)
+                seq, written_at = self.cache.peek()
+            elif not self.cache.is_fresh(written_at):
+                self._request_refresh()
+
+            key = (name, tuple(sorted(sections)), tuple(sorted(set(optional) - set(sections))))
+            bodies = self._bodies
+            hit = key in bodies
+            if not hit:
+                if name not in self._state["signals"]:
+                    get_signal(name)  # raises the 503 with the refresh error
+                extras = self._state.get("extras", {}).get(name, {})
+                missing = [s for s in sections if s not in extras]
+                if missing:
+                    raise HTTPException(status_code=400, detail=f"{name} has no {', '.join(missing)}")
+                payload = dict(self._state["signals"][name])
+                payload.update({s: extras[s] for s in key[1]})
+                payload.update({s: extras[s] for s in key[2] if s in extras})
+                bodies[key] = self._encode(payload)
+            stage.set(hit=hit, rendered=rendered)
+        body, etag = bodies[key]
+        return body, etag, written_at
+
+    @staticmethod
+    def _encode(payload):
+        with span("serialize") as stage:
+            body = dumps(payload)
+            stage.set(bytes=len(body))
+        # Strong validator: changes exactly when the date or any value does
+        etag = '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+        return body, etag
+
+    def _request_refresh(self):
+        """Start (or join) a host-wide refresh without re-rendering."""
+        now = time.monotonic()
+        if now < self._next_stale_check:
+            return
+        self._next_stale_check = now + STALE_CHECK_SECONDS
+        try:
+            get_state()  # stale value returned at once; refresh runs in the background
+        except HTTPException:
+            pass  # keep serving the last rendered bodies
+
+    def _render(self, seq_before):
+        state = get_state()
+        bodies = {(name, (), ()): self._encode(payload) for name, payload in state["signals"].items()}
+        with self._lock:
+            self._state = state
+            self._bodies = bodies
+            # Label with the sequence seen *before* reading, so a refresh that
+            # lands in between forces one more render rather than being missed
+            self._seq = seq_before
+
+
+_rendered = RenderedSignals(_cache)
+
+
+def etag_matches(if_none_match, etag):
+    """RFC 9110 weak comparison of an If-None-Match header against `etag`."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return any((tag[2:] if tag.startswith("W/") else tag) == etag for tag in candidates)
+
+
+def signal_response(request: Request, name, sections=(), optional=()):
+    """
+    Serve a pre-serialized signal with ETag / Cache-Control, or 304.
+
+    max-age is the time left until the next scheduled refresh, so clients
+    and proxies revalidate exactly when a new value can exist.
+    """
+    body, etag, written_at = _rendered.get(name, sections, optional)
+    remaining = max(0, int(REFRESH_SECONDS - (time.time() - written_at)))
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={remaining}"}
+
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def asof_response(name, as_of):
+    """
+    Serve a signal's payload as published on `as_of`, from its checkpoints.
+
+    Raises
+    ------
+    HTTPException
+        400 for a malformed date, 404 when no final value exists for it
+    """
+    try:
+        payload = registry.get(name).as_of().query(as_of)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid as_of: {e}")
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return Response(content=dumps(payload), media_type="application/json",
+                    headers={"Cache-Control": "public, max-age=86400"})
+
+
+# ----------------------------------------------------------------------------
+# WebSocket push
+# ----------------------------------------------------------------------------
+
+# Optional sections pushed with each signal: the same default body as its GET
+# endpoint (included when the last refresh produced them)
+PUSH_SECTIONS = {"gold-nq": ("regime",)}
+
+hub = SignalHub(max_queue=8, send_timeout=10.0)
+
+
+def update_message(name, etag, body):
+    """WebSocket update frame for a pre-serialized payload, built once per refresh."""
+    head = dumps({"type": "update", "signal": name, "etag": etag})
+    return (head[:-1] + b',"data":' + body + b"}").decode("utf-8")
+
+
+async def publish_current(name):
+    """Publish the current body of `name` to its subscribers if it changed."""
+    try:
+        body, etag, _ = await asyncio.to_thread(_rendered.get, name, (), PUSH_SECTIONS.get(name, ()))
+    except HTTPException:
+        return 0  # Failed in the last refresh; subscribers keep the previous value
+    return hub.publish(name, etag, update_message(name, etag, body))
+
+
+async def push_updates(interval=WS_POLL_SECONDS):
+    """
+    Per-worker watcher: while anyone is subscribed, check the shared cache
+    (a lock-free sequence read, and a background refresh when stale) and
+    broadcast every signal whose body changed.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        for name in hub.signals():
+            try:
+                await publish_current(name)
+            except Exception as e:
+                print(f"Push for {name} failed: {e}")
+
+
+@app.websocket("/ws/signals")
+async def signals_socket(websocket: WebSocket, signals: str = ""):
+    """
+    Push channel for signal updates.
+
+    Subscribe with `?signals=gold-nq,concordance` or by sending
+    {"action": "subscribe" | "unsubscribe", "signals": [...]}. Each
+    subscription first receives the current value, then every new one as
+    soon as a refresh lands:
+        {"type": "update", "signal": name, "etag": "...", "data": {...}}
+    A client that cannot keep up skips intermediate updates (each signal's
+    pending update is replaced by the newer one); one whose socket stalls
+    for longer than the send timeout is closed with 1013. Replies to
+    control messages are queued behind updates already pending, so only the
+    sender task ever writes to the socket.
+    """
+    await websocket.accept()
+    client = hub.connect(websocket.send_text, websocket.close)
+    sender = asyncio.create_task(client.run())
+    known = {d.name for d in registry.definitions()}
+
+    def reply(message):
+        client.offer(dumps(message).decode("utf-8"))
+
+    async def handle(action, names):
+        unknown = [n for n in names if n not in known]
+        if unknown or action not in ("subscribe", "unsubscribe"):
+            detail = f"unknown signals: {', '.join(unknown)}" if unknown else f"unknown action: {action}"
+            reply({"type": "error", "detail": detail, "signals": sorted(known)})
+            return
+        if action == "unsubscribe":
+            hub.unsubscribe(client, names)
+        else:
+            hub.subscribe(client, names)
+            for name in names:
+                if not hub.has_latest(name):
+                    await publish_current(name)
+        reply({"type": "subscribed", "signals": sorted(client.signals)})
+
+    try:
+        if signals:
+            await handle("subscribe", [n.strip() for n in signals.split(",") if n.strip()])
+        while True:
+            try:
+                request = await websocket.receive_json()
+                action, names = request.get("action"), list(request.get("signals", []))
+            except (ValueError, AttributeError, TypeError):
+                reply({"type": "error", "detail": "expected {\"action\", \"signals\"}"})
+                continue
+            await handle(action, names)
+    except (WebSocketDisconnect, RuntimeError):
+        pass  # RuntimeError: the sender closed a stalled connection
+    finally:
+        hub.disconnect(client)
+        sender.cancel()
+
+
+@app.get("/", tags=["Root"])
+async def root():
+    """Root endpoint with API information."""
+    return {
+        "name": "Signal Service",
+        "version": "1.0.0",
+        "endpoints": {
+            "signals": "/signals",
+            "gold_nq": "/signals/gold-nq",
+            "concordance": "/signals/concordance",
+            "ws_signals": "/ws/signals",
+            "health": "/health",
+            "docs": "/docs"
+        },
+        "push": hub.snapshot(),
+    }
+
+
+@app.get("/health", response_model=HealthResponse, tags=["Health"])
+async def health_check():
+    """Health check endpoint."""
+    return {
+        "status": "healthy",
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+
+@app.get("/profiles/{trace_id}", tags=["Health"])
+def get_profile(trace_id: str):
+    """
+    Sampled stacks of a request sent with `X-Profile: 1`, in folded format
+    (one "frame;frame;frame count" line per stack) for flamegraph.pl or
+    speedscope. The request's X-Profile-Artifact header links here.
+    """
+    try:
+        folded = read_profile(trace_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return Response(content=folded, media_type="text/plain")
+
+
+@app.get("/signals", tags=["Signals"])
+def list_signals():
+    """
+    Registered signals, the tickers they use, and the shared fetch plan.
+
+    Each signal also reports its calendar and, from the last refresh, per-ticker
+    coverage: sessions observed, carried forward and missing.
+    """
+    coverage = get_state().get("coverage", {})
+    return {
+        "signals": {
+            d.name: {"tickers": d.tickers, "start": d.start, "description": d.description,
+                     "calendar": d.calendar or next(iter(d.tickers.values())),
+                     "max_stale": d.max_stale, "coverage": coverage.get(d.name, {})}
+            for d in registry.definitions()
+        },
+        "fetch": {"symbols": registry.symbols(), "start": registry.start()},
+        "refresh_seconds": REFRESH_SECONDS,
+    }
+
+
+@app.get("/signals/gold-nq", response_model=SignalResponse, tags=["Signals"])
+def get_gold_nasdaq_signal(request: Request, bands: bool = False, regime: Optional[bool] = None,
+                           as_of: str = None):
+    """
+    Latest gold vs. Nasdaq divergence signal.
+
+    Same payload as api.py, computed from the shared price fetch. Supports
+    conditional GET via ETag / If-None-Match.
+
+    With `bands=true` the payload gains a "bands" object with block-bootstrap
+    confidence intervals ([lo, hi]) for alpha, beta_xau and z on that date.
+
+    The "regime" object reports online change-point detection for beta_xau
+    and residual variance: whether the latest date is a change point, the
+    run length (observations since the last change), and the date and
+    direction of that change. It is included by default whenever the last
+    refresh computed it (a warm start from an older snapshot may not have
+    it yet); `regime=true` requires it (400 if unavailable) and
+    `regime=false` omits it.
+
+    With `as_of=YYYY-MM-DD` the response is the payload as published for
+    that date (the last trading day on or before it), using only data
+    available then; extra sections are not included.
+    """
+    if as_of:
+        if bands:
+            raise HTTPException(status_code=400, detail="bands are not available with as_of")
+        return asof_response("gold-nq", as_of)
+    sections = (("bands",) if bands else ()) + (("regime",) if regime else ())
+    optional = ("regime",) if regime is None else ()
+    return signal_response(request, "gold-nq", sections, optional)
+
+
+@app.get("/signals/gold-nq/history", tags=["Signals"])
+def get_gold_nasdaq_history(start: str = None, end: str = None):
+    """
+    Materialized per-date gold vs. Nasdaq table: alpha, beta_xau, eps, z,
+    change-point flags (cp_beta, cp_var: +1 up, -1 down, 0 none) and run
+    lengths (rl_beta, rl_var), as columnar arrays.
+
+    Parameters
+    ----------
+    start, end : str, optional
+        Inclusive date bounds (YYYY-MM-DD)
+    """
+    from signal_history import to_columns
+
+    try:
+        frame = history("gold-nq").range(start, end)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid date: {e}")
+    return {"signal": "gold-nq", "rows": len(frame), **to_columns(frame)}
+
+
+@app.get("/signals/gold-nq/aggregates", tags=["Signals"])
+def get_gold_nasdaq_aggregates(request: Request):
+    """
+    Precomputed dashboard aggregates next to the latest gold vs. Nasdaq
+    payload, so BI tools pull a few kilobytes instead of the full history.
+
+    The "aggregates" object holds regime day counts (all history and the
+    last 90 observations), colour-band counts and the current band streak,
+    a z histogram on fixed 0.25-wide bins over [-4, 4], and LTTB-downsampled
+    z and beta_xau series (at most 300 points) for the 90d, 1y, 5y and all
+    chart ranges. Recomputed on each refresh; supports conditional GET via
+    ETag / If-None-Match.
+    """
+    return signal_response(request, "gold-nq", ("aggregates",))
+
+
+@app.get("/signals/concordance", response_model=ConcordanceResponse, tags=["Signals"])
+def get_concordance_signal(request: Request, as_of: str = None):
+    """
+    Latest concordance score, P(I=1), logit betas and macro inputs.
+
+    Same payload as api_concordance.py, computed from the shared price fetch.
+    Supports conditional GET via ETag / If-None-Match.
+
+    With `as_of=YYYY-MM-DD` the response is the payload as published for
+    that date: the score from the stored inputs up to it and P(I=1) from the
+    logit as refitted at the last checkpoint on or before it.
+    """
+    if as_of:
+        return asof_response("concordance", as_of)
+    return signal_response(request, "concordance")
+
+
+@app.get("/signals/concordance/history", tags=["Signals"])
+def get_concordance_history(start: str = None, end: str = None):
+    """
+    Materialized per-date concordance table: indicator I, score S and fitted
+    P(I=1), as columnar arrays.
+
+    Parameters
+    ----------
+    start, end : str, optional
+        Inclusive date bounds (YYYY-MM-DD)
+    """
+    from signal_history import to_columns
+
+    try:
+        frame = history("concordance").range(start, end)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid date: {e}")
+    return {"signal": "concordance", "rows": len(frame), **to_columns(frame)}
+
+
+# ----------------------------------------------------------------------------
+# Alert subscriptions
+# ----------------------------------------------------------------------------
+
+class AlertRuleRequest(BaseModel):
+    """Alert subscription request."""
+    signal: str = Field(..., description="Signal name, e.g. gold-nq")
+    field: str = Field(..., description="Payload field to watch, e.g. z or concordance_score")
+    condition: str = Field(..., description=f"One of {', '.join(CONDITIONS)}")
+    level: float = Field(0.0, description="Threshold (ignored for sign_change)")
+    webhook_url: str = Field(..., description="URL receiving POST {\"events\": [...]}")
+
+
+@app.post("/alerts/rules", tags=["Alerts"])
+def create_alert_rule(request: AlertRuleRequest):
+    """
+    Subscribe a webhook to a threshold crossing.
+
+    Examples: z cross_above 1.5, beta_xau sign_change,
+    concordance_score cross_below 0.3. The field must be a numeric value of
+    the signal's payload (422 otherwise).
+    """
+    definitions = {d.name: d for d in registry.definitions()}
+    if request.signal not in definitions:
+        raise HTTPException(status_code=404, detail=f"Unknown signal: {request.signal}")
+    fields = definitions[request.signal].alert_fields
+    if request.field not in fields:
+        raise HTTPException(status_code=422, detail=f"{request.signal} has no numeric field "
+                                                    f"{request.field!r}; one of {', '.join(fields)}")
+    try:
+        rule = AlertRule(**request.model_dump())
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    alert_store.add(rule)
+    return asdict(rule)
+
+
+@app.get("/alerts/rules", tags=["Alerts"])
+def list_alert_rules():
+    """All registered alert rules."""
+    return {"rules": [asdict(rule) for rule in alert_store.rules()]}
+
+
+@app.delete("/alerts/rules/{rule_id}", tags=["Alerts"])
+def delete_alert_rule(rule_id: str):
+    """Remove an alert rule."""
+    if not alert_store.remove(rule_id):
+        raise HTTPException(status_code=404, detail=f"Unknown rule: {rule_id}")
+    return {"deleted": rule_id}
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(app, host="0.0.0.0", port=8000)
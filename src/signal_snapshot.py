@@ -0,0 +1,119 @@
+"""
+signal_snapshot.py
+
+On-disk snapshots of the last computed signals, used to warm a cold worker.
+
+Every successful refresh writes one small JSON file per signal containing the
+API payload plus the model parameters behind it. At startup the API seeds its
+cache from these files, so a freshly booted worker can answer /signals/* from
+the snapshot while the first network fetch is still running.
+
+Dependencies:
+    standard library only
+
+Usage:
+    save_snapshot("gold-nq", data, params={"beta_xau": -0.41})
+    snap = load_snapshot("gold-nq")  # None if missing or unreadable
+"""
+
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+
+SNAPSHOT_VERSION = 1
+
+
+def snapshot_dir():
+    """Directory for snapshot files: $SIGNAL_SNAPSHOT_DIR or ./data/snapshots."""
+    return Path(os.environ.get("SIGNAL_SNAPSHOT_DIR", "./data/snapshots"))
+
+
+def snapshot_path(name, directory=None):
+    """Path of the snapshot file for signal `name`."""
+    directory = Path(directory) if directory is not None else snapshot_dir()
+    return directory / f"{name}.json"
+
+
+def save_snapshot(name, data, params=None, directory=None):
+    """
+    Atomically write the latest payload and model parameters for a signal.
+
+    Parameters
+    ----------
+    name : str
+        Signal name (e.g. "gold-nq")
+    data : dict
+        API payload as served by the endpoint
+    params : dict or None
+        Model parameters behind the payload (betas, window, ...)
+    directory : Path or None
+        Override for the snapshot directory
+
+    Returns
+    -------
+    Path
+        Written snapshot path
+    """
+    path = snapshot_path(name, directory)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    record = {
+        "version": SNAPSHOT_VERSION,
+        "name": name,
+        "computed_at": time.time(),
+        "data": data,
+        "params": params or {},
+    }
+
+    # Write to a temp file and rename so readers never see a partial file
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(record, f, separators=(",", ":"))
+        os.replace(tmp, path)
+    except Exception:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+    return path
+
+
+def load_snapshot(name, directory=None):
+    """
+    Load the snapshot for a signal.
+
+    Returns
+    -------
+    dict or None
+        Snapshot record with keys data, params, computed_at; None if the file
+        is missing, unreadable or from an incompatible version
+    """
+    path = snapshot_path(name, directory)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            record = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if record.get("version") != SNAPSHOT_VERSION or "data" not in record:
+        return None
+    return record
+
+
+def warm_cache(cache, name, directory=None):
+    """
+    Seed an empty SharedSignalCache from the on-disk snapshot.
+
+    The entry keeps its original computation time, so it is served
+    immediately but still counts as stale and is refreshed in the background.
+
+    Returns
+    -------
+    bool
+        True if the cache was seeded
+    """
+    record = load_snapshot(name, directory)
+    if record is None:
+        return False
+    return cache.seed(record["data"], written_at=record.get("computed_at", 0.0))
@@ -0,0 +1,445 @@
+"""
+signal_trace.py
+
+Stage tracing and on-demand sampling profiles for the signal services.
+
+Spans time the pipeline stages (fetch, returns, regression, z, cache,
+serialize). They nest through a context variable, so stages run in the
+request's threadpool worker or via asyncio.to_thread land under the request
+span. Traces start at a root span: the request span added by
+TracingMiddleware, or an explicit root such as the background refresh.
+Stages reached outside any trace (e.g. the WebSocket watcher reading the
+cache every second) record nothing. Finished traces are appended in batches
+by a writer thread, one OTLP/JSON line each (an ExportTraceServiceRequest,
+the format of the OpenTelemetry Collector file exporter), to
+$SIGNAL_TRACE_FILE, default ./data/traces/spans.jsonl.
+
+Tracing is off until a service calls configure(); until then span() is a
+no-op, so the CLI scripts that share the instrumented code write nothing.
+
+When the process also runs with SIGNAL_PROFILING=1, a request sent with
+`X-Profile: 1` is sampled by a stack profiler while it runs (otherwise the
+header is ignored, so clients cannot switch on a sampler thread by
+themselves). Only threads inside one of the request's spans are sampled. The
+folded stacks (input for flamegraph.pl or speedscope) go to
+profiles/{trace_id}.folded next to the trace file, of which the newest
+$SIGNAL_PROFILE_LIMIT (default 100) are kept; the response names the artifact
+in its X-Profile-Artifact header.
+
+Dependencies:
+    standard library only
+
+Usage:
+    configure("signal-service")
+    app.add_middleware(TracingMiddleware)
+
+    with span("refresh", root=True):
+        with span("regression", window=90) as s:
+            ...
+            s.set(rows=len(result))
+"""
+
+import asyncio
+import atexit
+import contextvars
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+# OTLP enums
+KIND_INTERNAL = 1
+KIND_SERVER = 2
+STATUS_ERROR = 2
+
+PROFILE_HEADER = b"x-profile"
+
+_current = contextvars.ContextVar("signal_trace_span", default=None)
+_exporter = None
+_profiling = False
+
+
+def trace_file():
+    """OTLP/JSON span file: $SIGNAL_TRACE_FILE or ./data/traces/spans.jsonl."""
+    return Path(os.environ.get("SIGNAL_TRACE_FILE", "./data/traces/spans.jsonl"))
+
+
+def profile_dir():
+    return trace_file().parent / "profiles"
+
+
+def prune_profiles(directory, keep):
+    """Delete all but the `keep` most recently written profiles in `directory`."""
+    profiles = []
+    for path in Path(directory).glob("*.folded"):
+        try:
+            profiles.append((path.stat().st_mtime_ns, path))
+        except FileNotFoundError:
+            continue  # Pruned concurrently by another worker
+    profiles.sort()
+    for _, path in profiles[:max(len(profiles) - keep, 0)]:
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def _attribute(key, value):
+    """OTLP KeyValue for a Python scalar."""
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+class JsonFileExporter:
+    """
+    Append finished traces to a JSON-lines file in OTLP/JSON encoding.
+
+    Traces are queued by the request that finishes them and encoded and
+    written by a flusher thread every `flush_seconds` (or once `max_batch`
+    are pending), so a request only pays for appending to a list.
+
+    Parameters
+    ----------
+    path : Path
+        Output file; rotated to path.1 once it exceeds max_bytes
+    service : str
+        Resource service.name
+    max_bytes : int
+        Rotation threshold
+    flush_seconds : float
+        Flush interval of the background writer
+    max_batch : int
+        Pending traces that trigger an early flush
+    """
+
+    def __init__(self, path, service, max_bytes=64 * 2**20, flush_seconds=1.0, max_batch=512):
+        self.path = Path(path)
+        self.service = service
+        self.max_bytes = max_bytes
+        self.flush_seconds = flush_seconds
+        self.max_batch = max_batch
+        self._pending = []
+        self._swap = threading.Lock()    # guards _pending
+        self._lock = threading.Lock()    # serializes file writes
+        self._wake = threading.Event()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        threading.Thread(target=self._run, name="signal-trace-export", daemon=True).start()
+        atexit.register(self.flush)
+
+    def encode(self, spans):
+        return {"resourceSpans": [{
+            "resource": {"attributes": [_attribute("service.name", self.service),
+                                        _attribute("process.pid", os.getpid())]},
+            "scopeSpans": [{"scope": {"name": "signal_trace"}, "spans": [s.to_otlp() for s in spans]}],
+        }]}
+
+    def export(self, spans):
+        with self._swap:
+            self._pending.append(spans)
+            full = len(self._pending) >= self.max_batch
+        if full:
+            self._wake.set()
+
+    def flush(self):
+        """Encode and append every pending trace."""
+        with self._lock:
+            with self._swap:
+                pending, self._pending = self._pending, []
+            if not pending:
+                return
+            lines = "".join(json.dumps(self.encode(spans), separators=(",", ":")) + "\n"
+                            for spans in pending)
+            try:
+                if self.path.stat().st_size > self.max_bytes:
+                    os.replace(self.path, self.path.with_name(self.path.name + ".1"))
+            except OSError:
+                pass
+            # One append per batch, so workers sharing the file do not
+            # interleave lines
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(lines)
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_seconds)
+            self._wake.clear()
+            try:
+                self.flush()
+            except OSError as e:
+                print(f"Trace export failed: {e}")
+
+
+def configure(service, path=None, max_bytes=64 * 2**20):
+    """
+    Enable tracing for this process. SIGNAL_TRACING=0 leaves it disabled;
+    SIGNAL_PROFILING=1 also honors `X-Profile: 1` on traced requests.
+
+    Returns
+    -------
+    JsonFileExporter or None
+    """
+    global _exporter, _profiling
+    if os.environ.get("SIGNAL_TRACING", "1") == "0":
+        _exporter = None
+    else:
+        _exporter = JsonFileExporter(path or trace_file(), service, max_bytes)
+    _profiling = _exporter is not None and os.environ.get("SIGNAL_PROFILING") == "1"
+    return _exporter
+
+
+def enabled():
+    return _exporter is not None
+
+
+class _Trace:
+    __slots__ = ("trace_id", "spans", "profiler")
+
+    def __init__(self):
+        self.trace_id = f"{random.getrandbits(128):032x}"
+        self.spans = []
+        self.profiler = None
+
+
+class Span:
+    """One timed stage; use through span()."""
+
+    __slots__ = ("trace", "span_id", "parent", "name", "kind", "attributes",
+                 "start_ns", "end_ns", "error", "_token")
+
+    def __init__(self, name, kind, attributes):
+        self.parent = _current.get()
+        self.trace = self.parent.trace if self.parent is not None else _Trace()
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes
+        self.error = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def __enter__(self):
+        self._token = _current.set(self)
+        profiler = self.trace.profiler
+        if profiler is not None:
+            profiler.enter()
+        self.start_ns = time.time_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end_ns = time.time_ns()
+        if self.trace.profiler is not None:
+            self.trace.profiler.exit()
+        _current.reset(self._token)
+        if exc is not None:
+            self.error = f"{exc_type.__name__}: {exc}"
+        self.trace.spans.append(self)
+        if self.parent is None and _exporter is not None:
+            _exporter.export(self.trace.spans)
+        return False
+
+    def to_otlp(self):
+        data = {
+            "traceId": self.trace.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [_attribute(k, v) for k, v in self.attributes.items()],
+        }
+        if self.parent is not None:
+            data["parentSpanId"] = self.parent.span_id
+        if self.error is not None:
+            data["status"] = {"code": STATUS_ERROR, "message": self.error}
+        return data
+
+
+class _NoSpan:
+    """Stand-in when tracing is disabled or no trace is active."""
+
+    __slots__ = ()
+
+    def set(self, **attributes):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+def span(name, kind=KIND_INTERNAL, root=False, **attributes):
+    """
+    Context manager timing one stage under the current span.
+
+    Parameters
+    ----------
+    name : str
+        Stage name (fetch, returns, regression, z, cache, serialize, ...)
+    kind : int
+        OTLP span kind
+    root : bool
+        Start a new trace when there is no current span; other spans are
+        only recorded inside a trace
+    **attributes
+        Scalar span attributes
+    """
+    if _exporter is None or (not root and _current.get() is None):
+        return _NO_SPAN
+    return Span(name, kind, attributes)
+
+
+# ============================================================================
+# Sampling profiler
+# ============================================================================
+
+class SamplingProfiler:
+    """
+    Samples the stacks of threads inside a trace's spans every `interval`
+    seconds and counts them as folded (root-first, ';'-joined) stacks.
+    """
+
+    def __init__(self, trace, interval=0.005):
+        self.trace = trace
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._active = Counter()   # thread id -> open spans of this trace
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="signal-profiler", daemon=True)
+
+    def start(self):
+        self.trace.profiler = self
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.trace.profiler = None
+
+    def enter(self):
+        self._active[threading.get_ident()] += 1
+
+    def exit(self):
+        self._active[threading.get_ident()] -= 1
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            for tid, depth in list(self._active.items()):
+                frame = frames.get(tid)
+                if depth <= 0 or frame is None:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                self.stacks[";".join(reversed(stack))] += 1
+                self.samples += 1
+
+    def folded(self):
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def write(self, directory=None, keep=None):
+        """
+        Write the folded stacks to {directory}/{trace_id}.folded, keeping
+        only the `keep` newest profiles (default $SIGNAL_PROFILE_LIMIT or 100).
+        """
+        directory = Path(directory) if directory is not None else profile_dir()
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"{self.trace.trace_id}.folded"
+        path.write_text(self.folded(), encoding="utf-8")
+        prune_profiles(directory, int(os.environ.get("SIGNAL_PROFILE_LIMIT", "100")) if keep is None else keep)
+        return path
+
+
+_TRACE_ID = re.compile(r"[0-9a-f]{32}")
+
+
+def read_profile(trace_id):
+    """
+    Folded stacks recorded for a trace.
+
+    Raises
+    ------
+    ValueError
+        If trace_id is not 32 lowercase hex digits
+    LookupError
+        If no profile was recorded for it
+    """
+    if not _TRACE_ID.fullmatch(trace_id):
+        raise ValueError("trace id must be 32 lowercase hex digits")
+    try:
+        return (profile_dir() / f"{trace_id}.folded").read_text(encoding="utf-8")
+    except FileNotFoundError:
+        raise LookupError(f"no profile for trace {trace_id}")
+
+
+# ============================================================================
+# ASGI middleware
+# ============================================================================
+
+class TracingMiddleware:
+    """
+    Wrap each HTTP request in a server span, return its id in X-Trace-Id and,
+    with SIGNAL_PROFILING=1, profile requests carrying `X-Profile: 1`.
+
+    Stopping the sampler (a thread join) and writing the profile run on a
+    worker thread, off the event loop.
+    """
+
+    def __init__(self, app, interval=0.005):
+        self.app = app
+        self.interval = interval
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or _exporter is None:
+            await self.app(scope, receive, send)
+            return
+
+        profile = _profiling and dict(scope["headers"]).get(PROFILE_HEADER, b"").lower() in (b"1", b"true")
+        with span(f"{scope['method']} {scope['path']}", kind=KIND_SERVER, root=True,
+                  **{"http.request.method": scope["method"], "url.path": scope["path"]}) as root:
+            trace_id = root.trace.trace_id
+            profiler = SamplingProfiler(root.trace, self.interval).start() if profile else None
+
+            async def send_traced(message):
+                nonlocal profiler
+                if message["type"] == "http.response.start":
+                    root.set(**{"http.response.status_code": message["status"]})
+                    headers = list(message.get("headers", []))
+                    headers.append((b"x-trace-id", trace_id.encode()))
+                    if profiler is not None:
+                        headers.append((b"x-profile-artifact", f"/profiles/{trace_id}".encode()))
+                    message = {**message, "headers": headers}
+                elif profiler is not None and not message.get("more_body", False):
+                    # Written before the last body chunk, so the artifact
+                    # exists by the time the client has the response
+                    finished, profiler = profiler, None
+                    await asyncio.to_thread(finished.stop)
+                    root.set(**{"profile.samples": finished.samples})
+                    await asyncio.to_thread(finished.write)
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_traced)
+            finally:
+                if profiler is not None:
+                    await asyncio.to_thread(profiler.stop)
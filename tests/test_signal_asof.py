@@ -0,0 +1,106 @@
+"""
+test_signal_asof.py
+
+As-of gold-nq values must equal the full-history computation at every
+stored date, including checkpoint dates. As-of concordance values must
+match the full computation with the checkpoint's logit, and answering a
+query must not refit it.
+
+Usage:
+    python -m pytest tests/
+"""
+
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / "src"))
+
+import concordance_signal as cs
+import gold_vs_nasdaq as gnq
+from signal_asof import AsOfSignal, ConcordanceModel, GoldNqModel
+
+WINDOW = 20
+EVERY = 7
+
+
+@pytest.fixture
+def prices():
+    rng = np.random.default_rng(7)
+    index = pd.bdate_range("2022-01-03", periods=160)
+    gold = rng.normal(0, 0.01, len(index))
+    nasdaq = 0.3 * gold + rng.normal(0, 0.012, len(index))
+    walk = 100 * np.exp(np.cumsum(np.column_stack([nasdaq, gold]), axis=0))
+    return pd.DataFrame(walk, index=index, columns=["NQ", "XAU"])
+
+
+@pytest.fixture
+def macro():
+    rng = np.random.default_rng(11)
+    index = pd.bdate_range("2022-01-03", periods=160)
+    columns = ["EQ", "XAU", "UST", "DXY", "VIX", "REAL"]
+    walk = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (len(index), len(columns))), axis=0))
+    return pd.DataFrame(walk, index=index, columns=columns)
+
+
+def test_every_date_matches_compute_rolling_signal(prices, tmp_path):
+    asof = AsOfSignal("gold-nq", GoldNqModel(window=WINDOW), every=EVERY, directory=tmp_path)
+    # Grow the record the way the refresh writer does, so checkpoints are
+    # written across several calls
+    for end in range(60, len(prices) + 1, 25):
+        asof.record(prices.iloc[:end])
+    asof.record(prices)
+
+    table = asof.inputs.load()
+    assert len(table) == len(prices) - 1
+    assert asof.checkpoints.dates(), "no checkpoints were written"
+
+    signal = gnq.compute_rolling_signal(table, window=WINDOW)
+    for date in table.index:
+        if date < signal.index[0]:
+            with pytest.raises(LookupError):
+                asof.query(date)
+            continue
+        expected = gnq.latest_payload(signal.loc[:date], window=WINDOW)
+        got = asof.query(date)
+        assert got["date"] == expected["date"]
+        for field in ("z", "eps", "beta_xau", "alpha"):
+            assert got[field] == pytest.approx(expected[field], abs=1e-4), (date, field)
+
+
+def test_dates_after_the_record_are_not_final(prices, tmp_path):
+    asof = AsOfSignal("gold-nq", GoldNqModel(window=WINDOW), every=EVERY, directory=tmp_path)
+    asof.record(prices)
+    with pytest.raises(LookupError):
+        asof.query(prices.index[-1])
+
+
+def test_concordance_queries_replay_from_the_checkpoint(macro, tmp_path, monkeypatch):
+    asof = AsOfSignal("concordance", ConcordanceModel(window=WINDOW), every=EVERY, directory=tmp_path)
+    asof.record(macro)
+    table = asof.inputs.load()
+    checkpoints = {pd.Timestamp(d) for d in asof.checkpoints.dates()}
+    assert checkpoints, "no checkpoints were written"
+
+    fits = []
+    fit_logit = cs.fit_logit
+    monkeypatch.setattr(cs, "fit_logit", lambda *a, **k: fits.append(1) or fit_logit(*a, **k))
+
+    full = cs.compute_concordance(table, window=WINDOW)
+    for date in full.index[full.index >= min(checkpoints)]:
+        got = asof.query(date)
+        label, state = asof.checkpoints.latest(date.strftime("%Y-%m-%d"))
+        params = pd.Series(state["params"], index=["const"] + cs.LOGIT_INPUTS)
+        expected = cs.latest_payload(full.loc[:date], SimpleNamespace(params=params))
+        assert got["concordance_score"] == pytest.approx(expected["concordance_score"]), date
+        assert got["prob_concordant"] == pytest.approx(expected["prob_concordant"]), date
+        assert got["latest_inputs"] == pytest.approx(expected["latest_inputs"]), date
+        if date in checkpoints:
+            # On a checkpoint date the coefficients are that date's own fit
+            model = fit_logit(full.loc[:date])
+            assert got["betas"] == pytest.approx(model.params.to_dict(), abs=1e-6), date
+    assert not fits, f"{len(fits)} queries refit the logit"